@@ -13,23 +13,19 @@ print("store_incomingparcel columns:")
 for col in columns:
     print(f"  {col[1]}: {col[2]}")
 
-# Get latest parcel's signature
-cursor.execute("SELECT id, wtn_reference, substr(wtn_signature, 1, 100) as sig_preview FROM store_incomingparcel ORDER BY id DESC LIMIT 1")
+# Get latest parcel's signatures (stored as PNG blobs in store_wtnsignature)
+cursor.execute("SELECT id, wtn_reference FROM store_incomingparcel ORDER BY id DESC LIMIT 1")
 parcel = cursor.fetchone()
 if parcel:
     print(f"\nLatest parcel:")
     print(f"  ID: {parcel[0]}")
     print(f"  Reference: {parcel[1]}")
-    print(f"  Signature preview: {parcel[2]}")
     
-    if parcel[2]:
-        if parcel[2].startswith('gAAAAA'):
-            print("  ⚠️ ENCRYPTED (Fernet)")
-        elif parcel[2].startswith('data:image'):
-            print("  ✓ Base64 data URL")
-        elif parcel[2].startswith('iVBOR'):
-            print("  ✓ Raw base64 PNG")
+    cursor.execute("SELECT role, length(image), substr(image, 1, 8) FROM store_wtnsignature WHERE parcel_id = ?", (parcel[0],))
+    for role, size, header in cursor.fetchall():
+        if header == b'\x89PNG\r\n\x1a\n':
+            print(f"  ✓ {role} signature: {size} byte PNG")
         else:
-            print("  ❓ Unknown format")
+            print(f"  ❓ {role} signature: unknown format")
 
 conn.close()
@@ -4,14 +4,14 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'website.settings')
 django.setup()
 
-from store.models import IncomingParcel
+from store.models import IncomingParcel, WtnSignature
 
 # Get the latest parcel
 p = IncomingParcel.objects.latest('id')
 print(f'Latest parcel ID: {p.id}')
 
 # Check the actual field type
-field = IncomingParcel._meta.get_field('wtn_signature')
+field = WtnSignature._meta.get_field('image')
 print(f'\nField type: {type(field)}')
 print(f'Field class: {field.__class__.__name__}')
 print(f'Field module: {field.__class__.__module__}')
@@ -20,4 +20,4 @@ print(f'Field module: {field.__class__.__module__}')
 if 'Encrypted' in field.__class__.__name__:
     print('⚠️ STILL USING EncryptedTextField!')
 else:
-    print('✓ Using regular TextField')
+    print('✓ Using regular BinaryField')
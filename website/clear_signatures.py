@@ -4,8 +4,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'website.settings')
 django.setup()
 
-from store.models import IncomingParcel
+from store.models import WtnSignature
 
-# Clear all signature fields
-count = IncomingParcel.objects.all().update(wtn_signature='', wtn_admin_signature='')
-print(f'Cleared signatures from {count} parcels')
+# Delete all stored signature images
+count, _ = WtnSignature.objects.all().delete()
+print(f'Deleted {count} signatures')
@@ -0,0 +1,184 @@
+"""
+Customer activity feeds, newest first: outbound orders and inbound parcels on
+the orders page, and point transactions on the points history page.
+
+Orders and parcels are read as one UNION ALL query with the columns the orders page
+shows (reference, status, order total, parcel weight) annotated in SQL, so a
+page is a single query however many entries a customer has. Pages are keyed
+on the last entry shown (date, then type, then id) rather than an OFFSET, so
+the database can walk the (customer, date) indexes straight to the next page.
+
+Point transactions are paged the same way. Each one shows the balance after it,
+counted down from the balance at the top of the page with a running SUM()
+window over the page's rows. The first page starts from the customer's
+total_points, the balance the rest of the site shows, and later pages carry
+their starting balance in a signed cursor, so no page ever has to sum a
+customer's whole history.
+"""
+import datetime
+
+from django.core import signing
+from django.db.models import CharField, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Cast, Coalesce, Concat
+from .models import IncomingParcel, Order, ParcelMaterial, ParcelStatus, PointTransaction
+
+PAGE_SIZE = 25
+
+ORDER = 'order'
+PARCEL = 'parcel'
+# Sort order within a timestamp: parcels before orders, higher ids first
+ENTRY_TYPES = (PARCEL, ORDER)
+
+COLUMNS = ('entry_type', 'entry_id', 'entry_date', 'entry_reference', 'entry_status', 'entry_total', 'entry_tracking', 'entry_weight')
+
+# Order statuses are stored as their labels already
+PARCEL_STATUS_LABELS = dict(ParcelStatus.choices)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+POINTS_CURSOR_SALT = 'store.activity.points_cursor'
+
+
+def encode_cursor(entry):
+    """URL-safe cursor pointing just past entry"""
+    microseconds = (entry['date'] - EPOCH) // datetime.timedelta(microseconds=1)
+    return f"{microseconds}-{entry['type']}-{entry['pk']}"
+
+
+def decode_cursor(cursor):
+    """(date, type, pk) from encode_cursor. Raises ValueError if it's malformed."""
+    microseconds, entry_type, pk = cursor.split('-')
+    if entry_type not in ENTRY_TYPES:
+        raise ValueError(f'Unknown activity type {entry_type!r}')
+    return EPOCH + datetime.timedelta(microseconds=int(microseconds)), entry_type, int(pk)
+
+
+def after_cursor(entries, entry_type, cursor):
+    """Entries of entry_type that sort after cursor (newest first)"""
+    date, cursor_type, cursor_pk = cursor
+    same_date = Q(pk__in=[])
+    if entry_type == cursor_type:
+        same_date = Q(entry_date=date, entry_id__lt=cursor_pk)
+    elif entry_type < cursor_type:
+        same_date = Q(entry_date=date)
+    return entries.filter(Q(entry_date__lt=date) | same_date)
+
+
+def order_entries(customer):
+    if customer is None:
+        return Order.objects.none()
+    return Order.objects.filter(customer=customer).annotate(
+        entry_type=Value(ORDER, output_field=CharField()),
+        entry_id=F('pk'),
+        entry_date=F('date_ordered'),
+        entry_reference=Coalesce('reference', Concat(Value(f'{Order.INDIVIDUAL_PREFIX}-'), Cast('pk', CharField()))),
+        entry_status=F('status'),
+        entry_total=F('subtotal'),
+        entry_tracking=F('tracking_number'),
+        entry_weight=Value(None, output_field=DecimalField()),
+    )
+
+
+def parcel_entries(user):
+    weight = (
+        ParcelMaterial.objects.filter(parcel=OuterRef('pk'))
+        .values('parcel')
+        .annotate(total=Sum('weight_kg'))
+        .values('total')
+    )
+    return IncomingParcel.objects.filter(user=user).annotate(
+        entry_type=Value(PARCEL, output_field=CharField()),
+        entry_id=F('pk'),
+        entry_date=F('date_submitted'),
+        entry_reference=Concat('parcel_prefix', Value('-'), Cast('pk', CharField())),
+        entry_status=F('status'),
+        entry_total=Value(None, output_field=DecimalField()),
+        entry_tracking=Value(None, output_field=CharField()),
+        entry_weight=Subquery(weight, output_field=DecimalField()),
+    )
+
+
+def activity_page(user, customer, cursor=None, page_size=PAGE_SIZE):
+    """
+    (entries, next_cursor) for one page of user's activity, starting after
+    cursor (an encode_cursor string) or at the newest entry. next_cursor is
+    None on the last page. Raises ValueError for a malformed cursor.
+    """
+    orders = order_entries(customer)
+    parcels = parcel_entries(user)
+    if cursor:
+        position = decode_cursor(cursor)
+        orders = after_cursor(orders, ORDER, position)
+        parcels = after_cursor(parcels, PARCEL, position)
+
+    feed = orders.values(*COLUMNS).union(parcels.values(*COLUMNS), all=True)
+    rows = list(feed.order_by('-entry_date', '-entry_type', '-entry_id')[:page_size + 1])
+
+    entries = [
+        {
+            'type': row['entry_type'],
+            'pk': row['entry_id'],
+            'date': row['entry_date'],
+            'reference': row['entry_reference'],
+            'status': PARCEL_STATUS_LABELS.get(row['entry_status'], row['entry_status']),
+            'total': row['entry_total'],
+            'tracking': row['entry_tracking'],
+            'weight': row['entry_weight'],
+        }
+        for row in rows[:page_size]
+    ]
+    next_cursor = encode_cursor(entries[-1]) if len(rows) > page_size else None
+    return entries, next_cursor
+
+
+def encode_points_cursor(customer, transaction, balance):
+    """
+    Signed cursor for the customer's transactions older than transaction,
+    whose newest ends on balance. It's signed because the balance is shown
+    as-is, not recomputed.
+    """
+    microseconds = (transaction.date_created - EPOCH) // datetime.timedelta(microseconds=1)
+    return signing.dumps([customer.pk, microseconds, transaction.pk, balance], salt=POINTS_CURSOR_SALT)
+
+
+def decode_points_cursor(customer, cursor):
+    """(date, pk, balance) from encode_points_cursor. Raises ValueError if it's tampered with or not the customer's."""
+    try:
+        customer_pk, microseconds, pk, balance = signing.loads(cursor, salt=POINTS_CURSOR_SALT)
+    except signing.BadSignature as e:
+        raise ValueError('Invalid points history cursor') from e
+    if customer_pk != customer.pk:
+        raise ValueError('Points history cursor belongs to another customer')
+    return EPOCH + datetime.timedelta(microseconds=microseconds), pk, balance
+
+
+def points_page(customer, cursor=None, page_size=PAGE_SIZE):
+    """
+    (transactions, next_cursor) for one page of customer's point transactions,
+    starting after cursor or at the newest. Each transaction has a .balance
+    attribute: the balance once it was applied. next_cursor is None on the
+    last page. Raises ValueError for a malformed cursor.
+    """
+    transactions = PointTransaction.objects.filter(customer=customer)
+    if cursor:
+        date, pk, balance = decode_points_cursor(customer, cursor)
+        transactions = transactions.filter(Q(date_created__lt=date) | Q(date_created=date, pk__lt=pk))
+    else:
+        balance = customer.total_points
+
+    newest_first = [F('date_created').desc(), F('pk').desc()]
+    page = list(
+        transactions.annotate(
+            # Points of this and every newer transaction on the page
+            newer_points=Window(Sum('points'), order_by=newest_first, frame=RowRange(start=None, end=0)),
+        ).order_by(*newest_first)[:page_size + 1]
+    )
+
+    for transaction in page:
+        transaction.balance = balance - transaction.newer_points + transaction.points
+    next_cursor = None
+    if len(page) > page_size:
+        last = page[page_size - 1]
+        next_cursor = encode_points_cursor(customer, last, last.balance - last.points)
+    return page[:page_size], next_cursor
@@ -1,11 +1,16 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.admin import helpers as admin_helpers
 from django.template.response import TemplateResponse
 from django.urls import path
 from django.utils.html import format_html
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, F, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 import json
+import re
 from markdownx.admin import MarkdownxModelAdmin
 from .models import (
     Customer,
@@ -18,13 +23,22 @@ from .models import (
     PointTransaction,
     PlasticType,
     OrderStatus,
+    ParcelStatus,
     BlogPost,
     NewsletterSubscriber,
     BusinessBoxPreference,
     ProductReview,
     SubscriptionPlan,
+    EmailOutbox,
+    EmailStatus,
+    PdfJob,
+    PdfJobStatus,
+    WtnSignature,
+    WtnSignatureRole,
 )
 from .emails import send_order_confirmation, send_order_processing, send_order_shipped
+from .signatures import normalize_signature
+from .page_cache import DASHBOARD_CACHE_KEY, DASHBOARD_CACHE_TIMEOUT, cache_is_shared, invalidate_dashboard_cache, invalidate_calendar
 
 class CustomAdminSite(admin.AdminSite):
     site_header = "Store Admin"
@@ -40,52 +54,81 @@ class CustomAdminSite(admin.AdminSite):
     
     def dashboard_view(self, request):
         """Custom dashboard showing pending tasks"""
+        # Only cached where every process sees the signals' invalidations
+        data = cache.get(DASHBOARD_CACHE_KEY) if cache_is_shared() else None
+        if data is None:
+            data = self.get_dashboard_data()
+            if cache_is_shared():
+                cache.set(DASHBOARD_CACHE_KEY, data, DASHBOARD_CACHE_TIMEOUT)
+        
+        context = {
+            **self.each_context(request),
+            'title': 'Admin Dashboard',
+            **data,
+        }
+        
+        return TemplateResponse(request, 'admin/dashboard.html', context)
+    
+    def get_dashboard_data(self):
+        """
+        Counters come from one conditional-aggregation query per table and the
+        stale flag is computed in SQL. Lists are evaluated so they can be cached.
+        """
+        now = timezone.now()
+        stale_cutoff = now - timedelta(days=7)
+        recent_cutoff = now - timedelta(days=7)
+        
+        order_counts = Order.objects.aggregate(
+            pending_orders_count=Count('id', filter=Q(status=OrderStatus.RECEIVED)),
+            processing_orders_count=Count('id', filter=Q(status=OrderStatus.PROCESSING)),
+        )
+        # Pending = received at the depot but not yet weighed and processed
+        parcel_counts = IncomingParcel.objects.aggregate(
+            pending_parcels_count=Count('id', filter=Q(status=ParcelStatus.RECEIVED)),
+            stale_parcels_count=Count('id', filter=Q(status=ParcelStatus.RECEIVED, date_submitted__lt=stale_cutoff)),
+        )
+        
         # Get pending orders (Order Received status - ready to process)
-        pending_orders = Order.objects.filter(
+        pending_orders = list(Order.objects.filter(
             status=OrderStatus.RECEIVED
-        ).select_related('customer').prefetch_related('orderitem_set__product').order_by('-date_ordered')
+        ).select_related('customer').order_by('-date_ordered'))
         
         # Get orders in processing (being fulfilled)
-        processing_orders = Order.objects.filter(
+        processing_orders = list(Order.objects.filter(
             status=OrderStatus.PROCESSING
-        ).select_related('customer').order_by('-date_ordered')
+        ).select_related('customer').order_by('-date_ordered'))
         
-        # Get pending parcels (Submitted but not processed)
-        pending_parcels = IncomingParcel.objects.filter(
-            status='Submitted'
-        ).select_related('user').prefetch_related('materials').order_by('-date_submitted')
-        
-        # Flag stale parcels (>7 days old)
-        stale_cutoff = timezone.now() - timedelta(days=7)
-        for parcel in pending_parcels:
-            parcel.is_stale = parcel.date_submitted < stale_cutoff
+        # Get pending parcels, flagging stale ones (>7 days old)
+        pending_parcels = list(IncomingParcel.objects.filter(
+            status=ParcelStatus.RECEIVED
+        ).select_related('user').annotate(
+            is_stale=Case(
+                When(date_submitted__lt=stale_cutoff, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        ).order_by('-date_submitted'))
         
         # Get recent activity (last 7 days)
-        recent_cutoff = timezone.now() - timedelta(days=7)
-        recent_orders = Order.objects.filter(
+        recent_orders = list(Order.objects.filter(
             date_ordered__gte=recent_cutoff,
             status__in=[OrderStatus.SHIPPED, OrderStatus.DELIVERED]
-        ).order_by('-date_ordered')[:10]
+        ).order_by('-date_ordered')[:10])
         
-        recent_parcels = IncomingParcel.objects.filter(
+        recent_parcels = list(IncomingParcel.objects.filter(
             date_submitted__gte=recent_cutoff,
-            status='Processed'
-        ).order_by('-date_submitted')[:10]
+            status=ParcelStatus.PROCESSED
+        ).order_by('-date_submitted')[:10])
         
-        context = {
-            **self.each_context(request),
-            'title': 'Admin Dashboard',
+        return {
+            **order_counts,
+            **parcel_counts,
             'pending_orders': pending_orders,
-            'pending_orders_count': pending_orders.count(),
             'processing_orders': processing_orders,
-            'processing_orders_count': processing_orders.count(),
             'pending_parcels': pending_parcels,
-            'pending_parcels_count': pending_parcels.count(),
             'recent_orders': recent_orders,
             'recent_parcels': recent_parcels,
         }
-        
-        return TemplateResponse(request, 'admin/dashboard.html', context)
     
     def index(self, request, extra_context=None):
         """Override default index to redirect to custom dashboard"""
@@ -124,20 +167,53 @@ class ParcelMaterialInline(admin.TabularInline):
         return "—"
     calculated_points.short_description = "Points"
 
+class IncomingParcelAdminForm(forms.ModelForm):
+    """Parcel form plus the admin's countersignature pad, which is saved as a WtnSignature"""
+    wtn_admin_signature = forms.CharField(
+        required=False,
+        widget=forms.Textarea,
+        label="Admin signature",
+        help_text="Admin's signature, drawn on the pad above",
+    )
+    
+    class Meta:
+        model = IncomingParcel
+        fields = '__all__'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            # Shown on the pad so an approved WTN isn't re-signed by accident
+            signature = self.instance.signatures.filter(role=WtnSignatureRole.ADMIN).first()
+            if signature:
+                self.initial['wtn_admin_signature'] = signature.data_url
+    
+    def clean_wtn_admin_signature(self):
+        """Normalize a newly drawn signature to a 1-bit PNG; '' means it was cleared"""
+        data_url = self.cleaned_data['wtn_admin_signature']
+        if not data_url or 'wtn_admin_signature' not in self.changed_data:
+            return data_url
+        try:
+            return normalize_signature(data_url)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+
 @admin.register(IncomingParcel, site=admin_site)
 class IncomingParcelAdmin(admin.ModelAdmin):
+    form = IncomingParcelAdminForm
     change_form_template = 'admin/store/incomingparcel/change_form.html'
     list_display = ('__str__', 'user', 'membership_tier', 'status_badge', 'age_badge', 'wtn_status', 'admin_signed_status', 'points_calculated', 'date_submitted')
-    list_filter = ('status', 'date_submitted')
+    list_filter = ('status', 'date_submitted', 'wtn_signed_date')
     search_fields = ('id', 'user__username', 'user__email', 'wtn_reference')
-    readonly_fields = ('user', 'date_submitted', 'membership_tier', 'age_display', 'wtn_signed_date', 'wtn_admin_approved_date', 'wtn_pdf_path', 'customer_signature_display')
+    list_select_related = ('user',)
+    readonly_fields = ('user', 'date_submitted', 'membership_tier', 'age_display', 'wtn_signed_date', 'wtn_admin_approved_date', 'wtn_pdf_path', 'wtn_pdf_status', 'customer_signature_display')
     
     fieldsets = (
         ('Section A - Personal Information', {
             'fields': ('user', 'membership_tier', 'status', 'age_display', 'date_submitted')
         }),
         ('Section B - Waste Transfer Note (WTN)', {
-            'fields': ('wtn_reference', 'wtn_signed_date', 'customer_signature_display', 'wtn_admin_approved', 'wtn_admin_signature', 'wtn_admin_approved_date', 'wtn_pdf_path')
+            'fields': ('wtn_reference', 'wtn_signed_date', 'customer_signature_display', 'wtn_admin_approved', 'wtn_admin_signature', 'wtn_admin_approved_date', 'wtn_pdf_path', 'wtn_pdf_status')
         }),
         ('Section C - Box Information', {
             'fields': ('address', 'city', 'county', 'postcode', 'country', 'estimated_weight', 'collection_scheduled_date', 'details')
@@ -149,7 +225,15 @@ class IncomingParcelAdmin(admin.ModelAdmin):
     )
     
     inlines = [ParcelMaterialInline]
-    actions = ['mark_as_cancelled', 'mark_as_processed']
+    actions = ['mark_as_cancelled', 'mark_as_processed', 'approve_wtns', 'download_wtns']
+    
+    def get_queryset(self, request):
+        """Annotate the customer's tier so list rows don't query for it"""
+        latest_pdf_job = PdfJob.objects.filter(parcel=OuterRef('pk')).order_by('-created_at')
+        return super().get_queryset(request).annotate(
+            membership_is_premium=F('user__customer__is_premium'),
+            pdf_job_status=Subquery(latest_pdf_job.values('status')[:1]),
+        )
     
     def wtn_status(self, obj):
         """Show if WTN has been signed"""
@@ -163,14 +247,19 @@ class IncomingParcelAdmin(admin.ModelAdmin):
     wtn_status.short_description = "WTN"
     
     def admin_signed_status(self, obj):
-        """Show if Admin has approved the WTN"""
-        if obj.wtn_admin_approved and obj.wtn_pdf_path:
-            return format_html(
-                '<span style="background:#3b82f6; color:#fff; padding:4px 10px; border-radius:12px; font-weight:600; font-size:0.8rem;">✓ Admin Signed</span>'
-            )
-        return format_html(
-            '<span style="background:#9ca3af; color:#fff; padding:4px 10px; border-radius:12px; font-weight:600; font-size:0.8rem;">Awaiting</span>'
-        )
+        """Show if Admin has approved the WTN, and where its PDF is up to"""
+        badge = '<span style="background:{}; color:#fff; padding:4px 10px; border-radius:12px; font-weight:600; font-size:0.8rem;" title="{}">{}</span>'
+        if not obj.wtn_admin_approved:
+            return format_html(badge, '#9ca3af', '', 'Awaiting')
+        if obj.wtn_pdf_path:
+            return format_html(badge, '#3b82f6', '', '✓ Admin Signed')
+        job_status = getattr(obj, 'pdf_job_status', None)
+        if job_status in (PdfJobStatus.PENDING, PdfJobStatus.RUNNING):
+            return format_html(badge, '#fbbf24', '', '⏳ PDF Queued')
+        if job_status == PdfJobStatus.FAILED:
+            return format_html(badge, '#ef4444', 'Retry it from PDF jobs', 'PDF Failed')
+        # Approved before PDFs were rendered in the background, or the file was removed
+        return format_html(badge, '#6b7280', 'Queue it with "Approve signed WTNs"', 'No PDF')
     admin_signed_status.short_description = "Admin Approval"
     
     def status_badge(self, obj):
@@ -221,9 +310,12 @@ class IncomingParcelAdmin(admin.ModelAdmin):
     
     def membership_tier(self, obj):
         """Show if user is premium or basic"""
-        if obj and obj.user:
-            customer = Customer.objects.filter(user=obj.user).first()
-            if customer and customer.is_premium:
+        if obj and obj.user_id:
+            if hasattr(obj, 'membership_is_premium'):
+                is_premium = obj.membership_is_premium
+            else:
+                is_premium = Customer.objects.filter(user_id=obj.user_id).values_list('is_premium', flat=True).first()
+            if is_premium:
                 return "⭐ Premium (20% bonus)"
             return "Basic"
         return "—"
@@ -231,13 +323,14 @@ class IncomingParcelAdmin(admin.ModelAdmin):
     
     def customer_signature_display(self, obj):
         """Display customer's signature image"""
-        if obj and obj.wtn_signature:
+        signature = obj.signatures.filter(role=WtnSignatureRole.CUSTOMER).first() if obj and obj.pk else None
+        if signature:
             return format_html(
                 '<div style="border: 1px solid #ddd; padding: 10px; background: #f9f9f9; border-radius: 4px;">'
                 '<strong>Customer Signature:</strong><br>'
                 '<img src="{}" style="max-width: 300px; height: auto; border: 1px solid #ccc; margin-top: 8px;">'
                 '</div>',
-                obj.wtn_signature
+                signature.data_url
             )
         return format_html('<span style="color: #999;">{}</span>', 'No signature captured yet')
     customer_signature_display.short_description = "Customer Signature"
@@ -245,6 +338,7 @@ class IncomingParcelAdmin(admin.ModelAdmin):
     def mark_as_cancelled(self, request, queryset):
         """Bulk action to mark parcels as cancelled"""
         count = queryset.update(status='Cancelled')
+        invalidate_dashboard_cache()  # update() skips the save signals
         self.message_user(request, f'{count} parcel(s) marked as cancelled.')
     mark_as_cancelled.short_description = "Mark as Cancelled (No Show)"
     
@@ -259,108 +353,136 @@ class IncomingParcelAdmin(admin.ModelAdmin):
         self.message_user(request, f'{count} parcel(s) marked as processed.')
     mark_as_processed.short_description = "Mark as Processed"
     
+    def wtn_pdf_status(self, obj):
+        """Latest background PDF job for this parcel"""
+        job = obj.pdf_jobs.order_by('-created_at').first() if obj and obj.pk else None
+        if not job:
+            return "-"
+        if job.status == PdfJobStatus.FAILED:
+            return f"{job.get_status_display()} after {job.attempts} attempt(s): {job.last_error}"
+        return job.get_status_display()
+    wtn_pdf_status.short_description = "PDF Status"
+    
+    def approve_wtns(self, request, queryset):
+        """
+        Bulk approve customer-signed WTNs under one admin countersignature,
+        drawn on an intermediate page; the PDFs are rendered by run_pdf_worker
+        """
+        from django.contrib import messages
+        from django.db import transaction
+        from django.shortcuts import render
+        
+        signed = queryset.filter(wtn_signed_date__isnull=False)
+        
+        if 'apply' not in request.POST:
+            context = {
+                'title': 'Approve signed WTNs',
+                'queryset': signed.filter(wtn_admin_approved=False),
+                'selected': signed.only('pk'),
+                'opts': self.model._meta,
+                'action_checkbox_name': admin_helpers.ACTION_CHECKBOX_NAME,
+            }
+            return render(request, 'admin/approve_wtns_form.html', context)
+        
+        try:
+            image = normalize_signature(request.POST.get('wtn_admin_signature', ''))
+        except ValueError as e:
+            self.message_user(request, f'WTNs not approved, the countersignature is required: {e}', level=messages.ERROR)
+            return
+        
+        customer = Customer.objects.filter(user_id=OuterRef('user_id'))
+        to_approve = list(
+            signed.filter(wtn_admin_approved=False)
+            .annotate(
+                customer_is_premium=Subquery(customer.values('is_premium')[:1]),
+                preferred_day=Subquery(customer.values('preferred_delivery_day')[:1]),
+            )
+            .prefetch_related('materials__plastic_type')
+        )
+        approved_at = timezone.now()
+        for parcel in to_approve:
+            # As save_model does for a single approval
+            parcel.wtn_admin_approved = True
+            parcel.wtn_admin_approved_date = approved_at
+            parcel.status = ParcelStatus.AWAITING
+            parcel.collection_scheduled_date = parcel.collection_scheduled_date or parcel.preferred_day
+            total_points = parcel.calculate_points(is_premium=bool(parcel.customer_is_premium))
+            if total_points > 0:
+                parcel.points_calculated = total_points
+        
+        with transaction.atomic():
+            IncomingParcel.objects.bulk_update(to_approve, [
+                'wtn_admin_approved', 'wtn_admin_approved_date', 'status', 'collection_scheduled_date', 'points_calculated',
+            ])
+            WtnSignature.objects.bulk_create(
+                [WtnSignature(parcel=parcel, role=WtnSignatureRole.ADMIN, image=image) for parcel in to_approve],
+                update_conflicts=True, unique_fields=['parcel', 'role'], update_fields=['image'],
+            )
+            # Also re-queues earlier approvals whose PDF is missing, while their signatures are on file
+            queued = PdfJob.enqueue(
+                signed.filter(wtn_admin_approved=True, wtn_pdf_path='', signatures__isnull=False).only('pk')
+            )
+        # bulk_update() skips the post_save signals that drop these caches
+        invalidate_dashboard_cache()
+        invalidate_calendar()
+        self.message_user(request, f'{len(to_approve)} WTN(s) approved, {len(queued)} PDF(s) queued.')
+    approve_wtns.short_description = "Approve signed WTNs with one countersignature (PDFs generated in background)"
+    
+    def download_wtns(self, request, queryset):
+        """
+        Stream the selected parcels' approved WTNs as a ZIP. Filter by WTN
+        signed date first (any range works, e.g. ?wtn_signed_date__gte=2025-01-01&wtn_signed_date__lt=2026-01-01).
+        """
+        from .wtn_export import wtn_zip_response
+        parcels = queryset.filter(wtn_admin_approved=True, wtn_signed_date__isnull=False)
+        return wtn_zip_response(parcels, f'wtns_{timezone.localdate():%Y%m%d}.zip')
+    download_wtns.short_description = "Download approved WTNs (ZIP)"
+    
     def save_model(self, request, obj, form, change):
-        """Handle WTN approval and PDF generation when admin signs"""
-        from store.wtn_pdf import generate_wtn_pdf
-        from django.utils import timezone
+        """Handle WTN approval when admin signs; the PDF is rendered by run_pdf_worker"""
         import logging
-        import os
         
         logger = logging.getLogger(__name__)
         
-        # Check if admin just approved the WTN
-        # Also verify PDF file actually exists if path is set
-        pdf_exists = False
-        if obj.wtn_pdf_path:
-            from django.conf import settings
-            pdf_full_path = os.path.join(settings.MEDIA_ROOT, obj.wtn_pdf_path)
-            pdf_exists = os.path.exists(pdf_full_path)
-            logger.info(f"Checking PDF: path={obj.wtn_pdf_path}, full_path={pdf_full_path}, exists={pdf_exists}")
-            if not pdf_exists:
-                logger.warning(f"PDF path set but file doesn't exist: {pdf_full_path}")
-        
-        should_generate_pdf = obj.wtn_admin_approved and not pdf_exists
-        
-        # Debug output to console
-        print(f"=== PDF GENERATION DEBUG ===")
-        print(f"Parcel ID: {obj.pk}")
-        print(f"wtn_admin_approved: {obj.wtn_admin_approved}")
-        print(f"wtn_pdf_path: {obj.wtn_pdf_path}")
-        print(f"pdf_exists: {pdf_exists}")
-        print(f"should_generate_pdf: {should_generate_pdf}")
-        print(f"===========================")
-        
-        logger.info(f"Save triggered for IncomingParcel {obj.pk}: wtn_admin_approved={obj.wtn_admin_approved}, has_pdf_path={bool(obj.wtn_pdf_path)}, pdf_exists={pdf_exists}, should_generate={should_generate_pdf}")
-        
-        if should_generate_pdf:
+        # Only a change of approval runs the approval branch; saving an
+        # already-approved parcel (e.g. marking it processed while its PDF is
+        # still queued) is a normal save
+        just_approved = obj.wtn_admin_approved and (
+            'wtn_admin_approved' in form.changed_data or not obj.wtn_admin_approved_date
+        )
+        
+        if just_approved:
             # Set approval date
             if not obj.wtn_admin_approved_date:
                 obj.wtn_admin_approved_date = timezone.now()
             
             # Prefill collection date from customer's preferred delivery day if not set
             if not obj.collection_scheduled_date and obj.user:
-                try:
-                    from store.models import Customer
-                    customer = Customer.objects.get(user=obj.user)
-                    if customer.preferred_delivery_day:
-                        obj.collection_scheduled_date = customer.preferred_delivery_day
-                except Customer.DoesNotExist:
-                    pass
+                preferred_day = Customer.objects.filter(user=obj.user).values_list('preferred_delivery_day', flat=True).first()
+                if preferred_day:
+                    obj.collection_scheduled_date = preferred_day
             
-            # Save first to ensure we have an ID
-            super().save_model(request, obj, form, change)
+            # Automatically mark as AWAITING (waiting for parcel arrival)
+            if obj.status != ParcelStatus.AWAITING:
+                obj.status = ParcelStatus.AWAITING
+                logger.info(f"IncomingParcel {obj.pk} automatically marked as awaiting after admin approval")
             
-            # Generate PDF
-            try:
-                print(f">>> ATTEMPTING PDF GENERATION for parcel {obj.pk}")
-                logger.info(f"Starting PDF generation for IncomingParcel {obj.pk}")
-                
-                # Generate PDF
-                print(f">>> Calling generate_wtn_pdf()...")
-                pdf_path = generate_wtn_pdf(obj)
-                print(f">>> PDF generated successfully: {pdf_path}")
-                logger.info(f"PDF generated successfully: {pdf_path}")
-                
-                # Store relative path (MEDIA_URL will be prepended when accessed)
-                obj.wtn_pdf_path = pdf_path
-                print(f">>> PDF path stored in database")
-                
-                # Clear signatures from database for security (they're now in the PDF)
-                if obj.wtn_signature:
-                    print(f">>> Clearing customer signature from database")
-                    obj.wtn_signature = ''
-                    logger.info(f"Customer signature cleared from database for parcel {obj.pk}")
-                
-                if obj.wtn_admin_signature:
-                    print(f">>> Clearing admin signature from database")
-                    obj.wtn_admin_signature = ''
-                    logger.info(f"Admin signature cleared from database for parcel {obj.pk}")
-                
-                # Automatically mark as AWAITING (waiting for parcel arrival)
-                if obj.status != 'awaiting':
-                    obj.status = 'awaiting'
-                    logger.info(f"IncomingParcel {obj.pk} automatically marked as awaiting after admin approval")
-                
-                # Calculate and save points
+            # Calculate points
+            if obj.pk:
                 total_points = obj.calculate_points()
                 if total_points > 0:
                     obj.points_calculated = total_points
-                    logger.info(f"IncomingParcel {obj.pk} calculated {total_points} points")
-                
-                # Save again with updated status
-                super().save_model(request, obj, form, change)
-                
-                print(f">>> PDF generation complete!")
-                self.message_user(request, f'✓ WTN approved and PDF generated successfully! Status set to Processed.', level='SUCCESS')
-            except Exception as e:
-                print(f">>> ERROR in PDF generation: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                logger.error(f"Error generating PDF for IncomingParcel {obj.pk}: {str(e)}")
-                self.message_user(request, f'Error generating PDF: {str(e)}', level='ERROR')
+            
+            super().save_model(request, obj, form, change)
+            self.save_admin_signature(obj, form)
+            
+            if PdfJob.enqueue([obj]):
+                logger.info(f"Queued WTN PDF for IncomingParcel {obj.pk}")
+            self.message_user(request, '✓ WTN approved. The PDF is being generated and will appear here shortly.', level='SUCCESS')
         else:
             # Normal save - still calculate points if there are materials
             super().save_model(request, obj, form, change)
+            self.save_admin_signature(obj, form)
             
             # Recalculate points after save (when materials might have changed)
             if obj.pk and obj.materials.exists():
@@ -369,6 +491,38 @@ class IncomingParcelAdmin(admin.ModelAdmin):
                     obj.points_calculated = total_points
                     obj.save(update_fields=['points_calculated'])
                     self.message_user(request, f'Points recalculated: {total_points}', level='INFO')
+            
+            # Re-queue an approved WTN whose PDF has gone missing, as long as
+            # its signatures are still on file to render it from
+            if obj.wtn_admin_approved and not self.wtn_pdf_on_disk(obj) and obj.signatures.exists():
+                if PdfJob.enqueue([obj]):
+                    logger.info(f"Re-queued missing WTN PDF for IncomingParcel {obj.pk}")
+    
+    def wtn_pdf_on_disk(self, obj):
+        """Whether the parcel's rendered PDF exists; logs a path that points nowhere"""
+        import logging
+        import os
+        from django.conf import settings
+        
+        if not obj.wtn_pdf_path:
+            return False
+        pdf_full_path = os.path.join(settings.MEDIA_ROOT, obj.wtn_pdf_path)
+        if not os.path.exists(pdf_full_path):
+            logging.getLogger(__name__).warning(f"PDF path set but file doesn't exist: {pdf_full_path}")
+            return False
+        return True
+    
+    def save_admin_signature(self, obj, form):
+        """Store, replace or drop the countersignature if the pad was changed"""
+        if 'wtn_admin_signature' not in form.changed_data:
+            return
+        image = form.cleaned_data['wtn_admin_signature']
+        if image:
+            WtnSignature.objects.update_or_create(
+                parcel=obj, role=WtnSignatureRole.ADMIN, defaults={'image': image},
+            )
+        else:
+            obj.signatures.filter(role=WtnSignatureRole.ADMIN).delete()
     
     def change_view(self, request, object_id, form_url='', extra_context=None):
         """Add plastic type rates to context for JavaScript"""
@@ -416,6 +570,7 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number_display', 'customer', 'status_badge', 'age_badge', 'tracking_number', 'get_total_display', 'get_shipping_address', 'points_used', 'points_discount']
     list_filter = ('status', 'date_ordered')
     search_fields = ('id', 'customer__name', 'customer__email', 'tracking_number')
+    list_select_related = ('customer',)
     readonly_fields = ('date_ordered', 'transaction_id', 'age_display', 'points_used', 'points_discount')
     actions = ['mark_as_processing', 'mark_as_shipped']
     
@@ -438,6 +593,13 @@ class OrderAdmin(admin.ModelAdmin):
     order_number_display.short_description = 'Order #'
     order_number_display.admin_order_field = 'id'
     
+    def get_search_results(self, request, queryset, search_term):
+        """Order references (OP-12, BOP-12) go straight to the indexed reference column"""
+        reference = search_term.strip().upper()
+        if re.fullmatch(r'B?OP-\d+', reference):
+            return queryset.filter(reference=reference), False
+        return super().get_search_results(request, queryset, search_term)
+    
     def status_badge(self, obj):
         colors = {
             'Potential Order': '#9ca3af',
@@ -485,13 +647,26 @@ class OrderAdmin(admin.ModelAdmin):
         return "—"
     age_display.short_description = "Order Age"
     
+    def get_queryset(self, request):
+        """Prefetch shipping addresses (newest first); totals come from the stored Order columns"""
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                'shippingaddress_set',
+                queryset=ShippingAddress.objects.order_by('-date_added', '-id'),
+                to_attr='shipping_addresses',
+            )
+        )
+    
     def get_total_display(self, obj):
         total = obj.get_cart_total_after_points
         return f"£{total:.2f}"
     get_total_display.short_description = "Total"
     
     def get_shipping_address(self, obj):
-        address = ShippingAddress.objects.filter(order=obj).first()
+        if hasattr(obj, 'shipping_addresses'):
+            address = obj.shipping_addresses[0] if obj.shipping_addresses else None
+        else:
+            address = ShippingAddress.objects.filter(order=obj).order_by('-date_added', '-id').first()
         if address:
             return f"{address.address}, {address.city}, {address.postcode}"
         return "-"
@@ -593,6 +768,45 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
     ordering = ('-subscribed_at',)
     readonly_fields = ('subscribed_at',)
 
+@admin.register(EmailOutbox, site=admin_site)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient_display', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+    actions = ['retry_now']
+
+    def recipient_display(self, obj):
+        return ', '.join(obj.recipients)
+    recipient_display.short_description = 'To'
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=EmailStatus.SENT).update(
+            status=EmailStatus.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email(s) queued for another attempt.')
+    retry_now.short_description = 'Retry selected emails now'
+
+@admin.register(PdfJob, site=admin_site)
+class PdfJobAdmin(admin.ModelAdmin):
+    list_display = ('parcel', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    list_select_related = ('parcel',)
+    ordering = ('-created_at',)
+    readonly_fields = ('parcel', 'created_at', 'finished_at', 'attempts', 'last_error')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        # A parcel can only have one open job, so skip ones that were re-queued since
+        updated = queryset.filter(status=PdfJobStatus.FAILED).exclude(
+            parcel__pdf_jobs__status__in=[PdfJobStatus.PENDING, PdfJobStatus.RUNNING]
+        ).update(
+            status=PdfJobStatus.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} PDF job(s) queued for another attempt.')
+    retry_now.short_description = 'Retry selected PDF jobs now'
+
 @admin.register(ProductReview, site=admin_site)
 class ProductReviewAdmin(admin.ModelAdmin):
     list_display = ('product', 'customer', 'rating', 'display_name', 'is_verified_purchase', 'is_approved', 'created_at')
@@ -615,6 +829,7 @@ class CustomerAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'user', 'total_points', 'is_premium', 'is_business', 'multi_box_enabled', 'box_count', 'newsletter_subscribed')
     list_filter = ('is_premium', 'is_business', 'multi_box_enabled', 'subscription_active', 'newsletter_subscribed')
     search_fields = ('name', 'email', 'user__username', 'user__email')
+    list_select_related = ('user',)
     readonly_fields = ('total_points', 'subscription_setup_complete')
     inlines = [BusinessBoxPreferenceInline]
     actions = ['add_box_to_customer', 'add_points_to_customer']
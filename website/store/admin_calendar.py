@@ -1,68 +1,24 @@
 """
 Admin Calendar View for Knightcycle
 Shows upcoming events: subscription collections, PAYG requests, and store orders
+
+admin_calendar_feed serves the same events for any date range as JSON or ICS,
+so neighbouring months can be fetched without re-rendering the admin page.
 """
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
 from django.db.models import Q
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import calendar as cal
-from .models import Customer, IncomingParcel, Order, OrderStatus, ParcelStatus
-
+from .models import Customer, IncomingParcel, Order, OrderStatus, ParcelStatus, CollectionSchedule
+from .page_cache import cache_is_shared, get_calendar_version
 
-def calculate_recurring_date(reference_date, target_year, target_month):
-    """
-    Calculate the recurring date for a given month based on a reference date pattern.
-    
-    For example, if reference_date is the 4th Thursday of December 2025,
-    this will return the 4th Thursday of the target month/year.
-    
-    Args:
-        reference_date: The original preferred_delivery_day (e.g., 2025-12-25)
-        target_year: The year to calculate for
-        target_month: The month to calculate for
-    
-    Returns:
-        A date object representing the same day pattern in the target month,
-        or None if the pattern doesn't exist in that month
-    """
-    # Get the weekday (0=Monday, 6=Sunday) and the day from the reference
-    ref_weekday = reference_date.weekday()
-    ref_day = reference_date.day
-    
-    # Find which occurrence of this weekday it is in the reference month
-    # (e.g., 1st Monday, 2nd Tuesday, 4th Thursday, etc.)
-    occurrence = 0
-    for day in range(1, ref_day + 1):
-        test_date = datetime(reference_date.year, reference_date.month, day).date()
-        if test_date.weekday() == ref_weekday:
-            occurrence += 1
-    
-    # Now find the same occurrence in the target month
-    count = 0
-    for day in range(1, 32):  # Max days in any month
-        try:
-            test_date = datetime(target_year, target_month, day).date()
-            if test_date.weekday() == ref_weekday:
-                count += 1
-                if count == occurrence:
-                    return test_date
-        except ValueError:
-            # Day doesn't exist in this month
-            break
-    
-    # If the occurrence doesn't exist (e.g., 5th Monday in a month with only 4 Mondays),
-    # return the last occurrence of that weekday
-    for day in range(31, 0, -1):
-        try:
-            test_date = datetime(target_year, target_month, day).date()
-            if test_date.weekday() == ref_weekday:
-                return test_date
-        except ValueError:
-            continue
-    
-    return None
+# Longest range the feed will serve in one request
+CALENDAR_FEED_MAX_DAYS = 366
 
 
 @staff_member_required
@@ -122,61 +78,60 @@ def admin_calendar_view(request):
         'next_month': next_month,
         'next_year': next_year,
         'events_by_date': events_by_date,
+        'month_start': month_start,
+        'month_end': month_end,
         'today': now.date(),
     }
     
     return render(request, 'admin/store/calendar.html', context)
 
 
+def get_customer_name(user, default="Unknown"):
+    """Display name for a parcel's user; expects user__customer to be select_related"""
+    if not user:
+        return default
+    try:
+        return user.customer.name
+    except Customer.DoesNotExist:
+        return user.username
+
+
 def get_events_for_month(month_start, month_end):
     """
-    Fetch all events for the given month range
+    Fetch all events for the given date range (month_start inclusive, month_end exclusive)
     Returns a list of event dictionaries
+
+    Each event source is loaded with a single joined query, so the query count
+    doesn't grow with the number of events.
     """
     events = []
     
-    # 1. Subscription Collections - recurring monthly based on preferred_delivery_day pattern
-    subscription_customers = Customer.objects.filter(
-        subscription_active=True,
-        subscription_cancelled=False,
-        preferred_delivery_day__isnull=False
-    ).select_related('user')
+    # 1. Subscription Collections - materialized from preferred_delivery_day (see CollectionSchedule)
+    scheduled_collections = CollectionSchedule.objects.between(
+        month_start, month_end
+    ).select_related('customer')
     
-    for customer in subscription_customers:
-        # Calculate the recurring date for this month based on the customer's preferred_delivery_day
-        collection_date = calculate_recurring_date(
-            customer.preferred_delivery_day,
-            month_start.year,
-            month_start.month
-        )
-        
-        # Only add if the calculated date is within the current month
-        if collection_date and month_start <= collection_date < month_end:
-            events.append({
-                'date': collection_date,
-                'type': 'subscription',
-                'title': f'📦 Subscription Collection: {customer.name}',
-                'description': f'{customer.subscription_type or "Monthly Subscription"}',
-                'customer': customer,
-                'link': f'/admin/store/customer/{customer.id}/change/',
-                'color': '#3b82f6',  # blue
-            })
+    for scheduled in scheduled_collections:
+        customer = scheduled.customer
+        events.append({
+            'date': scheduled.collection_date,
+            'type': 'subscription',
+            'title': f'📦 Subscription Collection: {customer.name}',
+            'description': f'{customer.subscription_type or "Monthly Subscription"}',
+            'customer': customer,
+            'link': f'/admin/store/customer/{customer.id}/change/',
+            'color': '#3b82f6',  # blue
+        })
     
     # 2. PAYG Collection Requests - awaiting parcels
     payg_parcels = IncomingParcel.objects.filter(
         status=ParcelStatus.AWAITING,
         date_submitted__date__gte=month_start,
         date_submitted__date__lt=month_end
-    ).select_related('user').order_by('date_submitted')
+    ).select_related('user__customer').order_by('date_submitted')
     
     for parcel in payg_parcels:
-        customer_name = "Unknown"
-        if parcel.user:
-            try:
-                customer = Customer.objects.get(user=parcel.user)
-                customer_name = customer.name
-            except Customer.DoesNotExist:
-                customer_name = parcel.user.username
+        customer_name = get_customer_name(parcel.user)
         
         events.append({
             'date': parcel.date_submitted.date(),
@@ -214,16 +169,10 @@ def get_events_for_month(month_start, month_end):
         wtn_admin_approved=False,
         wtn_signed_date__date__gte=month_start,
         wtn_signed_date__date__lt=month_end
-    ).select_related('user').order_by('wtn_signed_date')
+    ).select_related('user__customer').order_by('wtn_signed_date')
     
     for parcel in pending_wtn_parcels:
-        customer_name = "Unknown"
-        if parcel.user:
-            try:
-                customer = Customer.objects.get(user=parcel.user)
-                customer_name = customer.name
-            except Customer.DoesNotExist:
-                customer_name = parcel.user.username
+        customer_name = get_customer_name(parcel.user)
         
         events.append({
             'date': parcel.wtn_signed_date.date(),
@@ -242,19 +191,10 @@ def get_events_for_month(month_start, month_end):
         collection_scheduled_date__gte=month_start,
         collection_scheduled_date__lt=month_end,
         status=ParcelStatus.AWAITING  # Not yet collected
-    ).select_related('user').order_by('collection_scheduled_date')
+    ).select_related('user__customer').order_by('collection_scheduled_date')
     
     for parcel in schedule_collection_parcels:
-        customer_name = "Unknown"
-        business_name = "Unknown Business"
-        if parcel.user:
-            try:
-                customer = Customer.objects.get(user=parcel.user)
-                customer_name = customer.name
-                business_name = customer.name
-            except Customer.DoesNotExist:
-                customer_name = parcel.user.username
-                business_name = customer_name
+        business_name = get_customer_name(parcel.user, default="Unknown Business")
         
         events.append({
             'date': parcel.collection_scheduled_date,
@@ -267,3 +207,128 @@ def get_events_for_month(month_start, month_end):
         })
     
     return sorted(events, key=lambda x: x['date'])
+
+
+def parse_feed_range(request):
+    """
+    (start, end) from ?start=YYYY-MM-DD&end=YYYY-MM-DD, end exclusive.
+    Returns None if either is missing, malformed or the range is out of bounds.
+    """
+    try:
+        start = date.fromisoformat(request.GET['start'])
+        end = date.fromisoformat(request.GET['end'])
+    except (KeyError, ValueError):
+        return None
+    if not start < end <= start + timedelta(days=CALENDAR_FEED_MAX_DAYS):
+        return None
+    return start, end
+
+
+def calendar_feed_etag(request):
+    """
+    Changes whenever an order, parcel or customer changes (see invalidate_calendar).
+    None, so every request gets the full feed, if the version is kept per process.
+    """
+    if not cache_is_shared():
+        return None
+    return f'{get_calendar_version()}-{request.get_full_path()}'
+
+
+def event_uid(event):
+    """Stable identifier for an event, e.g. order-12-20260105@knightcycle"""
+    obj = event.get('order') or event.get('parcel') or event.get('customer')
+    return f"{event['type']}-{obj.pk}-{event['date']:%Y%m%d}@knightcycle"
+
+
+def escape_ics(value):
+    """Escape text for an iCalendar property value (RFC 5545 3.3.11)"""
+    text = str(value).replace('\r\n', '\n').replace('\r', '\n')
+    return (text.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def fold_ics(line, limit=75):
+    """Fold a content line into CRLF + space continuations of at most limit octets (RFC 5545 3.1)"""
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        width = len(char.encode('utf-8'))
+        # Continuation lines start with a space, which counts towards the limit
+        if size + width > limit:
+            parts.append(current)
+            current = ' '
+            size = 1
+        current += char
+        size += width
+    parts.append(current)
+    return '\r\n'.join(parts)
+
+
+def render_ics(events, request):
+    """All-day VEVENTs for the given events"""
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Knightcycle//Admin Calendar//EN',
+        'CALSCALE:GREGORIAN',
+    ]
+    for event in events:
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:{event_uid(event)}',
+            f'DTSTAMP:{stamp}',
+            f"DTSTART;VALUE=DATE:{event['date']:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{event['date'] + timedelta(days=1):%Y%m%d}",
+            f"SUMMARY:{escape_ics(event['title'])}",
+            f"DESCRIPTION:{escape_ics(event['description'])}",
+            f"URL:{request.build_absolute_uri(event['link'])}",
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold_ics(line) for line in lines) + '\r\n'
+
+
+@staff_member_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=calendar_feed_etag)
+def admin_calendar_feed(request):
+    """
+    Calendar events for ?start=&end= (ISO dates, end exclusive) as JSON,
+    or as ICS with ?format=ics.
+
+    Responses carry an ETag, so revalidating an unchanged range is answered
+    with a 304 without loading any events.
+    """
+    date_range = parse_feed_range(request)
+    if date_range is None:
+        return JsonResponse(
+            {'error': f'start and end must be ISO dates, start before end, at most {CALENDAR_FEED_MAX_DAYS} days apart'},
+            status=400,
+        )
+    
+    events = get_events_for_month(*date_range)
+    
+    if request.GET.get('format') == 'ics':
+        response = HttpResponse(render_ics(events, request), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="knightcycle-calendar.ics"'
+        return response
+    
+    return JsonResponse({
+        'start': date_range[0].isoformat(),
+        'end': date_range[1].isoformat(),
+        'events': [
+            {
+                'id': event_uid(event),
+                'date': event['date'].isoformat(),
+                'type': event['type'],
+                'title': event['title'],
+                'description': event['description'],
+                'link': event['link'],
+                'color': event['color'],
+            }
+            for event in events
+        ],
+    })
@@ -0,0 +1,24 @@
+"""
+Template context processors for the store app
+"""
+from django.utils.functional import SimpleLazyObject
+from .utils import get_request_cart
+
+
+def cart(request):
+    """
+    Expose the request's cart to every template.
+
+    `cartItems` (the header badge) is lazy, so pages that don't render the
+    badge never touch the database for it, and the full cart behind `cart`
+    is only loaded if a template reads its items.
+    """
+    if getattr(request, 'page_cache_active', False):
+        # Page is shared between guests; main.html fills the badge from the cookie
+        return {'cartItems': ''}
+    
+    request_cart = get_request_cart(request)
+    return {
+        'cart': request_cart,
+        'cartItems': SimpleLazyObject(lambda: request_cart.item_count),
+    }
@@ -1,6 +1,40 @@
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
+from .models import EmailOutbox
+
+def queue_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """
+    Queue an email for the send_outbox worker instead of talking to SMTP now.
+    The row is part of the current transaction, so it is discarded on rollback.
+    """
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+
+def queue_emails(messages):
+    """
+    Queue many emails with one INSERT. `messages` are dicts of queue_email's
+    keyword arguments; ones without a recipient are dropped.
+    """
+    rows = []
+    for message in messages:
+        recipients = [address for address in message['recipient_list'] if address]
+        if recipients:
+            rows.append(EmailOutbox(
+                subject=message['subject'],
+                body=message['message'],
+                html_body=message.get('html_message') or '',
+                from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+                recipients=recipients,
+            ))
+    return EmailOutbox.objects.bulk_create(rows)
 
 def send_order_confirmation(order):
     """Send order confirmation email"""
@@ -34,13 +68,12 @@ Items:
     
     plain_message += f"\n\nTotal: £{context['total']:.2f}\n\nWe'll send you another email when your order ships.\n\nQuestions? Contact us at support@yoursite.com"
     
-    send_mail(
+    queue_email(
         subject=subject,
         message=plain_message,
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.customer.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 def send_order_processing(order):
@@ -69,13 +102,12 @@ You'll receive a shipping confirmation with tracking information once your order
 Questions? Contact us at support@yoursite.com
     """
     
-    send_mail(
+    queue_email(
         subject=subject,
         message=plain_message,
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.customer.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 def send_order_shipped(order):
@@ -105,17 +137,20 @@ Your package should arrive within 3-5 business days.
 Questions? Contact us at support@yoursite.com
     """
     
-    send_mail(
+    queue_email(
         subject=subject,
         message=plain_message,
         from_email=settings.DEFAULT_FROM_EMAIL,
         recipient_list=[order.customer.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 def send_wtn_reminder_email(customer, parcel, collection_date):
     """Send WTN reminder email 3 working days before collection"""
+    queue_email(**build_wtn_reminder_email(customer, parcel, collection_date))
+
+def build_wtn_reminder_email(customer, parcel, collection_date):
+    """queue_email keyword arguments for a WTN reminder (see send_wtn_reminders)"""
     subject = f'Action Required: Complete Your Waste Transfer Notice - Collection {collection_date.strftime("%d %B %Y")}'
     
     # Build WTN URL
@@ -185,11 +220,10 @@ Knightcycle
 </html>
 """
 
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[customer.user.email],
-        html_message=html_message,
-        fail_silently=False,
-    )
+    return {
+        'subject': subject,
+        'message': plain_message,
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'recipient_list': [customer.user.email],
+        'html_message': html_message,
+    }
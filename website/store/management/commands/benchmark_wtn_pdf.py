@@ -0,0 +1,118 @@
+"""
+Management command to benchmark WTN PDF rendering.
+
+Renders a batch of WTN PDFs for a throwaway sample parcel (created inside a
+transaction that is rolled back) into a temporary directory, and reports the
+per-PDF render time. It runs two passes:
+
+- baseline: the header is drawn the way generate_wtn_pdf used to draw it,
+  resolving and embedding the full-size transparent logo for every PDF
+- cached: the current header, which reuses the logo prepared once per process
+
+Usage:
+    python manage.py benchmark_wtn_pdf
+    python manage.py benchmark_wtn_pdf --count 1000
+    python manage.py benchmark_wtn_pdf --count 200 --skip-baseline
+"""
+import base64
+import io
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image, ImageDraw
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from store import wtn_pdf
+from store.models import Customer, IncomingParcel, WtnSignature, WtnSignatureRole
+
+
+def legacy_draw_header(c, width, height):
+    """The pre-caching header: full-size transparent PNG resolved and embedded per PDF"""
+    c.setFillColor(colors.HexColor(wtn_pdf.HEADER_COLOR))
+    c.rect(0, height - wtn_pdf.HEADER_HEIGHT, width, wtn_pdf.HEADER_HEIGHT, fill=True, stroke=False)
+    logo_path = os.path.join(wtn_pdf.settings.BASE_DIR, 'static', 'images', 'logo_v2.png')
+    if os.path.exists(logo_path):
+        c.drawImage(ImageReader(logo_path), width - 130, height - 75, width=110, height=65,
+                    preserveAspectRatio=True, mask='auto')
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 24)
+    c.drawString(50, height - 40, "WASTE TRANSFER NOTE")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, height - 58, "Duty of care: waste transfer note")
+    c.drawString(50, height - 72, "The Waste (England and Wales) Regulations 2011")
+
+
+def sample_signature():
+    """A small signature-like PNG as a data URL"""
+    image = Image.new('RGBA', (400, 120), (255, 255, 255, 0))
+    ImageDraw.Draw(image).line([(10, 90), (120, 20), (220, 100), (390, 30)], fill=(0, 0, 0, 255), width=4)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+class Command(BaseCommand):
+    help = 'Measure per-PDF WTN render time before and after header caching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help='PDFs to render per pass (default 1000)')
+        parser.add_argument('--skip-baseline', action='store_true', help='Only time the cached header')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with transaction.atomic():
+                parcel = self.make_sample_parcel()
+                # Warm up imports, fonts and the per-process logo
+                wtn_pdf.generate_wtn_pdf(parcel)
+
+                results = []
+                if not options['skip_baseline']:
+                    with mock.patch.object(wtn_pdf, 'draw_header', legacy_draw_header):
+                        results.append(('baseline', self.time_batch(parcel, count)))
+                results.append(('cached', self.time_batch(parcel, count)))
+
+                pdf_size = os.path.getsize(os.path.join(media_root, wtn_pdf.generate_wtn_pdf(parcel)))
+                transaction.set_rollback(True)
+
+        for label, seconds in results:
+            self.stdout.write(
+                f'{label:>8}: {count} PDFs in {seconds:.2f}s ({seconds / count * 1000:.1f} ms/PDF)'
+            )
+        if len(results) == 2:
+            self.stdout.write(f'Speed-up: {results[0][1] / results[1][1]:.1f}x')
+        self.stdout.write(self.style.SUCCESS(f'Cached PDF size: {pdf_size / 1024:.0f} KB'))
+
+    def time_batch(self, parcel, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            wtn_pdf.generate_wtn_pdf(parcel)
+        return time.perf_counter() - started
+
+    def make_sample_parcel(self):
+        user = User.objects.create_user(username='wtn-benchmark', email='')
+        Customer.objects.create(user=user, name='Benchmark Business Ltd', is_business=True, sic_code='38320')
+        parcel = IncomingParcel.objects.create(
+            user=user,
+            address='1 Benchmark Way',
+            city='Testville',
+            county='Testshire',
+            postcode='TE1 1ST',
+            estimated_weight=5.5,
+            collection_scheduled_date=timezone.now().date(),
+            wtn_reference='WTN-BENCH1',
+            wtn_signed_date=timezone.now(),
+            wtn_admin_approved=True,
+            wtn_admin_approved_date=timezone.now(),
+        )
+        signature = sample_signature()
+        WtnSignature.store(parcel, WtnSignatureRole.CUSTOMER, signature)
+        WtnSignature.store(parcel, WtnSignatureRole.ADMIN, signature)
+        return parcel
@@ -0,0 +1,64 @@
+"""
+Management command to verify the materialized order totals.
+
+Order.subtotal, item_count and requires_shipping are kept in sync by the
+OrderItem signals. This recalculates them from the order items and reports
+any order whose stored figures have drifted (e.g. after queryset.update() or
+raw SQL). Pass --fix to write the recalculated values back.
+
+Usage:
+    python manage.py check_order_totals
+    python manage.py check_order_totals --fix
+    python manage.py check_order_totals --open-only --fix
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import Order, OrderStatus
+
+
+class Command(BaseCommand):
+    help = 'Compare stored order subtotal/item count/shipping flag against the order items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Write the recalculated totals for any mismatched order',
+        )
+        parser.add_argument(
+            '--open-only',
+            action='store_true',
+            help='Only check open carts (Potential Orders)',
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by('id')
+        if options['open_only']:
+            orders = orders.filter(status=OrderStatus.POTENTIAL)
+
+        checked = 0
+        mismatched = 0
+        for order in orders.select_related('customer').iterator(chunk_size=500):
+            checked += 1
+            expected = order.calculate_totals()
+            stored = {field: getattr(order, field) for field in expected}
+            if stored == expected:
+                continue
+
+            mismatched += 1
+            self.stdout.write(
+                self.style.WARNING(f'{order.order_number}: stored {stored}, expected {expected}')
+            )
+            if options['fix']:
+                with transaction.atomic():
+                    order.refresh_totals()
+
+        if mismatched and not options['fix']:
+            self.stdout.write(
+                self.style.ERROR(f'{mismatched} of {checked} order(s) have stale totals (run with --fix)')
+            )
+        else:
+            action = 'fixed' if mismatched else 'found'
+            self.stdout.write(
+                self.style.SUCCESS(f'Checked {checked} order(s), {mismatched} mismatch(es) {action}')
+            )
@@ -0,0 +1,39 @@
+"""
+Management command to rebuild the monthly points rollup.
+
+MonthlyPointsRollup (points earned and redeemed per customer and month) is
+refreshed month by month whenever a PointTransaction is saved or deleted. Run
+this after bulk edits that bypass model signals (e.g. queryset.update()), or if
+the points history summary or running balances ever look wrong.
+
+Usage:
+    python manage.py rebuild_points_rollup
+    python manage.py rebuild_points_rollup --customer 4 --customer 9
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import MonthlyPointsRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute monthly points earned and redeemed for every customer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            action='append',
+            type=int,
+            dest='customer_ids',
+            help='Only rebuild the given customer id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            count = MonthlyPointsRollup.rebuild(customer_ids=options['customer_ids'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} monthly points row(s) in {time.monotonic() - started:.2f}s')
+        )
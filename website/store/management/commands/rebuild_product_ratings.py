@@ -0,0 +1,35 @@
+"""
+Management command to rebuild the denormalized product rating summaries.
+
+The summaries are maintained incrementally whenever a ProductReview is saved
+or deleted. Run this after bulk edits that bypass model signals (e.g.
+queryset.update()) or if the figures ever look wrong.
+
+Usage:
+    python manage.py rebuild_product_ratings
+    python manage.py rebuild_product_ratings --product 12 --product 15
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import ProductRatingSummary
+
+
+class Command(BaseCommand):
+    help = 'Recompute approved review count, rating sum and photo flag for every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            action='append',
+            type=int,
+            dest='product_ids',
+            help='Only rebuild the given product id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = ProductRatingSummary.rebuild(product_ids=options['product_ids'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rating summaries for {count} product(s)')
+        )
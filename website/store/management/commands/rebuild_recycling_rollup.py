@@ -0,0 +1,40 @@
+"""
+Management command to rebuild the monthly recycling rollup.
+
+MonthlyRecyclingRollup (weighed kg, parcels and points per customer, month
+and plastic type) is refreshed month by month whenever a ParcelMaterial or
+IncomingParcel is saved or deleted. Run this after bulk edits that bypass
+model signals (e.g. queryset.update()), after changing PlasticType point
+rates, or if the business dashboard figures ever look wrong.
+
+Usage:
+    python manage.py rebuild_recycling_rollup
+    python manage.py rebuild_recycling_rollup --customer 4 --customer 9
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import MonthlyRecyclingRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute monthly recycled weight, parcels and points per plastic type for every customer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            action='append',
+            type=int,
+            dest='customer_ids',
+            help='Only rebuild the given customer id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            count = MonthlyRecyclingRollup.rebuild(customer_ids=options['customer_ids'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} monthly rollup row(s) in {time.monotonic() - started:.2f}s')
+        )
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild the denormalized customer recycling stats.
+
+The stats (awarded parcel count and verified weight behind premium progress)
+are maintained incrementally whenever an IncomingParcel or ParcelMaterial is
+saved or deleted. Run this after bulk edits that bypass model signals (e.g.
+queryset.update()) or if the figures ever look wrong.
+
+Usage:
+    python manage.py rebuild_recycling_stats
+    python manage.py rebuild_recycling_stats --customer 4 --customer 9
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from store.models import CustomerRecyclingStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute awarded parcel count and verified weight for every customer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            action='append',
+            type=int,
+            dest='customer_ids',
+            help='Only rebuild the given customer id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = CustomerRecyclingStats.rebuild(customer_ids=options['customer_ids'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt recycling stats for {count} customer(s)')
+        )
@@ -0,0 +1,73 @@
+"""
+Management command to roll the subscription collection schedule forward.
+
+CollectionSchedule rows are regenerated for a customer whenever their
+preferred_delivery_day or subscription status changes. Run this daily so the
+schedule always reaches COLLECTION_SCHEDULE_MONTHS ahead, and after bulk edits
+that bypass model signals (e.g. queryset.update()).
+
+Run this daily via cron: python manage.py refresh_collection_schedule
+
+Usage:
+    python manage.py refresh_collection_schedule
+    python manage.py refresh_collection_schedule --customer 4 --customer 9
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from store.models import Customer, CollectionSchedule
+from store.page_cache import invalidate_calendar
+
+
+class Command(BaseCommand):
+    help = 'Regenerate upcoming subscription collection dates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            action='append',
+            type=int,
+            dest='customer_ids',
+            help='Only refresh the given customer id (can be repeated)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Customers regenerated per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        # Active subscribers, plus anyone still holding future rows (e.g. cancelled via update())
+        customers = Customer.objects.filter(
+            Q(subscription_active=True, subscription_cancelled=False, preferred_delivery_day__isnull=False)
+            | Q(collection_schedule__collection_date__gte=today)
+        ).distinct().order_by('pk')
+        if options['customer_ids']:
+            customers = customers.filter(pk__in=options['customer_ids'])
+        
+        batch_size = options['batch_size']
+        customer_count = rows = 0
+        batch = []
+        for customer in customers.iterator(chunk_size=batch_size):
+            batch.append(customer)
+            if len(batch) >= batch_size:
+                rows += self._regenerate(batch, today)
+                customer_count += len(batch)
+                batch = []
+        if batch:
+            rows += self._regenerate(batch, today)
+            customer_count += len(batch)
+        invalidate_calendar()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Scheduled {rows} collection(s) for {customer_count} customer(s)'
+            )
+        )
+
+    def _regenerate(self, customers, today):
+        with transaction.atomic():
+            return CollectionSchedule.regenerate(customers, today=today)
@@ -0,0 +1,24 @@
+"""
+Management command to sweep expired cart stock reservations.
+
+Expired reservations are already ignored when working out available stock,
+so this is housekeeping: it deletes them in one statement to keep the table
+(and the product/expiry index) small. Schedule it alongside
+cleanup_abandoned_carts.
+
+Usage:
+    python manage.py release_expired_reservations
+"""
+from django.core.management.base import BaseCommand
+from store.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = 'Delete cart stock reservations whose hold has expired'
+
+    def handle(self, *args, **options):
+        deleted, _ = StockReservation.objects.expired().delete()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Released {deleted} expired stock reservation(s)')
+        )
@@ -0,0 +1,128 @@
+"""
+Management command to render queued WTN PDFs from the PdfJob queue.
+
+Admin approval only enqueues a PdfJob. This worker claims due jobs, renders
+them in a pool of processes (ReportLab and signature decoding are CPU-bound),
+and writes wtn_pdf_path back to the parcel in the same transaction that marks
+the job done. Failed jobs are retried with exponential backoff (30s, 1, 2, 4...
+minutes, capped at 1 hour) and marked failed after --max-attempts tries.
+Claimed jobs are leased, so several workers can run at once and a crashed
+worker's jobs are picked up again later.
+
+Run it from cron every minute, or keep it running with --loop:
+    python manage.py run_pdf_worker
+    python manage.py run_pdf_worker --workers 4 --batch-size 20
+    python manage.py run_pdf_worker --loop --interval 5
+    python manage.py run_pdf_worker --workers 0   # render in this process
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from store.models import PdfJob, PdfJobStatus
+from store.wtn_pdf import init_pdf_process, render_parcel_pdf
+
+LEASE = timedelta(minutes=10)
+BASE_RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: 30s after the first failure, doubling up to an hour"""
+    return min(BASE_RETRY_DELAY * (2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+class Command(BaseCommand):
+    help = 'Render queued WTN PDFs in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Rendering processes; 0 renders in this process (default 2)')
+        parser.add_argument('--batch-size', type=int, default=20, help='Jobs claimed at a time (default 20)')
+        parser.add_argument('--max-attempts', type=int, default=3, help='Give up after this many failures (default 3)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the queue is empty')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done_total = failed_total = 0
+
+        if options['workers'] > 0:
+            # Forked processes must not share the parent's database sockets
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=options['workers'], initializer=init_pdf_process)
+        else:
+            pool = nullcontext()
+
+        with pool:
+            while True:
+                batch = self.claim_batch(options['batch_size'])
+                if batch:
+                    done, failed = self.render_batch(pool, batch, options['max_attempts'])
+                    done_total += done
+                    failed_total += failed
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rendered {done_total} PDF(s), {failed_total} failed attempt(s) in {time.monotonic() - started:.2f}s'
+            )
+        )
+
+    def claim_batch(self, batch_size):
+        """Lease the next due jobs (and any whose worker died) so no other worker renders them"""
+        now = timezone.now()
+        with transaction.atomic():
+            due = (PdfJob.objects
+                   .filter(status__in=[PdfJobStatus.PENDING, PdfJobStatus.RUNNING], next_attempt_at__lte=now)
+                   .order_by('next_attempt_at', 'id'))
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            batch = list(due[:batch_size])
+            PdfJob.objects.filter(pk__in=[job.pk for job in batch]).update(
+                status=PdfJobStatus.RUNNING, next_attempt_at=now + LEASE
+            )
+        return batch
+
+    def render_batch(self, pool, batch, max_attempts):
+        done = failed = 0
+        if isinstance(pool, ProcessPoolExecutor):
+            futures = {pool.submit(render_parcel_pdf, job.parcel_id): job for job in batch}
+            results = ((futures[future], future) for future in as_completed(futures))
+        else:
+            results = ((job, None) for job in batch)
+
+        for job, future in results:
+            try:
+                pdf_path = future.result() if future else render_parcel_pdf(job.parcel_id)
+            except Exception as e:
+                failed += 1
+                self.record_failure(job, e, max_attempts)
+            else:
+                done += 1
+                self.finish(job, pdf_path)
+        return done, failed
+
+    def finish(self, job, pdf_path):
+        PdfJob.complete(job.parcel_id, pdf_path)
+        self.stdout.write(self.style.SUCCESS(f'✓ {pdf_path}'))
+
+    def record_failure(self, job, error, max_attempts):
+        job.attempts += 1
+        job.last_error = str(error)
+        if job.attempts >= max_attempts:
+            job.status = PdfJobStatus.FAILED
+            job.finished_at = timezone.now()
+        else:
+            job.status = PdfJobStatus.PENDING
+            job.next_attempt_at = timezone.now() + retry_delay(job.attempts)
+        job.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at', 'finished_at'])
+        self.stdout.write(
+            self.style.ERROR(f'✗ PDF for parcel {job.parcel_id}: {error}')
+        )
@@ -0,0 +1,122 @@
+"""
+Management command to deliver queued emails from the EmailOutbox.
+
+Emails are sent in batches over a single reused SMTP connection. A failed
+message is retried with exponential backoff (1, 2, 4, 8... minutes, capped at
+6 hours) and marked failed after --max-attempts tries. Claimed messages are
+leased for a few minutes, so several workers can run at once and a crashed
+worker's batch is picked up again later.
+
+Run it from cron every minute, or keep it running with --loop:
+    python manage.py send_outbox
+    python manage.py send_outbox --batch-size 100
+    python manage.py send_outbox --loop --interval 10
+"""
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from store.models import EmailOutbox, EmailStatus
+
+LEASE = timedelta(minutes=5)
+BASE_RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: 1 min after the first failure, doubling up to 6 hours"""
+    return min(BASE_RETRY_DELAY * (2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+class Command(BaseCommand):
+    help = 'Send pending emails from the outbox over one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails per SMTP connection (default 50)')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Give up after this many failures (default 5)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds to sleep between polls with --loop')
+
+    def handle(self, *args, **options):
+        sent_total = failed_total = 0
+        while True:
+            batch = self.claim_batch(options['batch_size'])
+            if batch:
+                sent, failed = self.send_batch(batch, options['max_attempts'])
+                sent_total += sent
+                failed_total += failed
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Sent {sent_total} email(s), {failed_total} failed attempt(s)')
+        )
+
+    def claim_batch(self, batch_size):
+        """Lease the next due emails so no other worker sends them meanwhile"""
+        now = timezone.now()
+        with transaction.atomic():
+            due = (EmailOutbox.objects
+                   .filter(status=EmailStatus.PENDING, next_attempt_at__lte=now)
+                   .order_by('next_attempt_at', 'id'))
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            batch = list(due[:batch_size])
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now + LEASE
+            )
+        return batch
+
+    def send_batch(self, batch, max_attempts):
+        sent_ids = []
+        failed_ids = []
+        smtp = get_connection(fail_silently=False)
+        try:
+            smtp.open()
+            for email in batch:
+                message = EmailMultiAlternatives(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=email.recipients,
+                    connection=smtp,
+                )
+                if email.html_body:
+                    message.attach_alternative(email.html_body, 'text/html')
+                try:
+                    message.send()
+                except Exception as e:
+                    failed_ids.append(email.pk)
+                    self.record_failure(email, e, max_attempts)
+                else:
+                    sent_ids.append(email.pk)
+        except Exception as e:
+            # Couldn't reach the mail server at all: retry everything not yet sent
+            for email in batch:
+                if email.pk not in sent_ids and email.pk not in failed_ids:
+                    failed_ids.append(email.pk)
+                    self.record_failure(email, e, max_attempts)
+        finally:
+            smtp.close()
+
+        EmailOutbox.objects.filter(pk__in=sent_ids).update(
+            status=EmailStatus.SENT, sent_at=timezone.now(), last_error=''
+        )
+        return len(sent_ids), len(failed_ids)
+
+    def record_failure(self, email, error, max_attempts):
+        email.attempts += 1
+        email.last_error = str(error)
+        if email.attempts >= max_attempts:
+            email.status = EmailStatus.FAILED
+        else:
+            email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+        self.stdout.write(
+            self.style.ERROR(f'✗ {email.subject} → {", ".join(email.recipients)}: {error}')
+        )
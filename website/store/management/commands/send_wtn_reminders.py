@@ -1,85 +1,150 @@
 """
 Management command to send WTN reminder emails
 Run this daily via cron: python manage.py send_wtn_reminders
+
+Works in set-based steps so it stays fast at thousands of subscribers:
+due collections are found in one query (see CollectionSchedule), missing
+parcels are bulk-created, and each batch of reminders is queued to the email
+outbox with one INSERT and flagged as sent with one UPDATE. Delivery happens
+in send_outbox, which reuses one SMTP connection per batch.
+
+Usage:
+    python manage.py send_wtn_reminders
+    python manage.py send_wtn_reminders --batch-size 200
 """
+import time
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
-from store.models import Customer, IncomingParcel
-from store.emails import send_wtn_reminder_email
+from store.models import Customer, IncomingParcel, ParcelStatus
+from store.emails import build_wtn_reminder_email, queue_emails
+from store.page_cache import invalidate_dashboard_cache, invalidate_calendar
 
 
 class Command(BaseCommand):
     help = 'Send WTN reminder emails 3 working days before collection'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Reminders queued and flagged per transaction (default: 500)',
+        )
+
     def handle(self, *args, **options):
         """
         Find all subscription customers with collections in 3 working days
         who haven't signed their WTN yet
         """
+        started = time.monotonic()
         today = timezone.now().date()
         target_date = self.add_working_days(today, 3)
         
         self.stdout.write(f"Checking for collections on: {target_date}")
         
-        # Get all subscription customers with collection date = target_date
-        customers = Customer.objects.filter(
+        # Get all subscription customers with a scheduled collection on target_date
+        customers = list(Customer.objects.filter(
             subscription_active=True,
             subscription_cancelled=False,
-            preferred_delivery_day=target_date
-        )
+            user__isnull=False,
+            collection_schedule__collection_date=target_date
+        ).select_related('user').order_by('pk'))
         
-        reminders_sent = 0
+        parcels = self.get_or_create_parcels(customers, target_date)
+        self.stdout.write(
+            f"Found {len(customers)} due collection(s) in {time.monotonic() - started:.2f}s"
+        )
         
+        # Send reminder ONLY if:
+        # 1. WTN not signed yet
+        # 2. Reminder hasn't been sent already
+        due = []
         for customer in customers:
-            # Check if they have an unsigned WTN for this collection
-            # Get or create the IncomingParcel for this collection
-            parcel, created = IncomingParcel.objects.get_or_create(
-                user=customer.user,
-                collection_scheduled_date=target_date,
-                defaults={
-                    'address': '',  # Will be filled from saved address
-                    'status': 'awaiting'
-                }
-            )
-            
-            # Send reminder ONLY if:
-            # 1. WTN not signed yet
-            # 2. Reminder hasn't been sent already
-            if not parcel.wtn_signed_date and not parcel.wtn_reminder_sent:
-                try:
-                    send_wtn_reminder_email(customer, parcel, target_date)
-                    
-                    # Mark reminder as sent to prevent spam
-                    parcel.wtn_reminder_sent = True
-                    parcel.wtn_reminder_sent_date = timezone.now()
-                    parcel.save()
-                    
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'✓ Sent WTN reminder to {customer.name} ({customer.user.email})'
-                        )
-                    )
-                    reminders_sent += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'✗ Failed to send to {customer.name}: {str(e)}'
-                        )
-                    )
-            elif parcel.wtn_reminder_sent:
+            parcel = parcels[customer.user_id]
+            if parcel.wtn_reminder_sent:
                 self.stdout.write(
                     self.style.WARNING(
                         f'⊘ Skipped {customer.name} - Reminder already sent on {parcel.wtn_reminder_sent_date.strftime("%d %b %Y")}'
                     )
                 )
+            elif not parcel.wtn_signed_date:
+                due.append((customer, parcel))
+        
+        reminders_sent = 0
+        batch_size = options['batch_size']
+        for i in range(0, len(due), batch_size):
+            batch = due[i:i + batch_size]
+            try:
+                self.queue_reminders(batch, target_date)
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f'✗ Failed to queue {len(batch)} reminder(s): {str(e)}'
+                    )
+                )
+                continue
+            reminders_sent += len(batch)
+            for customer, parcel in batch:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'✓ Sent WTN reminder to {customer.name} ({customer.user.email})'
+                    )
+                )
         
         self.stdout.write(
             self.style.SUCCESS(
-                f'\n✓ Complete! Sent {reminders_sent} WTN reminder(s)'
+                f'\n✓ Complete! Sent {reminders_sent} WTN reminder(s) in {time.monotonic() - started:.2f}s'
             )
         )
-    
+
+    def get_or_create_parcels(self, customers, target_date):
+        """
+        The IncomingParcel for each customer's collection on target_date, keyed
+        by user id, bulk-creating any that don't exist yet.
+        """
+        parcels = {}
+        existing = IncomingParcel.objects.filter(
+            user_id__in=[customer.user_id for customer in customers],
+            collection_scheduled_date=target_date,
+        ).order_by('-pk')
+        for parcel in existing:
+            parcels[parcel.user_id] = parcel  # Oldest wins, like get_or_create's .get()
+        
+        missing = [
+            IncomingParcel(
+                user_id=customer.user_id,
+                collection_scheduled_date=target_date,
+                address='',  # Will be filled from saved address
+                status=ParcelStatus.AWAITING,
+                # bulk_create skips IncomingParcel.save(), which normally sets this
+                parcel_prefix=IncomingParcel.BUSINESS_PREFIX if customer.is_business else IncomingParcel.INDIVIDUAL_PREFIX,
+            )
+            for customer in customers if customer.user_id not in parcels
+        ]
+        if missing:
+            for parcel in IncomingParcel.objects.bulk_create(missing):
+                parcels[parcel.user_id] = parcel
+            # bulk_create skips the post_save signals that drop these caches
+            invalidate_dashboard_cache()
+            invalidate_calendar()
+        return parcels
+
+    def queue_reminders(self, batch, target_date):
+        """Queue a batch of reminder emails and flag their parcels, all or nothing"""
+        with transaction.atomic():
+            queue_emails([
+                build_wtn_reminder_email(customer, parcel, target_date)
+                for customer, parcel in batch
+            ])
+            # Mark reminders as sent to prevent spam
+            IncomingParcel.objects.filter(pk__in=[parcel.pk for _, parcel in batch]).update(
+                wtn_reminder_sent=True,
+                wtn_reminder_sent_date=timezone.now(),
+            )
+
     def add_working_days(self, start_date, days_to_add):
         """Add working days (Mon-Fri) to a date"""
         current_date = start_date
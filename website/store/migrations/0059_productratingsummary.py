@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0058_populate_subscription_plans'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.PositiveIntegerField(default=0, help_text='Number of approved reviews')),
+                ('rating_sum', models.PositiveIntegerField(default=0, help_text='Sum of approved review ratings')),
+                ('photo_review_count', models.PositiveIntegerField(default=0, help_text='Approved reviews with at least one photo')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_summary', to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Product rating summary',
+                'verbose_name_plural': 'Product rating summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Count, Sum, Q
+
+
+def populate_rating_summaries(apps, schema_editor):
+    """Build rating summaries for products that already have approved reviews"""
+    ProductReview = apps.get_model('store', 'ProductReview')
+    ProductRatingSummary = apps.get_model('store', 'ProductRatingSummary')
+    
+    has_photo = (
+        Q(image1__isnull=False) & ~Q(image1='') |
+        Q(image2__isnull=False) & ~Q(image2='') |
+        Q(image3__isnull=False) & ~Q(image3='')
+    )
+    totals = ProductReview.objects.filter(is_approved=True).values('product_id').annotate(
+        count=Count('id'),
+        rating_total=Sum('rating'),
+        photos=Count('id', filter=has_photo),
+    )
+    
+    ProductRatingSummary.objects.bulk_create([
+        ProductRatingSummary(
+            product_id=row['product_id'],
+            review_count=row['count'],
+            rating_sum=row['rating_total'] or 0,
+            photo_review_count=row['photos'],
+        )
+        for row in totals
+    ])
+
+
+def remove_rating_summaries(apps, schema_editor):
+    ProductRatingSummary = apps.get_model('store', 'ProductRatingSummary')
+    ProductRatingSummary.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0059_productratingsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rating_summaries, remove_rating_summaries),
+    ]
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def populate_order_totals(apps, schema_editor):
+    """Materialize subtotal, item count and shipping flag for existing orders"""
+    Order = apps.get_model('store', 'Order')
+    OrderItem = apps.get_model('store', 'OrderItem')
+
+    totals = {}
+    items = (OrderItem.objects.filter(order__isnull=False)
+             .select_related('product')
+             .only('order_id', 'quantity', 'product__price', 'product__sale_price',
+                   'product__is_on_sale', 'product__digital'))
+    for item in items.iterator(chunk_size=2000):
+        order_totals = totals.setdefault(item.order_id, {
+            'subtotal': Decimal('0.00'), 'item_count': 0, 'requires_shipping': False,
+        })
+        quantity = item.quantity or 0
+        order_totals['item_count'] += quantity
+        product = item.product
+        if product:
+            price = product.price
+            if product.is_on_sale and product.sale_price is not None:
+                price = product.sale_price
+            order_totals['subtotal'] += price * quantity
+            if product.digital is False:
+                order_totals['requires_shipping'] = True
+
+    orders = []
+    for order in Order.objects.filter(pk__in=totals.keys()).only('id'):
+        for field, value in totals[order.pk].items():
+            setattr(order, field, value)
+        orders.append(order)
+    Order.objects.bulk_update(
+        orders, ['subtotal', 'item_count', 'requires_shipping'], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0061_order_materialized_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_order_totals, migrations.RunPython.noop),
+    ]
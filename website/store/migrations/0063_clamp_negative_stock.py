@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clamp_negative_stock(apps, schema_editor):
+    """Oversold products can't satisfy the new non-negative stock constraint"""
+    Product = apps.get_model('store', 'Product')
+    Product.objects.filter(stock_quantity__lt=0).update(stock_quantity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0062_populate_order_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_stock, migrations.RunPython.noop),
+    ]
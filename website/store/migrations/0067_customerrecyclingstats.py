@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:26
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0066_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerRecyclingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parcel_count', models.PositiveIntegerField(default=0, help_text='Parcels with points awarded')),
+                ('verified_weight_kg', models.DecimalField(decimal_places=3, default=Decimal('0'), help_text='Total weighed material across all parcels', max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recycling_stats', to='store.customer')),
+            ],
+            options={
+                'verbose_name': 'Customer recycling stats',
+                'verbose_name_plural': 'Customer recycling stats',
+            },
+        ),
+    ]
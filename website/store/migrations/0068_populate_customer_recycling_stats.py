@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def populate_recycling_stats(apps, schema_editor):
+    """Build recycling stats for every customer with a user account"""
+    Customer = apps.get_model('store', 'Customer')
+    IncomingParcel = apps.get_model('store', 'IncomingParcel')
+    ParcelMaterial = apps.get_model('store', 'ParcelMaterial')
+    CustomerRecyclingStats = apps.get_model('store', 'CustomerRecyclingStats')
+    
+    parcel_counts = dict(
+        IncomingParcel.objects.filter(points_awarded=True)
+        .values('user_id').annotate(total=Count('id')).values_list('user_id', 'total')
+    )
+    weights = dict(
+        ParcelMaterial.objects.filter(weight_kg__isnull=False)
+        .values('parcel__user_id').annotate(total=Sum('weight_kg')).values_list('parcel__user_id', 'total')
+    )
+    
+    CustomerRecyclingStats.objects.bulk_create([
+        CustomerRecyclingStats(
+            customer_id=customer_id,
+            parcel_count=parcel_counts.get(user_id, 0),
+            verified_weight_kg=weights.get(user_id) or Decimal('0'),
+        )
+        for customer_id, user_id in Customer.objects.filter(user__isnull=False).values_list('pk', 'user_id')
+    ], batch_size=500)
+
+
+def remove_recycling_stats(apps, schema_editor):
+    CustomerRecyclingStats = apps.get_model('store', 'CustomerRecyclingStats')
+    CustomerRecyclingStats.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0067_customerrecyclingstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_recycling_stats, remove_recycling_stats),
+    ]
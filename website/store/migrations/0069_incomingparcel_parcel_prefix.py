@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0068_populate_customer_recycling_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incomingparcel',
+            name='parcel_prefix',
+            field=models.CharField(default='IP', editable=False, help_text='BIP for business customers, IP otherwise', max_length=3),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def populate_parcel_prefix(apps, schema_editor):
+    """Parcels belonging to business customers get the BIP prefix"""
+    Customer = apps.get_model('store', 'Customer')
+    IncomingParcel = apps.get_model('store', 'IncomingParcel')
+    business_users = Customer.objects.filter(is_business=True, user__isnull=False).values('user_id')
+    IncomingParcel.objects.filter(user_id__in=business_users).update(parcel_prefix='BIP')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0069_incomingparcel_parcel_prefix'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_parcel_prefix, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def populate_order_reference(apps, schema_editor):
+    """BOP-<id> for business customers' orders, OP-<id> for everything else"""
+    Order = apps.get_model('store', 'Order')
+    business = Order.objects.filter(customer__is_business=True)
+    business.update(reference=Concat(Value('BOP-'), Cast('id', CharField())))
+    Order.objects.exclude(pk__in=business.values('pk')).update(
+        reference=Concat(Value('OP-'), Cast('id', CharField()))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0071_order_reference'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_order_reference, migrations.RunPython.noop),
+    ]
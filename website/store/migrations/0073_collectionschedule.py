@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0072_populate_order_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection_date', models.DateField(db_index=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collection_schedule', to='store.customer')),
+            ],
+            options={
+                'ordering': ['collection_date'],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'collection_date'), name='unique_collection_per_customer_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+import calendar
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+# Frozen copies of the store.scheduling helpers as they were when this
+# migration was written, so later changes there can't change what it does
+
+def add_months(year, month, months):
+    """(year, month) shifted by a number of months"""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def calculate_recurring_date(reference_date, target_year, target_month):
+    """The reference date's nth weekday in the target month, or the last one if there's no nth"""
+    weekday = reference_date.weekday()
+    occurrence = (reference_date.day - 1) // 7  # 0 = 1st, 1 = 2nd, ...
+    first_weekday, days_in_month = calendar.monthrange(target_year, target_month)
+    day = 1 + (weekday - first_weekday) % 7 + occurrence * 7
+    if day > days_in_month:
+        day -= 7
+    return date(target_year, target_month, day)
+
+
+def monthly_collection_dates(reference_date, start_date, months):
+    """Collection dates on or after start_date and reference_date, for `months` months from start_date's"""
+    first = max(start_date, reference_date)
+    dates = []
+    for offset in range(months):
+        year, month = add_months(start_date.year, start_date.month, offset)
+        collection_date = calculate_recurring_date(reference_date, year, month)
+        if collection_date >= first:
+            dates.append(collection_date)
+    return dates
+
+
+def populate_collection_schedule(apps, schema_editor):
+    """Materialize collection dates from the start of this month for active subscribers"""
+    Customer = apps.get_model('store', 'Customer')
+    CollectionSchedule = apps.get_model('store', 'CollectionSchedule')
+    months = getattr(settings, 'COLLECTION_SCHEDULE_MONTHS', 12)
+    start = timezone.localdate().replace(day=1)
+    
+    subscribers = Customer.objects.filter(
+        subscription_active=True,
+        subscription_cancelled=False,
+        preferred_delivery_day__isnull=False,
+    ).values_list('id', 'preferred_delivery_day')
+    
+    rows = [
+        CollectionSchedule(customer_id=customer_id, collection_date=collection_date)
+        for customer_id, preferred_day in subscribers.iterator()
+        for collection_date in monthly_collection_dates(preferred_day, start, months)
+    ]
+    CollectionSchedule.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0073_collectionschedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_collection_schedule, migrations.RunPython.noop),
+    ]
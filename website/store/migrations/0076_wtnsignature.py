@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0075_pdfjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WtnSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('customer', 'Customer'), ('admin', 'Admin')], max_length=10)),
+                ('image', models.BinaryField(help_text='1-bit PNG')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('parcel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signatures', to='store.incomingparcel')),
+            ],
+            options={
+                'verbose_name': 'WTN signature',
+                'constraints': [models.UniqueConstraint(fields=('parcel', 'role'), name='unique_wtn_signature_per_role')],
+            },
+        ),
+    ]
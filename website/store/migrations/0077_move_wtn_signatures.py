@@ -0,0 +1,107 @@
+import base64
+import binascii
+import io
+
+from django.db import migrations
+from PIL import Image
+
+CHUNK_SIZE = 500
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+# Frozen copies of the store.signatures helpers as they were when this
+# migration was written, so later changes there can't change what it does
+
+MAX_SIZE = (600, 200)
+INK_THRESHOLD = 160
+PADDING = 4
+
+
+def normalize_signature(data_url):
+    """1-bit PNG bytes for a signature data URL. Raises ValueError if it isn't an image or is blank."""
+    encoded = data_url.split(',', 1)[1] if data_url.startswith('data:') else data_url
+    try:
+        image = Image.open(io.BytesIO(base64.b64decode(encoded, validate=True)))
+        image.load()
+    except (binascii.Error, OSError, Image.DecompressionBombError) as e:
+        raise ValueError('Signature is not a valid image') from e
+
+    image = image.convert('RGBA')
+    gray = Image.alpha_composite(Image.new('RGBA', image.size, 'white'), image).convert('L')
+
+    ink = gray.point(lambda value: 255 if value < INK_THRESHOLD else 0).getbbox()
+    if ink is None:
+        raise ValueError('Signature is blank')
+    left, top, right, bottom = ink
+    gray = gray.crop((
+        max(left - PADDING, 0),
+        max(top - PADDING, 0),
+        min(right + PADDING, gray.width),
+        min(bottom + PADDING, gray.height),
+    ))
+    gray.thumbnail(MAX_SIZE)
+
+    mono = gray.point(lambda value: 255 if value >= INK_THRESHOLD else 0, mode='1')
+    buffer = io.BytesIO()
+    mono.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def signature_data_url(image):
+    return 'data:image/png;base64,' + base64.b64encode(bytes(image)).decode('ascii')
+
+
+def move_signatures(apps, schema_editor):
+    """
+    Copy signature data URLs off IncomingParcel into WtnSignature as 1-bit PNGs,
+    a chunk of parcels at a time so the blobs are never all in memory at once.
+    Values that aren't decodable images are kept as they are, so the parcel
+    still has a signature on record; the PDF renderer can't read them as an
+    image and prints a note in its place, as it did before.
+    """
+    IncomingParcel = apps.get_model('store', 'IncomingParcel')
+    WtnSignature = apps.get_model('store', 'WtnSignature')
+    signed = IncomingParcel.objects.exclude(wtn_signature='', wtn_admin_signature='').order_by('pk')
+
+    last_pk = 0
+    while True:
+        chunk = list(signed.filter(pk__gt=last_pk).values_list('pk', 'wtn_signature', 'wtn_admin_signature')[:CHUNK_SIZE])
+        if not chunk:
+            break
+        rows = []
+        for parcel_id, customer_signature, admin_signature in chunk:
+            for role, data_url in (('customer', customer_signature), ('admin', admin_signature)):
+                if not data_url:
+                    continue
+                try:
+                    image = normalize_signature(data_url)
+                except ValueError:
+                    image = data_url.encode()
+                rows.append(WtnSignature(parcel_id=parcel_id, role=role, image=image))
+        WtnSignature.objects.bulk_create(rows, ignore_conflicts=True)
+        last_pk = chunk[-1][0]
+
+
+def restore_signatures(apps, schema_editor):
+    """Write the stored signatures back onto their parcels as data URLs (or the values kept as they were)"""
+    IncomingParcel = apps.get_model('store', 'IncomingParcel')
+    WtnSignature = apps.get_model('store', 'WtnSignature')
+    fields = {'customer': 'wtn_signature', 'admin': 'wtn_admin_signature'}
+
+    signatures = WtnSignature.objects.order_by('pk').values_list('parcel_id', 'role', 'image')
+    for parcel_id, role, image in signatures.iterator(chunk_size=CHUNK_SIZE):
+        image = bytes(image)
+        value = signature_data_url(image) if image.startswith(PNG_SIGNATURE) else image.decode()
+        IncomingParcel.objects.filter(pk=parcel_id).update(**{fields[role]: value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0076_wtnsignature'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_signatures, restore_signatures),
+    ]
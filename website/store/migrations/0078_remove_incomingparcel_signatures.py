@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0077_move_wtn_signatures'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='incomingparcel',
+            name='wtn_admin_signature',
+        ),
+        migrations.RemoveField(
+            model_name='incomingparcel',
+            name='wtn_signature',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:25
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0078_remove_incomingparcel_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRecyclingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the parcels were sent')),
+                ('kg', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=10)),
+                ('parcels', models.PositiveIntegerField(default=0, help_text='Parcels containing this plastic')),
+                ('points', models.PositiveIntegerField(default=0, help_text="Points for this plastic at the customer's current rate")),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recycling_rollups', to='store.customer')),
+                ('plastic_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.plastictype')),
+            ],
+            options={
+                'ordering': ['month'],
+                'constraints': [models.UniqueConstraint(fields=('customer', 'month', 'plastic_type'), name='unique_rollup_per_customer_month_plastic')],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.utils import timezone
+
+
+# Frozen copies of the store.rollups helpers as they were when this migration
+# was written, so later changes there can't change what it does
+
+MATERIAL_FIELDS = (
+    'parcel_id',
+    'parcel__user_id',
+    'parcel__date_submitted',
+    'plastic_type_id',
+    'weight_kg',
+    'plastic_type__points_per_kg_basic',
+    'plastic_type__points_per_kg_premium',
+)
+
+
+def month_of(value):
+    """First day of the local month a parcel's date_submitted falls in"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def rollup_totals(materials, premium_user_ids):
+    """{(user_id, month, plastic_type_id): {'kg', 'parcels', 'points'}} for MATERIAL_FIELDS values"""
+    totals = defaultdict(lambda: {'kg': Decimal('0'), 'parcels': set(), 'points': 0})
+    for material in materials:
+        user_id = material['parcel__user_id']
+        bucket = totals[(user_id, month_of(material['parcel__date_submitted']), material['plastic_type_id'])]
+        if user_id in premium_user_ids:
+            points_per_kg = material['plastic_type__points_per_kg_premium']
+        else:
+            points_per_kg = material['plastic_type__points_per_kg_basic']
+        bucket['kg'] += material['weight_kg']
+        bucket['parcels'].add(material['parcel_id'])
+        bucket['points'] += int(material['weight_kg'] * points_per_kg)
+    return {key: {**bucket, 'parcels': len(bucket['parcels'])} for key, bucket in totals.items()}
+
+
+def populate_recycling_rollup(apps, schema_editor):
+    """Roll up every customer's weighed materials by month and plastic type"""
+    Customer = apps.get_model('store', 'Customer')
+    ParcelMaterial = apps.get_model('store', 'ParcelMaterial')
+    MonthlyRecyclingRollup = apps.get_model('store', 'MonthlyRecyclingRollup')
+    
+    customers = {
+        user_id: (pk, is_premium)
+        for user_id, pk, is_premium in Customer.objects.filter(user__isnull=False).values_list('user_id', 'pk', 'is_premium')
+    }
+    materials = ParcelMaterial.objects.filter(weight_kg__isnull=False).values(*MATERIAL_FIELDS)
+    totals = rollup_totals(
+        materials.iterator(chunk_size=2000),
+        {user_id for user_id, (_, is_premium) in customers.items() if is_premium},
+    )
+    
+    rows = [
+        MonthlyRecyclingRollup(customer_id=customers[user_id][0], month=month, plastic_type_id=plastic_type_id, **values)
+        for (user_id, month, plastic_type_id), values in totals.items()
+        if user_id in customers
+    ]
+    MonthlyRecyclingRollup.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0079_monthlyrecyclingrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_recycling_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0080_populate_recycling_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incomingparcel',
+            index=models.Index(fields=['user', '-date_submitted'], name='store_incom_user_id_1679a6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-date_ordered'], name='store_order_custome_9be3d4_idx'),
+        ),
+    ]
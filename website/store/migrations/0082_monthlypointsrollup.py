@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0081_activity_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPointsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the transactions were made')),
+                ('earned', models.PositiveIntegerField(default=0, help_text='Sum of positive transactions')),
+                ('redeemed', models.PositiveIntegerField(default=0, help_text='Sum of negative transactions, as a positive number')),
+                ('transactions', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['customer', '-date_created', '-id'], name='store_point_custome_02f747_idx'),
+        ),
+        migrations.AddField(
+            model_name='monthlypointsrollup',
+            name='customer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_rollups', to='store.customer'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypointsrollup',
+            constraint=models.UniqueConstraint(fields=('customer', 'month'), name='unique_points_rollup_per_customer_month'),
+        ),
+    ]
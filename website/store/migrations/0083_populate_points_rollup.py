@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, DateField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+
+# Frozen copy of store.rollups.points_rollup_totals as it was when this
+# migration was written, so later changes there can't change what it does
+def points_rollup_totals(transactions):
+    """PointTransaction rows summed per customer and local month"""
+    return (transactions
+            .annotate(month=TruncMonth('date_created', output_field=DateField()))
+            .values('customer_id', 'month')
+            .annotate(
+                earned=Coalesce(Sum('points', filter=Q(points__gt=0)), Value(0)),
+                redeemed=Coalesce(-Sum('points', filter=Q(points__lt=0)), Value(0)),
+                transactions=Count('pk'),
+            )
+            .order_by('customer_id', 'month'))
+
+
+def populate_points_rollup(apps, schema_editor):
+    """Sum every customer's point transactions by month"""
+    PointTransaction = apps.get_model('store', 'PointTransaction')
+    MonthlyPointsRollup = apps.get_model('store', 'MonthlyPointsRollup')
+    
+    rows = [
+        MonthlyPointsRollup(**values)
+        for values in points_rollup_totals(PointTransaction.objects.all()).iterator(chunk_size=2000)
+    ]
+    MonthlyPointsRollup.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0082_monthlypointsrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_points_rollup, migrations.RunPython.noop),
+    ]
@@ -52,23 +52,31 @@ class IncomingParcel(models.Model):
     estimated_weight = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Customer's estimated weight in kg")
     wtn_signed_date = models.DateTimeField(null=True, blank=True, help_text="Date WTN was signed")
     wtn_reference = models.CharField(max_length=50, blank=True, default='', help_text="WTN reference number")
-    wtn_signature = models.TextField(blank=True, default='', help_text="Customer's base64 encoded signature image")
+    # Signature images live in WtnSignature so parcel queries stay small
     
     # Admin WTN approval fields
     wtn_admin_approved = models.BooleanField(default=False, help_text="Admin has approved the WTN")
     wtn_admin_approved_date = models.DateTimeField(null=True, blank=True, help_text="Date admin approved")
-    wtn_admin_signature = models.TextField(blank=True, default='', help_text="Admin's base64 encoded signature image")
     wtn_pdf_path = models.CharField(max_length=500, blank=True, default='', help_text="Path to generated PDF WTN")
     collection_scheduled_date = models.DateField(null=True, blank=True, help_text="Scheduled collection date for subscription customers")
     wtn_reminder_sent = models.BooleanField(default=False, help_text="Has the 3-day reminder email been sent?")
     wtn_reminder_sent_date = models.DateTimeField(null=True, blank=True, help_text="When the reminder was sent")
+    # Copied from Customer.is_business so displaying a parcel never needs a query;
+    # Customer saves keep it in sync (see Customer.sync_reference_prefixes)
+    parcel_prefix = models.CharField(max_length=3, default='IP', editable=False, help_text="BIP for business customers, IP otherwise")
+    
+    class Meta:
+        indexes = [
+            # A customer's parcels newest first (the orders activity feed)
+            models.Index(fields=['user', '-date_submitted']),
+        ]
+    
+    BUSINESS_PREFIX = 'BIP'  # Business Inbound Parcel
+    INDIVIDUAL_PREFIX = 'IP'  # Individual/Hobbyist Inbound Parcel
     
     def __str__(self):
         """Display parcel ID with prefix based on customer type"""
-        customer = Customer.objects.filter(user=self.user).first() if self.user else None
-        if customer and customer.is_business:
-            return f"BIP-{self.pk}"  # Business Inbound Parcel
-        return f"IP-{self.pk}"  # Individual/Hobbyist Inbound Parcel
+        return f"{self.parcel_prefix}-{self.pk}"
     
     @property
     def parcel_number(self):
@@ -101,15 +109,19 @@ class IncomingParcel(models.Model):
             plastic_type = PlasticType.objects.get(name=material_name)
             self.materials.filter(plastic_type=plastic_type).delete()
 
-    def calculate_points(self):
+    def calculate_points(self, is_premium=None):
         """
         Auto-calculate points based on:
         - Material weight
         - Plastic type point values
         - Customer membership tier (basic vs premium)
+        
+        Pass is_premium (and prefetch materials__plastic_type) to score many
+        parcels without a query each.
         """
-        customer = Customer.objects.filter(user=self.user).first()
-        is_premium = customer.is_premium if customer else False
+        if is_premium is None:
+            customer = Customer.objects.filter(user=self.user).first()
+            is_premium = customer.is_premium if customer else False
         
         total_points = 0
         for material in self.materials.all():
@@ -126,10 +138,26 @@ class IncomingParcel(models.Model):
         
         return total_points
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the owner the prefix was worked out for (see save)
+        instance._prefix_user_id = instance.__dict__.get('user_id')
+        return instance
+    
     def save(self, *args, **kwargs):
+        owner_changed = self._state.adding or self.user_id != getattr(self, '_prefix_user_id', self.user_id)
+        if owner_changed:
+            is_business = False
+            if self.user_id:
+                is_business = Customer.objects.filter(user_id=self.user_id).values_list('is_business', flat=True).first()
+            self.parcel_prefix = self.BUSINESS_PREFIX if is_business else self.INDIVIDUAL_PREFIX
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'parcel_prefix'}
         # Don't auto-calculate if admin has manually set points
         # Only calculate if points_calculated is None AND we have an existing pk
         super().save(*args, **kwargs)  # Save first so materials exist
+        self._prefix_user_id = self.user_id
 
     def award_points_to_customer(self):
         """Award points to the user's customer account"""
@@ -240,21 +268,26 @@ class Customer(models.Model):
         """Get all box preferences for this customer"""
         return BusinessBoxPreference.objects.filter(customer=self).order_by('box_number')
     
+    def sync_reference_prefixes(self):
+        """Bulk-update the BIP-/IP- parcel and BOP-/OP- order prefixes to match is_business"""
+        from django.db.models import CharField, Value
+        from django.db.models.functions import Cast, Concat
+        
+        order_prefix = f"{Order.BUSINESS_PREFIX if self.is_business else Order.INDIVIDUAL_PREFIX}-"
+        Order.objects.filter(customer=self).exclude(reference__startswith=order_prefix).update(
+            reference=Concat(Value(order_prefix), Cast('id', CharField()))
+        )
+        if self.user_id:
+            prefix = IncomingParcel.BUSINESS_PREFIX if self.is_business else IncomingParcel.INDIVIDUAL_PREFIX
+            IncomingParcel.objects.filter(user_id=self.user_id).exclude(parcel_prefix=prefix).update(parcel_prefix=prefix)
+    
     def get_verified_weight(self):
         """Get total verified weight from all parcels"""
-        from django.db.models import Sum
-        total = ParcelMaterial.objects.filter(
-            parcel__user=self.user,
-            weight_kg__isnull=False
-        ).aggregate(total_weight=Sum('weight_kg'))['total_weight']
-        return float(total or 0)
+        return float(CustomerRecyclingStats.for_customer(self).verified_weight_kg)
     
     def get_parcel_count(self):
         """Get count of verified parcels (those with points awarded)"""
-        return IncomingParcel.objects.filter(
-            user=self.user,
-            points_awarded=True
-        ).count()
+        return CustomerRecyclingStats.for_customer(self).parcel_count
     
     def get_premium_progress(self):
         """Calculate progress toward premium (0-100)"""
@@ -302,6 +335,63 @@ class BusinessBoxPreference(models.Model):
         return f"{self.customer.name} - Box {self.box_number}: {self.plastic_type}"
 
 
+class ProductQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Annotate everything a product card needs in a single SELECT:
+        current price, stock state and the denormalized review figures.
+        The matching Product properties read these annotations when present.
+        """
+        from django.db.models import Case, When, Value, F, Q, FloatField, BooleanField, CharField
+        from django.db.models.functions import Coalesce, Cast
+        
+        return self.annotate(
+            listing_current_price=Case(
+                When(Q(is_on_sale=True) & Q(sale_price__isnull=False), then=F('sale_price')),
+                default=F('price'),
+            ),
+            listing_stock_state=Case(
+                When(stock_quantity__lte=0, then=Value('out-of-stock')),
+                When(stock_quantity__lte=F('low_stock_threshold'), then=Value('low-stock')),
+                default=Value('in-stock'),
+                output_field=CharField(),
+            ),
+            listing_review_count=Coalesce(F('rating_summary__review_count'), 0),
+            listing_average_rating=Case(
+                When(rating_summary__review_count__gt=0, then=(
+                    Cast('rating_summary__rating_sum', FloatField()) / Cast('rating_summary__review_count', FloatField())
+                )),
+                default=Value(0.0),
+                output_field=FloatField(),
+            ),
+            listing_has_review_photos=Case(
+                When(rating_summary__photo_review_count__gt=0, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+    def take_stock(self, quantities):
+        """
+        Deduct {product_id: quantity} from stock without row locks: one
+        conditional UPDATE per line that only matches while enough stock is
+        left. Returns the product ids that were short; the caller must roll
+        back its transaction if any are returned.
+        """
+        from django.db.models import F
+        
+        short = []
+        # Consistent ordering keeps concurrent checkouts from deadlocking
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            updated = self.filter(pk=product_id, stock_quantity__gte=quantity).update(
+                stock_quantity=F('stock_quantity') - quantity
+            )
+            if not updated:
+                short.append(product_id)
+        return short
+
+
 class Product(models.Model):
     PRODUCT_TYPE_CHOICES = [
         ('PLA', 'PLA'),
@@ -337,6 +427,13 @@ class Product(models.Model):
     sale_price = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True, help_text="Sale price (only used if 'is on sale' is checked)")
     sale_comment = models.CharField(max_length=200, blank=True, help_text="Optional sale description (e.g., 'Black Friday Deal', '20% Off')")
 
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(stock_quantity__gte=0), name='product_stock_quantity_non_negative'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -366,9 +463,10 @@ class Product(models.Model):
     @property
     def stock_status(self):
         """Return stock status label"""
-        if self.stock_quantity == 0:
+        state = self.stock_status_class
+        if state == "out-of-stock":
             return "Out of Stock"
-        elif self.is_low_stock:
+        elif state == "low-stock":
             return f"Low Stock ({self.stock_quantity} left)"
         else:
             return "In Stock"
@@ -376,16 +474,24 @@ class Product(models.Model):
     @property
     def stock_status_class(self):
         """Return CSS class for stock status"""
-        if self.stock_quantity == 0:
+        if 'listing_stock_state' in self.__dict__:
+            return self.listing_stock_state
+        if self.stock_quantity <= 0:
             return "out-of-stock"
         elif self.is_low_stock:
             return "low-stock"
         else:
             return "in-stock"
     
+    def available_stock(self, exclude_order=None):
+        """Stock minus live cart reservations (a cart's own reservation can be excluded)"""
+        return self.stock_quantity - StockReservation.objects.reserved_quantity(self, exclude_order)
+
     @property
     def current_price(self):
         """Return the current price (sale price if on sale, otherwise regular price)"""
+        if 'listing_current_price' in self.__dict__:
+            return self.listing_current_price
         if self.is_on_sale and self.sale_price is not None:
             return self.sale_price
         return self.price
@@ -404,32 +510,37 @@ class Product(models.Model):
             return int((self.savings_amount / self.price) * 100)
         return 0
     
+    @property
+    def _rating_summary(self):
+        """Denormalized review aggregates (None if the product has no reviews yet)"""
+        try:
+            return self.rating_summary
+        except ProductRatingSummary.DoesNotExist:
+            return None
+    
     @property
     def average_rating(self):
-        """Calculate average star rating from approved reviews"""
-        approved_reviews = self.reviews.filter(is_approved=True)
-        if approved_reviews.exists():
-            from django.db.models import Avg
-            avg = approved_reviews.aggregate(Avg('rating'))['rating__avg']
-            return round(avg, 1) if avg else 0
-        return 0
+        """Average star rating from approved reviews"""
+        if 'listing_average_rating' in self.__dict__:
+            return round(self.listing_average_rating, 1)
+        summary = self._rating_summary
+        return summary.average_rating if summary else 0
     
     @property
     def review_count(self):
         """Count of approved reviews"""
-        return self.reviews.filter(is_approved=True).count()
+        if 'listing_review_count' in self.__dict__:
+            return self.listing_review_count
+        summary = self._rating_summary
+        return summary.review_count if summary else 0
     
     @property
     def has_review_photos(self):
         """Check if any approved reviews have photos"""
-        from django.db.models import Q
-        return self.reviews.filter(
-            is_approved=True
-        ).filter(
-            Q(image1__isnull=False) & ~Q(image1='') |
-            Q(image2__isnull=False) & ~Q(image2='') |
-            Q(image3__isnull=False) & ~Q(image3='')
-        ).exists()
+        if 'listing_has_review_photos' in self.__dict__:
+            return self.listing_has_review_photos
+        summary = self._rating_summary
+        return summary.has_photos if summary else False
     
     def get_star_display(self):
         """Return HTML for star rating display"""
@@ -460,6 +571,23 @@ class Order(models.Model):
     tracking_number = models.CharField(max_length=100, null=True, blank=True)
     points_used = models.PositiveIntegerField(default=0)
     points_discount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    # Materialized from the order's items (see refresh_totals); kept in sync by
+    # the OrderItem signals so templates never have to loop over the items
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    item_count = models.PositiveIntegerField(default=0)
+    requires_shipping = models.BooleanField(default=False)
+    # BOP-<id>/OP-<id>, set once the id is known and re-prefixed in bulk when the
+    # customer's type changes (see Customer.sync_reference_prefixes)
+    reference = models.CharField(max_length=20, null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # A customer's orders newest first (the orders activity feed)
+            models.Index(fields=['customer', '-date_ordered']),
+        ]
+
+    BUSINESS_PREFIX = 'BOP'  # Business Outbound Parcel
+    INDIVIDUAL_PREFIX = 'OP'  # Individual/Hobbyist Outbound Parcel
 
     def __str__(self):
         return self.order_number
@@ -467,25 +595,54 @@ class Order(models.Model):
     @property
     def order_number(self):
         """Display order with prefix based on customer type (Outbound Parcel)"""
-        customer = self.customer
-        if customer and customer.is_business:
-            return f"BOP-{self.id}"  # Business Outbound Parcel
-        return f"OP-{self.id}"  # Individual/Hobbyist Outbound Parcel
+        return self.reference or f"{self.INDIVIDUAL_PREFIX}-{self.id}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.reference and self.pk:
+            if Order.customer.is_cached(self):
+                is_business = bool(self.customer and self.customer.is_business)
+            else:
+                is_business = Customer.objects.filter(pk=self.customer_id, is_business=True).exists()
+            prefix = self.BUSINESS_PREFIX if is_business else self.INDIVIDUAL_PREFIX
+            self.reference = f"{prefix}-{self.pk}"
+            Order.objects.filter(pk=self.pk).update(reference=self.reference)
+
+    def calculate_totals(self):
+        """Work out subtotal, item count and shipping from the order items (one query)"""
+        subtotal = Decimal('0.00')
+        item_count = 0
+        requires_shipping = False
+        items = self.orderitem_set.select_related('product').only(
+            'quantity', 'product__price', 'product__sale_price',
+            'product__is_on_sale', 'product__digital',
+        )
+        for item in items:
+            item_count += item.quantity or 0
+            subtotal += item.get_total
+            if item.product and item.product.digital is False:
+                requires_shipping = True
+        return {
+            'subtotal': Decimal(subtotal).quantize(Decimal('0.01')),
+            'item_count': item_count,
+            'requires_shipping': requires_shipping,
+        }
+
+    def refresh_totals(self):
+        """Recalculate the materialized totals and write them with a single UPDATE"""
+        totals = self.calculate_totals()
+        Order.objects.filter(pk=self.pk).update(**totals)
+        for field, value in totals.items():
+            setattr(self, field, value)
+        return totals
 
     @property
     def shipping(self):
-        shipping = False
-        for i in self.orderitem_set.all():
-            if i.product and getattr(i.product, 'digital', None) is not None:
-                if i.product.digital is False:
-                    shipping = True
-        return shipping
+        return self.requires_shipping
 
     @property
     def get_cart_total(self):
-        orderitems = self.orderitem_set.all()
-        total = sum([item.get_total for item in orderitems])
-        return total
+        return self.subtotal
 
     @property
     def points_discount_gbp(self):
@@ -505,9 +662,7 @@ class Order(models.Model):
 
     @property
     def get_cart_items(self):
-        orderitems = self.orderitem_set.all()
-        total = sum([item.quantity for item in orderitems])
-        return total
+        return self.item_count
 
     def total_after_points(self):
         return (self.get_cart_total - (self.points_discount or Decimal('0.00'))).quantize(Decimal('0.01'))
@@ -524,6 +679,73 @@ class OrderItem(models.Model):
             return self.product.current_price * self.quantity
         return 0
 
+STOCK_RESERVATION_TTL = getattr(settings, 'STOCK_RESERVATION_TTL', 60 * 30)  # seconds
+
+
+class StockReservationQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def reserved_quantity(self, product, exclude_order=None):
+        """Units of product held by live reservations (optionally ignoring one cart)"""
+        from django.db.models import Sum
+        
+        reservations = self.live().filter(product=product)
+        if exclude_order is not None:
+            reservations = reservations.exclude(order=exclude_order)
+        return reservations.aggregate(total=Sum('quantity'))['total'] or 0
+
+
+class StockReservation(models.Model):
+    """
+    Stock held for a logged-in shopper's cart line until expires_at.
+
+    Reservations let update_item check availability without locking the
+    Product row. They are advisory: checkout still takes stock with a
+    conditional UPDATE (ProductQuerySet.take_stock), which is what finally
+    prevents overselling. Expired rows are ignored and swept by the
+    release_expired_reservations command.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = StockReservationQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='unique_stock_reservation_per_cart_line'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product} for {self.order}"
+
+    @classmethod
+    def hold(cls, order, product, quantity):
+        """
+        Reserve quantity of product for the cart (0 releases it) and restart
+        the clock on every reservation in the cart, so active shoppers keep
+        their whole basket.
+        """
+        from datetime import timedelta
+        
+        expires_at = timezone.now() + timedelta(seconds=STOCK_RESERVATION_TTL)
+        if quantity > 0:
+            cls.objects.update_or_create(
+                order=order, product=product,
+                defaults={'quantity': quantity, 'expires_at': expires_at},
+            )
+        else:
+            cls.objects.filter(order=order, product=product).delete()
+        cls.objects.filter(order=order).update(expires_at=expires_at)
+
 class ShippingAddress(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True)
     order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True)
@@ -558,6 +780,10 @@ class PointTransaction(models.Model):
     
     class Meta:
         ordering = ['-date_created']
+        indexes = [
+            # Points history pages (see activity.points_page)
+            models.Index(fields=['customer', '-date_created', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.customer} - {self.points} points - {self.transaction_type}"
@@ -656,4 +882,624 @@ class ProductReview(models.Model):
     @property
     def has_images(self):
         """Check if review has any images"""
-        return bool(self.image1 or self.image2 or self.image3)
\ No newline at end of file
+        return bool(self.image1 or self.image2 or self.image3)
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Denormalized approved-review aggregates for a product.
+    Kept up to date incrementally by the ProductReview signals; rebuild with
+    `python manage.py rebuild_product_ratings` if it ever drifts.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='rating_summary')
+    review_count = models.PositiveIntegerField(default=0, help_text="Number of approved reviews")
+    rating_sum = models.PositiveIntegerField(default=0, help_text="Sum of approved review ratings")
+    photo_review_count = models.PositiveIntegerField(default=0, help_text="Approved reviews with at least one photo")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Product rating summary'
+        verbose_name_plural = 'Product rating summaries'
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.average_rating} ({self.review_count} reviews)"
+    
+    @property
+    def average_rating(self):
+        """Average rating rounded to 1dp (0 if no reviews)"""
+        if not self.review_count:
+            return 0
+        return round(self.rating_sum / self.review_count, 1)
+    
+    @property
+    def has_photos(self):
+        return self.photo_review_count > 0
+    
+    @staticmethod
+    def contribution(review):
+        """What a review adds to its product's summary (None if not approved)"""
+        if not review or not review.is_approved:
+            return None
+        return {
+            'product_id': review.product_id,
+            'rating': review.rating,
+            'has_photo': 1 if review.has_images else 0,
+        }
+    
+    @classmethod
+    def apply_delta(cls, product_id, count, rating, photos):
+        """Atomically add (or subtract) review totals for one product"""
+        from django.db.models import F
+        if not product_id or not (count or rating or photos):
+            return
+        if count > 0:
+            # Removals never create a row (the product may be mid-cascade-delete)
+            cls.objects.get_or_create(product_id=product_id)
+        cls.objects.filter(product_id=product_id).update(
+            review_count=F('review_count') + count,
+            rating_sum=F('rating_sum') + rating,
+            photo_review_count=F('photo_review_count') + photos,
+            updated_at=timezone.now(),
+        )
+    
+    @classmethod
+    def apply_change(cls, before, after):
+        """Move a review's contribution from its old state to its new state"""
+        if before == after:
+            return
+        if before:
+            cls.apply_delta(before['product_id'], -1, -before['rating'], -before['has_photo'])
+        if after:
+            cls.apply_delta(after['product_id'], 1, after['rating'], after['has_photo'])
+    
+    @classmethod
+    def rebuild(cls, product_ids=None):
+        """Recompute summaries from ProductReview rows in bulk. Returns rows written."""
+        from django.db.models import Count, Sum, Q
+        
+        has_photo = (
+            Q(image1__isnull=False) & ~Q(image1='') |
+            Q(image2__isnull=False) & ~Q(image2='') |
+            Q(image3__isnull=False) & ~Q(image3='')
+        )
+        reviews = ProductReview.objects.filter(is_approved=True)
+        products = Product.objects.all()
+        if product_ids is not None:
+            reviews = reviews.filter(product_id__in=product_ids)
+            products = products.filter(pk__in=product_ids)
+        
+        totals = {
+            row['product_id']: row
+            for row in reviews.values('product_id').annotate(
+                count=Count('id'),
+                rating_total=Sum('rating'),
+                photos=Count('id', filter=has_photo),
+            )
+        }
+        
+        summaries = []
+        for product_id in products.values_list('pk', flat=True):
+            row = totals.get(product_id, {})
+            summaries.append(cls(
+                product_id=product_id,
+                review_count=row.get('count', 0),
+                rating_sum=row.get('rating_total') or 0,
+                photo_review_count=row.get('photos', 0),
+            ))
+        
+        cls.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['review_count', 'rating_sum', 'photo_review_count', 'updated_at'],
+        )
+        return len(summaries)
+
+
+class EmailStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    SENT = 'sent', 'Sent'
+    FAILED = 'failed', 'Failed'
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email waiting for the send_outbox worker.
+
+    Rows are written by store.emails.queue_email inside the caller's
+    transaction, so an email only goes out if the order/parcel/user change
+    that triggered it commits, and no request ever waits on SMTP.
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=EmailStatus.choices, default=EmailStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        verbose_name = 'Queued email'
+        verbose_name_plural = 'Email outbox'
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.recipients)} ({self.get_status_display()})"
+
+
+class CustomerRecyclingStats(models.Model):
+    """
+    Denormalized recycling totals behind premium progress.
+    Kept up to date incrementally by the IncomingParcel/ParcelMaterial
+    signals; rebuild with `python manage.py rebuild_recycling_stats` if it
+    ever drifts.
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, related_name='recycling_stats')
+    parcel_count = models.PositiveIntegerField(default=0, help_text="Parcels with points awarded")
+    verified_weight_kg = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0'), help_text="Total weighed material across all parcels")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Customer recycling stats'
+        verbose_name_plural = 'Customer recycling stats'
+    
+    def __str__(self):
+        return f"{self.customer.name} - {self.parcel_count} parcels, {self.verified_weight_kg}kg"
+    
+    @classmethod
+    def for_customer(cls, customer):
+        """The customer's stats row, built from scratch the first time it's needed"""
+        try:
+            return customer.recycling_stats
+        except cls.DoesNotExist:
+            cls.rebuild(customer_ids=[customer.pk])
+            return cls.objects.get(customer=customer)
+    
+    @classmethod
+    def apply_delta(cls, user_id, parcels=0, weight_kg=0):
+        """
+        Atomically add (or subtract) totals for the user's customer. Call after
+        the change is written: a missing row is rebuilt from the database
+        instead, which already includes it.
+        """
+        from django.db.models import F
+        if not user_id or not (parcels or weight_kg):
+            return
+        customer_id = Customer.objects.filter(user_id=user_id).values_list('pk', flat=True).first()
+        if not customer_id:
+            return
+        updated = cls.objects.filter(customer_id=customer_id).update(
+            parcel_count=F('parcel_count') + parcels,
+            verified_weight_kg=F('verified_weight_kg') + Decimal(weight_kg),
+            updated_at=timezone.now(),
+        )
+        if not updated and (parcels > 0 or weight_kg > 0):
+            cls.rebuild(customer_ids=[customer_id])
+    
+    @classmethod
+    def rebuild(cls, customer_ids=None):
+        """Recompute stats from IncomingParcel/ParcelMaterial rows in bulk. Returns rows written."""
+        from django.db.models import Count, Sum
+        
+        customers = Customer.objects.filter(user__isnull=False)
+        if customer_ids is not None:
+            customers = customers.filter(pk__in=customer_ids)
+        customers = dict(customers.values_list('user_id', 'pk'))
+        
+        parcels = IncomingParcel.objects.filter(points_awarded=True)
+        materials = ParcelMaterial.objects.filter(weight_kg__isnull=False)
+        if customer_ids is not None:
+            parcels = parcels.filter(user_id__in=customers)
+            materials = materials.filter(parcel__user_id__in=customers)
+        
+        parcel_counts = dict(parcels.values('user_id').annotate(total=Count('id')).values_list('user_id', 'total'))
+        weights = dict(
+            materials.values('parcel__user_id').annotate(total=Sum('weight_kg')).values_list('parcel__user_id', 'total')
+        )
+        
+        stats = [
+            cls(
+                customer_id=customer_id,
+                parcel_count=parcel_counts.get(user_id, 0),
+                verified_weight_kg=weights.get(user_id) or Decimal('0'),
+            )
+            for user_id, customer_id in customers.items()
+        ]
+        cls.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=['customer'],
+            update_fields=['parcel_count', 'verified_weight_kg', 'updated_at'],
+        )
+        return len(stats)
+
+
+class MonthlyRecyclingRollupQuerySet(models.QuerySet):
+    def by_month(self):
+        """Totals per month across plastic types, oldest first"""
+        from django.db.models import Sum
+        
+        return (self.values('month')
+                .annotate(total_kg=Sum('kg'), total_points=Sum('points'))
+                .order_by('month'))
+
+    def by_plastic(self):
+        """Totals per plastic type, heaviest first"""
+        from django.db.models import Sum
+        
+        return (self.values('plastic_type__name')
+                .annotate(total_kg=Sum('kg'), total_parcels=Sum('parcels'), total_points=Sum('points'))
+                .order_by('-total_kg', 'plastic_type__name'))
+
+
+class MonthlyRecyclingRollup(models.Model):
+    """
+    Weighed material per customer, month and plastic type, behind the business
+    dashboard's totals and charts.
+
+    A customer's month is recomputed from its ParcelMaterial rows whenever a
+    material in it is saved or deleted, or a parcel moves in or out of it (see
+    the signals); rebuild with `python manage.py rebuild_recycling_rollup` after
+    bulk edits or PlasticType rate changes.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='recycling_rollups')
+    month = models.DateField(help_text="First day of the month the parcels were sent")
+    plastic_type = models.ForeignKey(PlasticType, on_delete=models.CASCADE, related_name='+')
+    kg = models.DecimalField(max_digits=10, decimal_places=3, default=Decimal('0'))
+    parcels = models.PositiveIntegerField(default=0, help_text="Parcels containing this plastic")
+    points = models.PositiveIntegerField(default=0, help_text="Points for this plastic at the customer's current rate")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = MonthlyRecyclingRollupQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['month']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'month', 'plastic_type'], name='unique_rollup_per_customer_month_plastic'),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer.name} - {self.month:%b %Y} {self.plastic_type.name}: {self.kg}kg"
+    
+    @classmethod
+    def refresh(cls, user_id, date_submitted):
+        """Recompute the user's customer's rows for the month containing date_submitted"""
+        from django.db import transaction
+        from .rollups import MATERIAL_FIELDS, month_bounds, month_of, rollup_totals
+        
+        if not user_id or not date_submitted:
+            return
+        customer = Customer.objects.filter(user_id=user_id).values('pk', 'is_premium').first()
+        if not customer:
+            return
+        month = month_of(date_submitted)
+        start, end = month_bounds(month)
+        materials = ParcelMaterial.objects.filter(
+            parcel__user_id=user_id,
+            parcel__date_submitted__gte=start,
+            parcel__date_submitted__lt=end,
+            weight_kg__isnull=False,
+        ).values(*MATERIAL_FIELDS)
+        totals = rollup_totals(materials, {user_id} if customer['is_premium'] else set())
+        
+        # Upsert rather than delete-and-insert, so overlapping refreshes of the
+        # same month can't both insert a row and trip the unique constraint
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [
+                    cls(customer_id=customer['pk'], month=month, plastic_type_id=plastic_type_id, **values)
+                    for (_, _, plastic_type_id), values in totals.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['customer', 'month', 'plastic_type'],
+                update_fields=['kg', 'parcels', 'points', 'updated_at'],
+            )
+            cls.objects.filter(customer_id=customer['pk'], month=month).exclude(
+                plastic_type_id__in=[plastic_type_id for (_, _, plastic_type_id) in totals]
+            ).delete()
+    
+    @classmethod
+    def rebuild(cls, customer_ids=None):
+        """Recompute every month from ParcelMaterial rows in bulk. Returns rows written."""
+        from .rollups import MATERIAL_FIELDS, rollup_totals
+        
+        customers = Customer.objects.filter(user__isnull=False)
+        materials = ParcelMaterial.objects.filter(weight_kg__isnull=False)
+        stale = cls.objects.all()
+        if customer_ids is not None:
+            customers = customers.filter(pk__in=customer_ids)
+            materials = materials.filter(parcel__user__customer__pk__in=customer_ids)
+            stale = stale.filter(customer_id__in=customer_ids)
+        customers = {user_id: (pk, is_premium) for user_id, pk, is_premium in customers.values_list('user_id', 'pk', 'is_premium')}
+        
+        totals = rollup_totals(
+            materials.values(*MATERIAL_FIELDS).iterator(chunk_size=2000),
+            {user_id for user_id, (_, is_premium) in customers.items() if is_premium},
+        )
+        rows = [
+            cls(customer_id=customers[user_id][0], month=month, plastic_type_id=plastic_type_id, **values)
+            for (user_id, month, plastic_type_id), values in totals.items()
+            if user_id in customers
+        ]
+        stale.delete()
+        cls.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['customer', 'month', 'plastic_type'],
+            update_fields=['kg', 'parcels', 'points', 'updated_at'],
+        )
+        return len(rows)
+
+
+class MonthlyPointsRollup(models.Model):
+    """
+    Points earned and redeemed per customer and month, behind the points
+    history page's monthly summary.
+
+    A customer's month is recomputed from its PointTransaction rows whenever
+    one is saved or deleted (see the signals); rebuild with
+    `python manage.py rebuild_points_rollup` after bulk edits.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='points_rollups')
+    month = models.DateField(help_text="First day of the month the transactions were made")
+    earned = models.PositiveIntegerField(default=0, help_text="Sum of positive transactions")
+    redeemed = models.PositiveIntegerField(default=0, help_text="Sum of negative transactions, as a positive number")
+    transactions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'month'], name='unique_points_rollup_per_customer_month'),
+        ]
+    
+    def __str__(self):
+        return f"{self.customer.name} - {self.month:%b %Y}: +{self.earned} / -{self.redeemed}"
+    
+    @property
+    def net(self):
+        return self.earned - self.redeemed
+    
+    @classmethod
+    def refresh(cls, customer_id, date_created):
+        """Recompute the customer's row for the month containing date_created"""
+        from django.db import transaction
+        from .rollups import month_bounds, month_of, points_rollup_totals
+        
+        if not customer_id or not date_created:
+            return
+        month = month_of(date_created)
+        start, end = month_bounds(month)
+        totals = points_rollup_totals(PointTransaction.objects.filter(
+            customer_id=customer_id,
+            date_created__gte=start,
+            date_created__lt=end,
+        )).first()
+        
+        with transaction.atomic():
+            if totals:
+                cls.objects.update_or_create(
+                    customer_id=customer_id,
+                    month=month,
+                    defaults={field: totals[field] for field in ('earned', 'redeemed', 'transactions')},
+                )
+            else:
+                cls.objects.filter(customer_id=customer_id, month=month).delete()
+    
+    @classmethod
+    def rebuild(cls, customer_ids=None):
+        """Recompute every month from PointTransaction rows in bulk. Returns rows written."""
+        from .rollups import points_rollup_totals
+        
+        transactions = PointTransaction.objects.all()
+        stale = cls.objects.all()
+        if customer_ids is not None:
+            transactions = transactions.filter(customer_id__in=customer_ids)
+            stale = stale.filter(customer_id__in=customer_ids)
+        
+        rows = [cls(**values) for values in points_rollup_totals(transactions).iterator(chunk_size=2000)]
+        stale.delete()
+        cls.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+COLLECTION_SCHEDULE_MONTHS = getattr(settings, 'COLLECTION_SCHEDULE_MONTHS', 12)
+
+
+class CollectionScheduleQuerySet(models.QuerySet):
+    def between(self, start, end):
+        """Collections on or after start and before end"""
+        return self.filter(collection_date__gte=start, collection_date__lt=end)
+
+    def capacity(self, start, end):
+        """Per-day collection count and boxes to carry, for capacity planning"""
+        from django.db.models import Count, Sum
+        
+        return (self.between(start, end)
+                .values('collection_date')
+                .annotate(collections=Count('id'), boxes=Sum('customer__box_count'))
+                .order_by('collection_date'))
+
+
+class CollectionSchedule(models.Model):
+    """
+    Materialized subscription collection dates, COLLECTION_SCHEDULE_MONTHS ahead.
+
+    Regenerated for a customer whenever their preferred_delivery_day or
+    subscription status changes (see the Customer signals), and rolled forward
+    daily by `python manage.py refresh_collection_schedule`. Past rows are
+    kept as history.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='collection_schedule')
+    collection_date = models.DateField(db_index=True)
+
+    objects = CollectionScheduleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['collection_date']
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'collection_date'], name='unique_collection_per_customer_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.name} - {self.collection_date}"
+
+    @staticmethod
+    def has_schedule(customer):
+        return bool(
+            customer.subscription_active
+            and not customer.subscription_cancelled
+            and customer.preferred_delivery_day
+        )
+
+    @classmethod
+    def regenerate(cls, customers, today=None):
+        """
+        Replace upcoming collections (from today) for the given customers with
+        dates following their current preferred_delivery_day pattern.
+        Returns the number of rows written.
+        """
+        from .scheduling import monthly_collection_dates
+        
+        today = today or timezone.localdate()
+        customers = list(customers)
+        cls.objects.filter(customer__in=customers, collection_date__gte=today).delete()
+        
+        rows = [
+            cls(customer=customer, collection_date=collection_date)
+            for customer in customers if cls.has_schedule(customer)
+            for collection_date in monthly_collection_dates(
+                customer.preferred_delivery_day, today, COLLECTION_SCHEDULE_MONTHS
+            )
+        ]
+        cls.objects.bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
+
+
+class PdfJobStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    RUNNING = 'running', 'Rendering'
+    DONE = 'done', 'Done'
+    FAILED = 'failed', 'Failed'
+
+
+class PdfJob(models.Model):
+    """
+    A WTN PDF waiting to be rendered by `python manage.py run_pdf_worker`.
+
+    Admin approval only enqueues a job, so staff never wait on ReportLab. The
+    worker renders the PDF, then stores wtn_pdf_path and deletes the parcel's
+    signature images in the same transaction that marks the job done.
+    """
+    parcel = models.ForeignKey(IncomingParcel, on_delete=models.CASCADE, related_name='pdf_jobs')
+    status = models.CharField(max_length=10, choices=PdfJobStatus.choices, default=PdfJobStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        constraints = [
+            # At most one job queued or rendering per parcel
+            models.UniqueConstraint(
+                fields=['parcel'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_open_pdf_job_per_parcel',
+            ),
+        ]
+        verbose_name = 'WTN PDF job'
+
+    def __str__(self):
+        return f"WTN PDF for {self.parcel_id} ({self.get_status_display()})"
+
+    @classmethod
+    def complete(cls, parcel_id, pdf_path):
+        """
+        Store a rendered PDF on its parcel, drop the signature images (they now
+        live in the PDF) and close any open job for it, all in one transaction.
+        """
+        from django.db import transaction
+        
+        with transaction.atomic():
+            IncomingParcel.objects.filter(pk=parcel_id).update(wtn_pdf_path=pdf_path)
+            WtnSignature.objects.filter(parcel_id=parcel_id).delete()
+            cls.objects.filter(
+                parcel_id=parcel_id, status__in=[PdfJobStatus.PENDING, PdfJobStatus.RUNNING],
+            ).update(status=PdfJobStatus.DONE, finished_at=timezone.now(), last_error='')
+
+    @classmethod
+    def enqueue(cls, parcels):
+        """Queue a PDF for each parcel that doesn't already have one queued"""
+        parcel_ids = {parcel.pk for parcel in parcels}
+        already_queued = set(cls.objects.filter(
+            parcel_id__in=parcel_ids, status__in=[PdfJobStatus.PENDING, PdfJobStatus.RUNNING],
+        ).values_list('parcel_id', flat=True))
+        return cls.objects.bulk_create(
+            [cls(parcel_id=parcel_id) for parcel_id in sorted(parcel_ids - already_queued)],
+            ignore_conflicts=True,
+        )
+
+
+class WtnSignatureRole(models.TextChoices):
+    CUSTOMER = 'customer', 'Customer'
+    ADMIN = 'admin', 'Admin'
+
+
+class WtnSignature(models.Model):
+    """
+    A signature on a parcel's WTN, stored as a small 1-bit PNG.
+
+    Kept out of IncomingParcel so listing parcels never loads images; only the
+    WTN page, the admin change form and the PDF renderer read them. Images are
+    normalized when they are stored (see store.signatures) and deleted once
+    they are in the rendered PDF (see PdfJob.complete).
+    """
+    parcel = models.ForeignKey(IncomingParcel, on_delete=models.CASCADE, related_name='signatures')
+    role = models.CharField(max_length=10, choices=WtnSignatureRole.choices)
+    image = models.BinaryField(help_text="1-bit PNG")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['parcel', 'role'], name='unique_wtn_signature_per_role'),
+        ]
+        verbose_name = 'WTN signature'
+
+    def __str__(self):
+        return f"{self.get_role_display()} signature for {self.parcel_id}"
+
+    @property
+    def data_url(self):
+        from .signatures import signature_data_url
+        return signature_data_url(self.image)
+
+    @classmethod
+    def store(cls, parcel, role, data_url):
+        """
+        Normalize a posted data URL and save it as the parcel's signature for
+        role, replacing any earlier one. Raises ValueError for invalid images.
+        """
+        from .signatures import normalize_signature
+        
+        signature, _ = cls.objects.update_or_create(
+            parcel=parcel, role=role, defaults={'image': normalize_signature(data_url)},
+        )
+        return signature
+
+    @classmethod
+    def for_parcel(cls, parcel):
+        """The parcel's signatures keyed by role"""
+        return {signature.role: signature for signature in cls.objects.filter(parcel=parcel)}
@@ -0,0 +1,113 @@
+"""
+Full-page cache for anonymous marketing pages.
+
+Pages like About, Privacy and Roadmap are identical for every guest apart from
+the header cart badge. Guests are served these pages straight from the cache
+(no view code or model queries); the badge is left empty in the cached HTML and filled in
+on the client from the cart cookie (see store/main.html).
+
+Cached pages are keyed by a global version number. Bumping the version (see
+invalidate_page_cache) orphans every cached page at once, which the signals do
+whenever blog posts or the processed-parcel stats on the home and business
+pages change.
+
+The staff dashboard's data is cached here too, for a short time, and dropped
+by the signals whenever an order or parcel changes. The admin calendar feed
+uses its own version number as an ETag, bumped whenever an order, parcel or
+customer (and so their collection schedule) changes.
+
+All of this relies on every worker process seeing the same cache, so that an
+invalidation made by the process that saved a change reaches the others. With
+a per-process cache (LocMem, or Dummy) nothing here is cached (see
+cache_is_shared); settings.CACHES configures a shared one.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+PAGE_CACHE_VERSION_KEY = 'page_cache:version'
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 10)  # seconds
+
+# Admin dashboard counters and task lists (see CustomAdminSite.dashboard_view)
+DASHBOARD_CACHE_KEY = 'admin_dashboard:data'
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'ADMIN_DASHBOARD_CACHE_TIMEOUT', 60)  # seconds
+
+
+# Admin calendar feed ETag (see admin_calendar.admin_calendar_feed)
+CALENDAR_VERSION_KEY = 'admin_calendar:version'
+
+
+def cache_is_shared():
+    """Whether the default cache is shared between processes, and so safe to invalidate"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_page_cache_version():
+    return cache.get_or_set(PAGE_CACHE_VERSION_KEY, int(time.time()), None)
+
+
+def invalidate_page_cache():
+    """Orphan every cached page by moving to a new version"""
+    try:
+        cache.incr(PAGE_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(PAGE_CACHE_VERSION_KEY, int(time.time()), None)
+
+
+def invalidate_dashboard_cache():
+    """Drop the cached admin dashboard data so the next load recomputes it"""
+    cache.delete(DASHBOARD_CACHE_KEY)
+
+
+def get_calendar_version():
+    return cache.get_or_set(CALENDAR_VERSION_KEY, int(time.time()), None)
+
+
+def invalidate_calendar():
+    """Move the calendar feed to a new version so clients' ETags stop matching"""
+    try:
+        cache.incr(CALENDAR_VERSION_KEY)
+    except ValueError:
+        cache.set(CALENDAR_VERSION_KEY, int(time.time()), None)
+
+
+def anonymous_page_cache(view_func):
+    """
+    Serve a view from the page cache for anonymous GET requests.
+    Logged-in users, query strings and non-200 responses always bypass it,
+    as does everyone when the cache isn't shared between processes.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD') or request.GET
+                or request.user.is_authenticated or not cache_is_shared()):
+            return view_func(request, *args, **kwargs)
+
+        # Tells the cart context processor to leave the badge to the client
+        request.page_cache_active = True
+        # Cached HTML carries no CSRF token, so make sure each guest gets their own cookie
+        get_token(request)
+
+        key = f'page_cache:{get_page_cache_version()}:{request.path}'
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Page-Cache'] = 'HIT'
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming and not response.cookies:
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            cache.set(key, (response.content, response['Content-Type']), PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'MISS'
+        return response
+
+    return _wrapped_view
@@ -0,0 +1,82 @@
+"""
+Monthly recycling and points rollup arithmetic.
+
+Shared by the rollup models' refresh() and rebuild(), so both bucket rows the
+same way: weighed materials by the customer's user, the local month the
+parcel was sent in and the plastic type (MonthlyRecyclingRollup), and point
+transactions by customer and local month (MonthlyPointsRollup). The
+migrations that first populated the tables keep frozen copies.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, DateField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .scheduling import add_months
+
+# ParcelMaterial.values() needed by rollup_totals
+MATERIAL_FIELDS = (
+    'parcel_id',
+    'parcel__user_id',
+    'parcel__date_submitted',
+    'plastic_type_id',
+    'weight_kg',
+    'plastic_type__points_per_kg_basic',
+    'plastic_type__points_per_kg_premium',
+)
+
+
+def month_of(value):
+    """First day of the local month a parcel's date_submitted falls in"""
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def month_bounds(month):
+    """Aware datetimes for the start of month and of the month after it"""
+    year, next_month = add_months(month.year, month.month, 1)
+    return (
+        timezone.make_aware(datetime.datetime.combine(month, datetime.time.min)),
+        timezone.make_aware(datetime.datetime(year, next_month, 1)),
+    )
+
+
+def rollup_totals(materials, premium_user_ids):
+    """
+    {(user_id, month, plastic_type_id): {'kg', 'parcels', 'points'}} for
+    weighed material rows (MATERIAL_FIELDS values). Points are worked out per
+    material the way ParcelMaterial.calculate_points does, at the premium rate
+    for users in premium_user_ids.
+    """
+    totals = defaultdict(lambda: {'kg': Decimal('0'), 'parcels': set(), 'points': 0})
+    for material in materials:
+        user_id = material['parcel__user_id']
+        bucket = totals[(user_id, month_of(material['parcel__date_submitted']), material['plastic_type_id'])]
+        if user_id in premium_user_ids:
+            points_per_kg = material['plastic_type__points_per_kg_premium']
+        else:
+            points_per_kg = material['plastic_type__points_per_kg_basic']
+        bucket['kg'] += material['weight_kg']
+        bucket['parcels'].add(material['parcel_id'])
+        bucket['points'] += int(material['weight_kg'] * points_per_kg)
+    return {key: {**bucket, 'parcels': len(bucket['parcels'])} for key, bucket in totals.items()}
+
+
+def points_rollup_totals(transactions):
+    """
+    PointTransaction rows summed per customer and local month, as
+    {'customer_id', 'month', 'earned', 'redeemed', 'transactions'} values.
+    Earned counts positive transactions and redeemed negative ones (as a
+    positive number), so adjustments either way land in the right column.
+    """
+    return (transactions
+            .annotate(month=TruncMonth('date_created', output_field=DateField()))
+            .values('customer_id', 'month')
+            .annotate(
+                earned=Coalesce(Sum('points', filter=Q(points__gt=0)), Value(0)),
+                redeemed=Coalesce(-Sum('points', filter=Q(points__lt=0)), Value(0)),
+                transactions=Count('pk'),
+            )
+            .order_by('customer_id', 'month'))
@@ -0,0 +1,50 @@
+"""
+Date arithmetic for recurring monthly collections.
+
+A subscription's preferred_delivery_day is a pattern, not a single date: a
+reference of Thursday 25 December 2025 (the 4th Thursday) means "the 4th
+Thursday of every month". These helpers are pure functions so models and
+views can share them.
+"""
+import calendar
+from datetime import date
+
+
+def add_months(year, month, months):
+    """(year, month) shifted by a number of months"""
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def calculate_recurring_date(reference_date, target_year, target_month):
+    """
+    Calculate the recurring date for a given month based on a reference date pattern.
+    
+    For example, if reference_date is the 4th Thursday of December 2025,
+    this will return the 4th Thursday of the target month/year. If the target
+    month has no such occurrence (e.g. a 5th Monday), the last occurrence of
+    that weekday is used instead.
+    """
+    weekday = reference_date.weekday()
+    occurrence = (reference_date.day - 1) // 7  # 0 = 1st, 1 = 2nd, ...
+    first_weekday, days_in_month = calendar.monthrange(target_year, target_month)
+    day = 1 + (weekday - first_weekday) % 7 + occurrence * 7
+    if day > days_in_month:
+        day -= 7
+    return date(target_year, target_month, day)
+
+
+def monthly_collection_dates(reference_date, start_date, months):
+    """
+    Collection dates following reference_date's pattern, on or after both
+    start_date and the reference date itself, for `months` calendar months
+    starting with start_date's month.
+    """
+    first = max(start_date, reference_date)
+    dates = []
+    for offset in range(months):
+        year, month = add_months(start_date.year, start_date.month, offset)
+        collection_date = calculate_recurring_date(reference_date, year, month)
+        if collection_date >= first:
+            dates.append(collection_date)
+    return dates
@@ -1,11 +1,12 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
 from django.contrib.auth.models import User
-from .models import IncomingParcel, Customer, PointTransaction, ParcelStatus
+from .models import IncomingParcel, Customer, PointTransaction, ParcelStatus, ProductReview, ProductRatingSummary, BlogPost, ParcelMaterial, Order, OrderItem, OrderStatus, Product, CustomerRecyclingStats, CollectionSchedule, MonthlyRecyclingRollup, MonthlyPointsRollup
+from .page_cache import invalidate_page_cache, invalidate_dashboard_cache, invalidate_calendar
+from .emails import queue_email
 
 @receiver(post_save, sender=IncomingParcel)
 def award_points_for_parcel(sender, instance, created, **kwargs):
@@ -36,6 +37,7 @@ def award_points_for_parcel(sender, instance, created, **kwargs):
             
             # Mark parcel as awarded (use update to avoid recursion)
             IncomingParcel.objects.filter(pk=instance.pk).update(points_awarded=True)
+            CustomerRecyclingStats.apply_delta(instance.user_id, parcels=1)
             
             # Send email notification about processed parcel
             send_parcel_processed_email(customer, instance)
@@ -50,6 +52,293 @@ def award_points_for_parcel(sender, instance, created, **kwargs):
             print(f"❌ Customer not found for user {instance.user}")
             pass
 
+@receiver(post_save, sender=Customer)
+def sync_reference_prefixes_on_customer_save(sender, instance, created, **kwargs):
+    """Re-prefix the customer's parcels (BIP-/IP-) and orders (BOP-/OP-) when they become or stop being a business"""
+    before = getattr(instance, '_customer_before', None)
+    if before is None:
+        if instance.is_business:
+            instance.sync_reference_prefixes()
+        return  # A new individual customer has nothing business-prefixed yet
+    if before['is_business'] != instance.is_business or before['user_id'] != instance.user_id:
+        instance.sync_reference_prefixes()
+
+SCHEDULE_FIELDS = ('preferred_delivery_day', 'subscription_active', 'subscription_cancelled')
+# Everything the Customer post_save receivers compare against, read in one query
+CUSTOMER_BEFORE_FIELDS = SCHEDULE_FIELDS + ('is_premium', 'is_business', 'user_id')
+
+@receiver(pre_save, sender=Customer)
+def remember_customer_before_save(sender, instance, **kwargs):
+    """Capture the saved row's schedule, tier and owner fields once for the receivers below"""
+    previous = None
+    if instance.pk:
+        previous = Customer.objects.filter(pk=instance.pk).values(*CUSTOMER_BEFORE_FIELDS).first()
+    instance._customer_before = previous
+
+@receiver(post_save, sender=Customer)
+def regenerate_collection_schedule(sender, instance, created, **kwargs):
+    """Rebuild upcoming collection dates when the delivery day or subscription status changes"""
+    previous = getattr(instance, '_customer_before', None)
+    if previous is None:
+        if CollectionSchedule.has_schedule(instance):
+            CollectionSchedule.regenerate([instance])
+        return
+    if any(previous[field] != getattr(instance, field) for field in SCHEDULE_FIELDS):
+        CollectionSchedule.regenerate([instance])
+
+# Everything the IncomingParcel post_save receivers compare against, read in one query
+PARCEL_BEFORE_FIELDS = ('user_id', 'points_awarded', 'date_submitted', 'status')
+
+@receiver(pre_save, sender=IncomingParcel)
+def remember_parcel_before_save(sender, instance, **kwargs):
+    """Capture the saved row's owner, award, sent date and status once for the receivers below"""
+    previous = None
+    if instance.pk:
+        previous = IncomingParcel.objects.filter(pk=instance.pk).values(*PARCEL_BEFORE_FIELDS).first()
+    instance._parcel_before = previous
+
+@receiver(post_save, sender=IncomingParcel)
+def update_recycling_stats_on_parcel_save(sender, instance, **kwargs):
+    """Count newly awarded parcels and move totals if the parcel changes owner"""
+    before = getattr(instance, '_parcel_before', None) or {'user_id': None, 'points_awarded': False}
+    
+    if before['user_id'] == instance.user_id:
+        if before['points_awarded'] != instance.points_awarded:
+            CustomerRecyclingStats.apply_delta(instance.user_id, parcels=1 if instance.points_awarded else -1)
+        return
+    
+    # Reassigned: the parcel's weighed materials move with it
+    from django.db.models import Sum
+    weight = instance.materials.filter(weight_kg__isnull=False).aggregate(total=Sum('weight_kg'))['total'] or 0
+    CustomerRecyclingStats.apply_delta(before['user_id'], parcels=-int(before['points_awarded']), weight_kg=-weight)
+    CustomerRecyclingStats.apply_delta(instance.user_id, parcels=int(instance.points_awarded), weight_kg=weight)
+
+@receiver(post_delete, sender=IncomingParcel)
+def update_recycling_stats_on_parcel_delete(sender, instance, **kwargs):
+    """Stop counting a deleted parcel (its materials are handled by their own signals)"""
+    if instance.points_awarded:
+        CustomerRecyclingStats.apply_delta(instance.user_id, parcels=-1)
+
+# Everything the ParcelMaterial post_save receivers compare against, read in one query
+MATERIAL_BEFORE_FIELDS = ('parcel_id', 'parcel__user_id', 'parcel__date_submitted', 'parcel__status', 'weight_kg')
+
+@receiver(pre_save, sender=ParcelMaterial)
+def remember_material_before_save(sender, instance, **kwargs):
+    """Capture the material's parcel, owner, month, parcel status and weight once for the receivers below"""
+    previous = None
+    if instance.pk:
+        previous = ParcelMaterial.objects.filter(pk=instance.pk).values(*MATERIAL_BEFORE_FIELDS).first()
+    instance._material_before = previous
+
+@receiver(post_save, sender=ParcelMaterial)
+def remember_material_parcel_after_save(sender, instance, **kwargs):
+    """Look up the material's (possibly new) parcel once for the receivers below"""
+    instance._material_parcel = IncomingParcel.objects.filter(pk=instance.parcel_id).values('user_id', 'date_submitted', 'status').first()
+
+@receiver(post_save, sender=ParcelMaterial)
+def update_recycling_stats_on_material_save(sender, instance, **kwargs):
+    """Add the change in verified weight to the owner's stats"""
+    before = getattr(instance, '_material_before', None)
+    user_id = (instance._material_parcel or {}).get('user_id')
+    if before and before['parcel__user_id'] != user_id:
+        CustomerRecyclingStats.apply_delta(before['parcel__user_id'], weight_kg=-(before['weight_kg'] or 0))
+        before = None
+    CustomerRecyclingStats.apply_delta(
+        user_id, weight_kg=(instance.weight_kg or 0) - ((before or {}).get('weight_kg') or 0)
+    )
+
+@receiver(pre_delete, sender=ParcelMaterial)
+def remember_material_parcel_on_delete(sender, instance, **kwargs):
+    """The parcel may be gone by post_delete (cascade), so look up its owner and month now"""
+    instance._material_parcel = IncomingParcel.objects.filter(pk=instance.parcel_id).values('user_id', 'date_submitted', 'status').first()
+
+@receiver(post_delete, sender=ParcelMaterial)
+def update_recycling_stats_on_material_delete(sender, instance, **kwargs):
+    """Remove a deleted material's weight from the owner's stats"""
+    parcel = getattr(instance, '_material_parcel', None) or {}
+    CustomerRecyclingStats.apply_delta(parcel.get('user_id'), weight_kg=-(instance.weight_kg or 0))
+
+@receiver(post_save, sender=IncomingParcel)
+def move_rollup_on_parcel_save(sender, instance, **kwargs):
+    """Re-roll both months if the parcel changed owner or sent date"""
+    before = getattr(instance, '_parcel_before', None)
+    if before is None or (before['user_id'], before['date_submitted']) == (instance.user_id, instance.date_submitted):
+        return  # New parcels have no materials yet
+    MonthlyRecyclingRollup.refresh(before['user_id'], before['date_submitted'])
+    MonthlyRecyclingRollup.refresh(instance.user_id, instance.date_submitted)
+
+@receiver(post_save, sender=ParcelMaterial)
+def refresh_rollup_on_material_save(sender, instance, **kwargs):
+    """Re-roll the material's month (and the one it left, if it moved parcel)"""
+    before = getattr(instance, '_material_before', None)
+    if before and before['parcel_id'] != instance.parcel_id:
+        MonthlyRecyclingRollup.refresh(before['parcel__user_id'], before['parcel__date_submitted'])
+    parcel = instance._material_parcel
+    if parcel:
+        MonthlyRecyclingRollup.refresh(parcel['user_id'], parcel['date_submitted'])
+
+@receiver(post_delete, sender=ParcelMaterial)
+def refresh_rollup_on_material_delete(sender, instance, **kwargs):
+    """Take a deleted material out of its month"""
+    parcel = getattr(instance, '_material_parcel', None)
+    if parcel:
+        MonthlyRecyclingRollup.refresh(parcel['user_id'], parcel['date_submitted'])
+
+@receiver(post_save, sender=Customer)
+def rebuild_rollup_on_premium_change(sender, instance, **kwargs):
+    """Rollup points are at the customer's current rate, so redo them when it changes"""
+    before = getattr(instance, '_customer_before', None)
+    if before is not None and before['is_premium'] != instance.is_premium:
+        MonthlyRecyclingRollup.rebuild(customer_ids=[instance.pk])
+
+@receiver(pre_save, sender=PointTransaction)
+def remember_points_rollup_month(sender, instance, **kwargs):
+    """Capture whose month the transaction was rolled up into before this save"""
+    previous = None
+    if instance.pk:
+        previous = PointTransaction.objects.filter(pk=instance.pk).values('customer_id', 'date_created').first()
+    instance._rollup_month_before = previous
+
+@receiver(post_save, sender=PointTransaction)
+def refresh_points_rollup_on_save(sender, instance, **kwargs):
+    """Re-roll the transaction's month (and the customer it left, if it moved)"""
+    before = getattr(instance, '_rollup_month_before', None)
+    if before and before['customer_id'] != instance.customer_id:
+        MonthlyPointsRollup.refresh(before['customer_id'], before['date_created'])
+    MonthlyPointsRollup.refresh(instance.customer_id, instance.date_created)
+
+@receiver(post_delete, sender=PointTransaction)
+def refresh_points_rollup_on_delete(sender, instance, **kwargs):
+    """Take a deleted transaction out of its month"""
+    MonthlyPointsRollup.refresh(instance.customer_id, instance.date_created)
+
+@receiver(pre_save, sender=ProductReview)
+def remember_review_rating_state(sender, instance, **kwargs):
+    """Capture what the review contributed to its product summary before this save"""
+    previous = None
+    if instance.pk:
+        previous = ProductReview.objects.filter(pk=instance.pk).first()
+    instance._rating_contribution_before = ProductRatingSummary.contribution(previous)
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_summary_on_save(sender, instance, **kwargs):
+    """Apply the review's change (new, edited, approved/unapproved) to the product summary"""
+    before = getattr(instance, '_rating_contribution_before', None)
+    ProductRatingSummary.apply_change(before, ProductRatingSummary.contribution(instance))
+    instance._rating_contribution_before = ProductRatingSummary.contribution(instance)
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted review from the product summary"""
+    ProductRatingSummary.apply_change(ProductRatingSummary.contribution(instance), None)
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item_order(sender, instance, **kwargs):
+    """Capture which order the item belonged to before this save"""
+    previous_order_id = None
+    if instance.pk:
+        previous_order_id = (OrderItem.objects.filter(pk=instance.pk)
+                             .values_list('order_id', flat=True).first())
+    instance._order_id_before = previous_order_id
+
+@receiver(post_save, sender=OrderItem)
+def update_order_totals_on_item_save(sender, instance, **kwargs):
+    """Keep the order's materialized subtotal/item count/shipping flag in step with its items"""
+    if instance.order_id:
+        instance.order.refresh_totals()
+    previous_order_id = getattr(instance, '_order_id_before', None)
+    if previous_order_id and previous_order_id != instance.order_id:
+        for order in Order.objects.filter(pk=previous_order_id):
+            order.refresh_totals()
+    instance._order_id_before = instance.order_id
+
+@receiver(post_delete, sender=OrderItem)
+def update_order_totals_on_item_delete(sender, instance, **kwargs):
+    """Remove a deleted item from its order's totals"""
+    if instance.order_id:
+        try:
+            order = instance.order
+        except Order.DoesNotExist:
+            return
+        order.refresh_totals()
+
+PRICE_FIELDS = ('price', 'sale_price', 'is_on_sale', 'digital')
+
+@receiver(pre_save, sender=Product)
+def remember_product_pricing(sender, instance, **kwargs):
+    """Capture the fields that feed order totals before this save"""
+    previous = None
+    if instance.pk:
+        previous = Product.objects.filter(pk=instance.pk).values(*PRICE_FIELDS).first()
+    instance._pricing_before = previous
+
+@receiver(post_save, sender=Product)
+def update_open_cart_totals_on_price_change(sender, instance, created, **kwargs):
+    """Re-price open carts when a product's price, sale or digital flag changes"""
+    previous = getattr(instance, '_pricing_before', None)
+    if created or previous is None:
+        return
+    if all(previous[field] == getattr(instance, field) for field in PRICE_FIELDS):
+        return
+    # Placed orders keep the totals they were placed with
+    open_orders = Order.objects.filter(
+        status=OrderStatus.POTENTIAL, orderitem__product=instance,
+    ).distinct()
+    for order in open_orders:
+        order.refresh_totals()
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def invalidate_cached_pages(sender, **kwargs):
+    """Blog previews appear on the cached home page"""
+    invalidate_page_cache()
+
+@receiver(post_save, sender=IncomingParcel)
+def invalidate_cached_pages_on_parcel_save(sender, instance, **kwargs):
+    """The cached home and business pages count processed parcels and their weight"""
+    before = getattr(instance, '_parcel_before', None) or {'status': None}
+    if (before['status'] == ParcelStatus.PROCESSED) != (instance.status == ParcelStatus.PROCESSED):
+        invalidate_page_cache()
+
+@receiver(post_delete, sender=IncomingParcel)
+def invalidate_cached_pages_on_parcel_delete(sender, instance, **kwargs):
+    if instance.status == ParcelStatus.PROCESSED:
+        invalidate_page_cache()
+
+@receiver(post_save, sender=ParcelMaterial)
+def invalidate_cached_pages_on_material_save(sender, instance, **kwargs):
+    """Only the weight of processed parcels is shown on cached pages"""
+    before = getattr(instance, '_material_before', None)
+    parcel = instance._material_parcel or {}
+    if before and (before['parcel_id'], before['weight_kg']) == (instance.parcel_id, instance.weight_kg):
+        return
+    if parcel.get('status') == ParcelStatus.PROCESSED or (before and before['parcel__status'] == ParcelStatus.PROCESSED):
+        invalidate_page_cache()
+
+@receiver(post_delete, sender=ParcelMaterial)
+def invalidate_cached_pages_on_material_delete(sender, instance, **kwargs):
+    parcel = getattr(instance, '_material_parcel', None) or {}
+    if parcel.get('status') == ParcelStatus.PROCESSED:
+        invalidate_page_cache()
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=IncomingParcel)
+@receiver(post_delete, sender=IncomingParcel)
+def invalidate_admin_dashboard(sender, **kwargs):
+    """The staff dashboard counts and lists orders and parcels"""
+    invalidate_dashboard_cache()
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=IncomingParcel)
+@receiver(post_delete, sender=IncomingParcel)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_admin_calendar(sender, **kwargs):
+    """Calendar events come from orders, parcels and customers' collection schedules"""
+    invalidate_calendar()
+
 def send_parcel_processed_email(customer, parcel):
     """Send email notification when parcel is processed"""
     subject = f'✅ Parcel {parcel} Processed - {parcel.points_calculated} Points Awarded!'
@@ -75,17 +364,8 @@ Best regards,
 Knightcycle
     """
     
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [customer.email],
-            fail_silently=False,
-        )
-        print(f"   📧 Email sent to {customer.email}")
-    except Exception as e:
-        print(f"   ❌ Failed to send email: {e}")
+    queue_email(subject, message, [customer.email])
+    print(f"   📧 Email queued for {customer.email}")
 
 def check_and_upgrade_to_premium(customer):
     """Check if customer meets premium requirements and upgrade if eligible"""
@@ -167,17 +447,8 @@ Best regards,
 Knightcycle 🌍♻️
     """
     
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [customer.email],
-            fail_silently=False,
-        )
-        print(f"   📧 Premium upgrade email sent to {customer.email}")
-    except Exception as e:
-        print(f"   ❌ Failed to send premium email: {e}")
+    queue_email(subject, message, [customer.email])
+    print(f"   📧 Premium upgrade email queued for {customer.email}")
 
 
 @receiver(post_save, sender=User)
@@ -198,15 +469,10 @@ def send_welcome_email(sender, instance, created, **kwargs):
         html_message = render_to_string('emails/welcome_registration.html', context)
         plain_message = strip_tags(html_message)
         
-        try:
-            send_mail(
-                subject='Welcome to Knightcycle! 🌍',
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[instance.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            print(f"📧 Welcome email sent to {instance.email}")
-        except Exception as e:
-            print(f"❌ Failed to send welcome email: {e}")
\ No newline at end of file
+        queue_email(
+            subject='Welcome to Knightcycle! 🌍',
+            message=plain_message,
+            recipient_list=[instance.email],
+            html_message=html_message,
+        )
+        print(f"📧 Welcome email queued for {instance.email}")
\ No newline at end of file
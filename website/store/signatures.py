@@ -0,0 +1,59 @@
+"""
+WTN signature images.
+
+Signature pads post a full-canvas RGBA PNG as a base64 data URL, which is mostly
+empty space. Before it is stored (see WtnSignature) it is flattened onto white,
+cropped to the ink, scaled down to fit MAX_SIZE and thresholded to a 1-bit PNG,
+which is typically a few hundred bytes.
+"""
+import base64
+import binascii
+import io
+
+from PIL import Image
+
+MAX_SIZE = (600, 200)
+# Grey levels darker than this count as ink
+INK_THRESHOLD = 160
+# White space kept around the cropped ink, in pixels
+PADDING = 4
+DATA_URL_PREFIX = 'data:image/png;base64,'
+
+
+def normalize_signature(data_url):
+    """
+    1-bit PNG bytes for a signature posted as a data URL (or bare base64).
+    Raises ValueError if it isn't an image or has no ink on it.
+    """
+    encoded = data_url.split(',', 1)[1] if data_url.startswith('data:') else data_url
+    try:
+        image = Image.open(io.BytesIO(base64.b64decode(encoded, validate=True)))
+        image.load()
+    except (binascii.Error, OSError, Image.DecompressionBombError) as e:
+        raise ValueError('Signature is not a valid image') from e
+
+    # Flatten transparency onto white so ink is dark whatever the pad produced
+    image = image.convert('RGBA')
+    gray = Image.alpha_composite(Image.new('RGBA', image.size, 'white'), image).convert('L')
+
+    ink = gray.point(lambda value: 255 if value < INK_THRESHOLD else 0).getbbox()
+    if ink is None:
+        raise ValueError('Signature is blank')
+    left, top, right, bottom = ink
+    gray = gray.crop((
+        max(left - PADDING, 0),
+        max(top - PADDING, 0),
+        min(right + PADDING, gray.width),
+        min(bottom + PADDING, gray.height),
+    ))
+    gray.thumbnail(MAX_SIZE)
+
+    mono = gray.point(lambda value: 255 if value >= INK_THRESHOLD else 0, mode='1')
+    buffer = io.BytesIO()
+    mono.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def signature_data_url(image):
+    """Data URL for stored signature bytes, for <img src> and the admin signature pad"""
+    return DATA_URL_PREFIX + base64.b64encode(bytes(image)).decode('ascii')
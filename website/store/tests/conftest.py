@@ -7,6 +7,18 @@ from store.models import Customer, Product, PlasticType
 from decimal import Decimal
 
 
+@pytest.fixture(autouse=True)
+def clear_cache(request):
+    """
+    Keep cached pages from leaking between tests. The cache is a database
+    table, so this only applies to database tests, and clears before each one
+    rather than after (which would fail once a test breaks its transaction).
+    """
+    if request.node.get_closest_marker('django_db'):
+        from django.core.cache import cache
+        cache.clear()
+
+
 @pytest.fixture
 def user(db):
     """Create a test user"""
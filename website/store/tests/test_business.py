@@ -5,6 +5,12 @@ Tests for business customer functionality including:
 - Business settings
 - Business-only access controls
 """
+import gzip
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+
 import pytest
 from django.urls import reverse
 from django.contrib.auth.models import User
@@ -541,6 +547,10 @@ class TestBusinessExports:
         
         return user
     
+    def export(self, client, **params):
+        response = client.get(reverse('store:business_dashboard_export'), params)
+        return response, b''.join(response.streaming_content)
+    
     def test_business_export_requires_login(self, client):
         """Export should require authentication"""
         response = client.get(reverse('store:business_dashboard_export'))
@@ -549,18 +559,88 @@ class TestBusinessExports:
     def test_business_export_generates_csv(self, client, business_user_with_parcels):
         """Should generate CSV file"""
         client.force_login(business_user_with_parcels)
-        response = client.get(reverse('store:business_dashboard_export'))
+        response, body = self.export(client)
         
         assert response.status_code == 200
         assert response['Content-Type'] == 'text/csv'
         assert 'attachment' in response['Content-Disposition']
         
         # Check CSV content
-        content = response.content.decode()
+        content = body.decode()
         assert 'Order ID' in content
         assert 'Status' in content
         assert 'Weight' in content
         assert '5.5' in content or '550' in content
+    
+    def test_export_sums_material_weights(self, client, business_user_with_parcels):
+        """Weight should be the parcel's total across materials, not just the first one"""
+        parcel = IncomingParcel.objects.get(user=business_user_with_parcels)
+        petg = PlasticType.objects.create(name='PETG', points_per_kg_basic=100, points_per_kg_premium=120)
+        ParcelMaterial.objects.create(parcel=parcel, plastic_type=petg, weight_kg=2.25)
+        client.force_login(business_user_with_parcels)
+        
+        _, body = self.export(client)
+        
+        row = body.decode().splitlines()[1].split(',', 5)
+        assert row[5].startswith('7.75')
+        assert 'PLA, PETG' in body.decode()
+    
+    def test_export_query_count_does_not_grow_with_parcels(self, client, business_user_with_parcels, django_assert_max_num_queries):
+        """Materials and plastic types should be prefetched, not queried per parcel"""
+        plastic_type = PlasticType.objects.get(name='PLA')
+        for i in range(30):
+            parcel = IncomingParcel.objects.create(user=business_user_with_parcels, status='received')
+            ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_type, weight_kg=1)
+        client.force_login(business_user_with_parcels)
+        
+        with django_assert_max_num_queries(6):
+            _, body = self.export(client)
+        assert len(body.decode().splitlines()) == 32
+    
+    def test_export_jsonl(self, client, business_user_with_parcels):
+        """JSONL should have one object per parcel with raw values"""
+        client.force_login(business_user_with_parcels)
+        
+        response, body = self.export(client, format='jsonl')
+        
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert len(rows) == 1
+        assert rows[0]['weight_kg'] == 5.5
+        assert rows[0]['points'] == 550
+        assert rows[0]['materials'] == ['PLA']
+    
+    def test_export_xlsx(self, client, business_user_with_parcels):
+        """XLSX should be a workbook whose sheet has a header row and numeric weights"""
+        client.force_login(business_user_with_parcels)
+        
+        response, body = self.export(client, format='xlsx')
+        
+        assert response['Content-Disposition'].endswith('.xlsx"')
+        with zipfile.ZipFile(io.BytesIO(body)) as workbook:
+            assert '[Content_Types].xml' in workbook.namelist()
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        ns = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = sheet.findall('s:sheetData/s:row', ns)
+        assert len(rows) == 2
+        assert rows[0].find('s:c/s:is/s:t', ns).text == 'Order ID'
+        assert float(rows[1].findall('s:c', ns)[5].find('s:v', ns).text) == 5.5
+    
+    def test_export_gzip(self, client, business_user_with_parcels):
+        """gzip=1 should download a .csv.gz of the same CSV"""
+        client.force_login(business_user_with_parcels)
+        
+        response, body = self.export(client, gzip='1')
+        
+        assert response['Content-Type'] == 'application/gzip'
+        assert response['Content-Disposition'].endswith('.csv.gz"')
+        assert gzip.decompress(body).decode().startswith('Order ID,Status')
+    
+    def test_export_rejects_unknown_format(self, client, business_user_with_parcels):
+        """Unknown formats should be a 400, not a CSV"""
+        client.force_login(business_user_with_parcels)
+        response = client.get(reverse('store:business_dashboard_export'), {'format': 'pdf'})
+        assert response.status_code == 400
 
 
 @pytest.mark.django_db
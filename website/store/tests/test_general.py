@@ -189,3 +189,85 @@ class TestHomePage:
         
         # Should have some stats display
         assert 'kg' in content.lower() or 'parcel' in content.lower()
+
+
+# ========== Page Cache ==========
+
+@pytest.mark.django_db
+class TestAnonymousPageCache:
+    """Test the full-page cache used for guest marketing pages"""
+
+    def test_second_guest_request_is_served_from_cache(self, client):
+        """Test a repeat guest visit is a cache hit that only reads the cache"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        url = reverse('about')
+        first = client.get(url)
+        assert first['X-Page-Cache'] == 'MISS'
+
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second['X-Page-Cache'] == 'HIT'
+        assert second.content == first.content
+        # The default cache is a database table; nothing else may be queried
+        assert all('django_cache' in query['sql'] for query in queries.captured_queries)
+
+    def test_per_process_cache_disables_page_cache(self, client, settings):
+        """Test pages are never cached when other processes couldn't invalidate them"""
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        client.get(reverse('about'))
+        assert 'X-Page-Cache' not in client.get(reverse('about'))
+
+    def test_cached_page_leaves_cart_badge_to_client(self, client):
+        """Test the cached HTML does not bake in any guest's cart count"""
+        client.cookies['cart'] = '{"1": {"quantity": 3}}'
+        resp = client.get(reverse('privacy'))
+        assert '<p id="cart-total"></p>' in resp.content.decode()
+
+    def test_logged_in_users_bypass_cache(self, client, user):
+        """Test authenticated requests are always rendered fresh"""
+        client.force_login(user)
+        client.get(reverse('about'))
+        resp = client.get(reverse('about'))
+        assert 'X-Page-Cache' not in resp
+
+    def test_query_string_bypasses_cache(self, client):
+        """Test requests with query parameters are not cached"""
+        resp = client.get(reverse('about'), {'utm_source': 'newsletter'})
+        assert 'X-Page-Cache' not in resp
+
+    def test_blog_post_save_invalidates_cache(self, client, user):
+        """Test publishing a blog post clears cached pages"""
+        from store.models import BlogPost
+        url = reverse('home')
+        client.get(url)
+        assert client.get(url)['X-Page-Cache'] == 'HIT'
+
+        BlogPost.objects.create(
+            title='Fresh Post',
+            slug='fresh-post',
+            content='Fresh content',
+            author=user,
+            published=True
+        )
+        assert client.get(url)['X-Page-Cache'] == 'MISS'
+
+    def test_only_processed_parcel_changes_invalidate_cache(self, client, user, plastic_types):
+        """Test parcels only clear cached pages once they count towards the processed stats"""
+        from store.models import IncomingParcel, ParcelMaterial
+        url = reverse('home')
+        client.get(url)
+
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        material = ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_types['pla'], weight_kg=2)
+        parcel.admin_comment = 'Weighed'
+        parcel.save()
+        assert client.get(url)['X-Page-Cache'] == 'HIT'
+
+        parcel.status = 'processed'
+        parcel.save()
+        assert client.get(url)['X-Page-Cache'] == 'MISS'
+
+        material.weight_kg = 3
+        material.save()
+        assert client.get(url)['X-Page-Cache'] == 'MISS'
@@ -144,3 +144,71 @@ class TestSyncCustomerUserData:
         customer.refresh_from_db()
         assert customer.email == 'noname@example.com'
         # Name stays as-is because user has no name to sync
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+    """Test queued email and the send_outbox worker"""
+    
+    def test_registration_queues_welcome_email_without_sending(self, mailoutbox):
+        """Test creating a user writes an outbox row instead of talking to SMTP"""
+        from store.models import EmailOutbox, EmailStatus
+        User.objects.create_user(username='newbie', email='newbie@example.com', password='pass123')
+        
+        queued = EmailOutbox.objects.get()
+        assert queued.recipients == ['newbie@example.com']
+        assert queued.status == EmailStatus.PENDING
+        assert len(mailoutbox) == 0
+    
+    def test_rolled_back_transaction_discards_email(self):
+        """Test an email queued in a failed transaction is never sent"""
+        from django.db import transaction
+        from store.emails import queue_email
+        from store.models import EmailOutbox
+        
+        with pytest.raises(RuntimeError), transaction.atomic():
+            queue_email('Subject', 'Body', ['someone@example.com'])
+            raise RuntimeError('checkout failed')
+        assert not EmailOutbox.objects.exists()
+    
+    def test_send_outbox_delivers_batch(self, mailoutbox):
+        """Test the worker sends pending emails (with HTML) and marks them sent"""
+        from store.emails import queue_email
+        from store.models import EmailOutbox, EmailStatus
+        queue_email('One', 'Body one', ['a@example.com'], html_message='<p>One</p>')
+        queue_email('Two', 'Body two', ['b@example.com'])
+        
+        out = StringIO()
+        call_command('send_outbox', stdout=out)
+        
+        assert 'Sent 2 email(s)' in out.getvalue()
+        assert sorted(m.subject for m in mailoutbox) == ['One', 'Two']
+        assert mailoutbox[0].alternatives or mailoutbox[1].alternatives
+        assert set(EmailOutbox.objects.values_list('status', flat=True)) == {EmailStatus.SENT}
+    
+    def test_send_outbox_backs_off_then_gives_up(self):
+        """Test failures are retried later and marked failed after max attempts"""
+        from unittest.mock import patch
+        from django.utils import timezone
+        from store.emails import queue_email
+        from store.models import EmailOutbox, EmailStatus
+        email = queue_email('Retry me', 'Body', ['c@example.com'])
+        
+        with patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('SMTP down')):
+            call_command('send_outbox', '--max-attempts', '2', stdout=StringIO())
+            email.refresh_from_db()
+            assert email.status == EmailStatus.PENDING
+            assert email.attempts == 1
+            assert email.last_error == 'SMTP down'
+            assert email.next_attempt_at > timezone.now()
+            
+            # Not due yet, so a second run leaves it alone
+            call_command('send_outbox', '--max-attempts', '2', stdout=StringIO())
+            email.refresh_from_db()
+            assert email.attempts == 1
+            
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+            call_command('send_outbox', '--max-attempts', '2', stdout=StringIO())
+            email.refresh_from_db()
+            assert email.status == EmailStatus.FAILED
+            assert email.attempts == 2
@@ -333,3 +333,123 @@ class TestPointTransactions:
             description='Admin correction'
         )
         assert adjusted.transaction_type == 'ADJUSTED'
+
+
+@pytest.mark.django_db
+class TestPointsHistoryPages:
+    """Test the keyset-paginated points history and its monthly rollup"""
+    
+    def make_transactions(self, customer, amounts):
+        """One transaction per amount, oldest first, all sharing a timestamp, applied to the balance"""
+        from django.utils import timezone
+        
+        transactions = [
+            PointTransaction.objects.create(customer=customer, points=points, transaction_type='EARNED' if points > 0 else 'REDEEMED', description=f'Txn {i}')
+            for i, points in enumerate(amounts)
+        ]
+        PointTransaction.objects.filter(customer=customer).update(date_created=timezone.now())
+        customer.total_points += sum(amounts)
+        customer.save(update_fields=['total_points'])
+        return transactions
+    
+    def test_rollup_tracks_saves_and_deletes(self, user, customer):
+        """Test the month's earned, redeemed and count follow transaction changes"""
+        from store.models import MonthlyPointsRollup
+        
+        earned = PointTransaction.objects.create(customer=customer, points=100, description='Earned')
+        PointTransaction.objects.create(customer=customer, points=-30, transaction_type='REDEEMED', description='Spent')
+        
+        row = MonthlyPointsRollup.objects.get(customer=customer)
+        assert (row.earned, row.redeemed, row.transactions, row.net) == (100, 30, 2, 70)
+        
+        earned.points = 150
+        earned.save()
+        assert MonthlyPointsRollup.objects.get(customer=customer).earned == 150
+        
+        PointTransaction.objects.filter(customer=customer).delete()
+        assert not MonthlyPointsRollup.objects.filter(customer=customer).exists()
+    
+    def test_rebuild_matches_signals(self, user, customer):
+        """Test a rebuild gives the same rows the signals maintained"""
+        from store.models import MonthlyPointsRollup
+        
+        self.make_transactions(customer, [100, -40, 25])
+        MonthlyPointsRollup.rebuild(customer_ids=[customer.pk])
+        
+        assert list(MonthlyPointsRollup.objects.values_list('earned', 'redeemed', 'transactions')) == [(125, 40, 3)]
+    
+    def test_running_balance_across_pages(self, user, customer, django_assert_num_queries):
+        """Test every page shows the balance after each transaction, ties included"""
+        from store.activity import points_page
+        
+        amounts = [100, -40, 25, 10, -5, 60, -20]
+        self.make_transactions(customer, amounts)
+        expected = []
+        balance = 0
+        for points in amounts:
+            balance += points
+            expected.append(balance)
+        expected.reverse()
+        
+        seen = []
+        with django_assert_num_queries(1):
+            page, cursor = points_page(customer, page_size=3)
+        seen.extend(page)
+        while cursor:
+            with django_assert_num_queries(1):
+                page, cursor = points_page(customer, cursor, page_size=3)
+            seen.extend(page)
+        
+        assert [t.balance for t in seen] == expected
+        assert [t.points for t in seen] == list(reversed(amounts))
+    
+    def test_running_balance_starts_from_total_points(self, user, customer):
+        """Test the newest row shows the customer's balance even when older points have no transactions"""
+        from store.activity import points_page
+        
+        customer.total_points = 500  # e.g. awarded before transactions were recorded
+        self.make_transactions(customer, [20, -5])
+        
+        page, _ = points_page(customer)
+        assert [t.balance for t in page] == [515, 520]
+    
+    def test_points_history_view_pages_and_summary(self, client, user, customer):
+        """Test the page links to older transactions and shows the monthly summary"""
+        from store import activity
+        
+        self.make_transactions(customer, [10] * (activity.PAGE_SIZE + 1))
+        client.force_login(user)
+        
+        resp = client.get(reverse('store:points_history'))
+        assert resp.status_code == 200
+        assert len(resp.context['transactions']) == activity.PAGE_SIZE
+        assert resp.context['transactions'][0].balance == 10 * (activity.PAGE_SIZE + 1)
+        assert [row.earned for row in resp.context['monthly']] == [10 * (activity.PAGE_SIZE + 1)]
+        assert 'Monthly Summary' in resp.content.decode()
+        
+        resp = client.get(reverse('store:points_history'), {'after': resp.context['next_cursor']})
+        assert [t.balance for t in resp.context['transactions']] == [10]
+        assert resp.context['next_cursor'] is None
+        
+        assert client.get(reverse('store:points_history'), {'after': 'nonsense'}).status_code == 400
+    
+    def test_points_cursor_is_signed(self, client, user, customer):
+        """Test an edited or another customer's cursor is rejected rather than trusted"""
+        from django.core import signing
+        from store import activity
+        
+        self.make_transactions(customer, [10, 20])
+        transactions = list(PointTransaction.objects.filter(customer=customer).order_by('pk'))
+        client.force_login(user)
+        url = reverse('store:points_history')
+        cursor = activity.encode_points_cursor(customer, transactions[1], 10)
+        assert [t.balance for t in client.get(url, {'after': cursor}).context['transactions']] == [10]
+        
+        # A hand-made cursor claiming a bigger balance
+        forged = signing.dumps([customer.pk, 0, transactions[1].pk, 999999], salt='not-the-cursor-salt')
+        assert client.get(url, {'after': forged}).status_code == 400
+        assert client.get(url, {'after': cursor.replace(':', ':x', 1)}).status_code == 400
+        
+        other = Customer.objects.create(user=User.objects.create_user(username='other', password='pass'), name='Other')
+        other_cursor = activity.encode_points_cursor(other, transactions[1], 999999)
+        assert client.get(url, {'after': other_cursor}).status_code == 400
@@ -61,6 +61,38 @@ class TestIncomingParcel:
         # Should return format like "IP-1"
         assert 'IP' in str_repr and str(parcel.pk) in str_repr
     
+    def test_business_parcels_get_bip_prefix_without_queries(self, user, customer, django_assert_num_queries):
+        """Test the stored prefix follows the customer and __str__ never queries"""
+        customer.is_business = True
+        customer.save()
+        parcels = [IncomingParcel.objects.create(user=user, address=f'{i} Test St') for i in range(3)]
+        
+        loaded = list(IncomingParcel.objects.filter(user=user).order_by('pk'))
+        with django_assert_num_queries(0):
+            assert [str(p) for p in loaded] == [f'BIP-{p.pk}' for p in parcels]
+    
+    def test_customer_type_change_bulk_updates_prefix(self, user, customer):
+        """Test converting a customer re-prefixes their existing parcels"""
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        assert parcel.parcel_number == f'IP-{parcel.pk}'
+        
+        customer.is_business = True
+        customer.save(update_fields=['is_business'])
+        parcel.refresh_from_db()
+        assert parcel.parcel_number == f'BIP-{parcel.pk}'
+    
+    def test_moving_parcel_to_another_customer_updates_prefix(self, user, customer):
+        """Test reassigning a parcel re-prefixes it for its new owner"""
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        business_user = User.objects.create_user(username='business', password='pass')
+        Customer.objects.create(user=business_user, name='Business', email='b@example.com', is_business=True)
+        
+        parcel = IncomingParcel.objects.get(pk=parcel.pk)
+        parcel.user = business_user
+        parcel.save(update_fields=['user'])
+        parcel.refresh_from_db()
+        assert parcel.parcel_number == f'BIP-{parcel.pk}'
+    
     def test_parcel_without_details(self, user):
         """Test parcels can be created with minimal info"""
         parcel = IncomingParcel.objects.create(
@@ -195,6 +227,192 @@ class TestParcelPoints:
         assert customer.total_points >= 1000  # 10kg * 100 points/kg
 
 
+@pytest.mark.django_db
+class TestCustomerRecyclingStats:
+    """Test the denormalized parcel count/verified weight behind premium progress"""
+    
+    def make_parcel(self, user, plastic_types, *weights):
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        for weight in weights:
+            ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_types['pla'], weight_kg=Decimal(weight))
+        return parcel
+    
+    def test_weight_follows_material_writes(self, user, customer, plastic_types):
+        """Test weighing, re-weighing and deleting materials adjust verified weight"""
+        parcel = self.make_parcel(user, plastic_types, '1.500', '2.000')
+        assert customer.get_verified_weight() == 3.5
+        
+        material = parcel.materials.first()
+        material.weight_kg = Decimal('0.500')
+        material.save()
+        parcel.materials.last().delete()
+        customer.refresh_from_db()
+        assert customer.get_verified_weight() == 0.5
+    
+    def test_awarded_parcels_are_counted(self, user, customer, plastic_types):
+        """Test processing a parcel bumps the parcel count once"""
+        parcel = self.make_parcel(user, plastic_types, '1.000')
+        assert customer.get_parcel_count() == 0
+        
+        parcel.points_calculated = 100
+        parcel.status = ParcelStatus.PROCESSED
+        parcel.save()
+        parcel.save()
+        customer.refresh_from_db()
+        assert customer.get_parcel_count() == 1
+        
+        IncomingParcel.objects.get(pk=parcel.pk).delete()
+        customer.refresh_from_db()
+        assert customer.get_parcel_count() == 0
+        assert customer.get_verified_weight() == 0
+    
+    def test_premium_progress_is_one_query(self, user, customer, plastic_types, django_assert_num_queries):
+        """Test the profile's premium figures come from a single stats row"""
+        self.make_parcel(user, plastic_types, '5.000')
+        customer = Customer.objects.get(pk=customer.pk)
+        
+        with django_assert_num_queries(1):
+            assert customer.get_parcel_count() == 0
+            assert customer.get_verified_weight() == 5.0
+            assert customer.get_premium_progress() == 20.0
+    
+    def test_rebuild_command_repairs_drift(self, user, customer, plastic_types):
+        """Test rebuild_recycling_stats recomputes from parcels and materials"""
+        from io import StringIO
+        from django.core.management import call_command
+        from store.models import CustomerRecyclingStats
+        
+        parcel = self.make_parcel(user, plastic_types, '2.000')
+        ParcelMaterial.objects.filter(parcel=parcel).update(weight_kg=Decimal('7.000'))  # bypasses signals
+        assert CustomerRecyclingStats.objects.get(customer=customer).verified_weight_kg == Decimal('2.000')
+        
+        out = StringIO()
+        call_command('rebuild_recycling_stats', stdout=out)
+        assert 'Rebuilt recycling stats for 1 customer(s)' in out.getvalue()
+        assert CustomerRecyclingStats.objects.get(customer=customer).verified_weight_kg == Decimal('7.000')
+
+
+@pytest.mark.django_db
+class TestMonthlyRecyclingRollup:
+    """Test the per-month, per-plastic rollup behind the business dashboard"""
+    
+    def make_parcel(self, user, sent, *materials):
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St', date_submitted=sent)
+        for plastic_type, weight in materials:
+            ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_type, weight_kg=Decimal(weight))
+        return parcel
+    
+    def rollup(self, customer):
+        from store.models import MonthlyRecyclingRollup
+        return {
+            (row.month.strftime('%Y-%m'), row.plastic_type.name): (row.kg, row.parcels, row.points)
+            for row in MonthlyRecyclingRollup.objects.filter(customer=customer)
+        }
+    
+    def sent(self, year, month, day=15):
+        from django.utils import timezone
+        import datetime
+        return timezone.make_aware(datetime.datetime(year, month, day, 12))
+    
+    def test_materials_roll_up_by_month_and_plastic(self, user, customer, plastic_types):
+        """Test weighing materials fills kg, parcel counts and points per month and plastic"""
+        pla, petg = plastic_types['pla'], plastic_types['petg']
+        self.make_parcel(user, self.sent(2026, 1), (pla, '1.500'), (petg, '0.500'))
+        self.make_parcel(user, self.sent(2026, 1, 20), (pla, '2.000'))
+        self.make_parcel(user, self.sent(2026, 2), (pla, '1.000'))
+        
+        assert self.rollup(customer) == {
+            ('2026-01', 'PLA'): (Decimal('3.500'), 2, 350),
+            ('2026-01', 'PETG'): (Decimal('0.500'), 1, 100),
+            ('2026-02', 'PLA'): (Decimal('1.000'), 1, 100),
+        }
+    
+    def test_rollup_follows_reweighing_moves_and_deletes(self, user, customer, plastic_types):
+        """Test re-weighing, moving a parcel to another month and deleting keep the rollup exact"""
+        parcel = self.make_parcel(user, self.sent(2026, 3), (plastic_types['pla'], '1.000'))
+        
+        material = parcel.materials.get()
+        material.weight_kg = Decimal('4.000')
+        material.save()
+        assert self.rollup(customer) == {('2026-03', 'PLA'): (Decimal('4.000'), 1, 400)}
+        
+        parcel.date_submitted = self.sent(2026, 4)
+        parcel.save()
+        assert self.rollup(customer) == {('2026-04', 'PLA'): (Decimal('4.000'), 1, 400)}
+        
+        IncomingParcel.objects.get(pk=parcel.pk).delete()
+        assert self.rollup(customer) == {}
+    
+    def test_refresh_upserts_rows_in_place(self, user, customer, plastic_types):
+        """Test a refresh updates existing rows and drops only plastics no longer in the month"""
+        from store.models import MonthlyRecyclingRollup
+        parcel = self.make_parcel(user, self.sent(2026, 6), (plastic_types['pla'], '1.000'), (plastic_types['petg'], '1.000'))
+        pla_row = MonthlyRecyclingRollup.objects.get(customer=customer, plastic_type=plastic_types['pla'])
+        
+        # Overlapping refreshes of the same month just rewrite the same rows
+        MonthlyRecyclingRollup.refresh(user.pk, parcel.date_submitted)
+        MonthlyRecyclingRollup.refresh(user.pk, parcel.date_submitted)
+        assert MonthlyRecyclingRollup.objects.get(customer=customer, plastic_type=plastic_types['pla']).pk == pla_row.pk
+        
+        parcel.materials.get(plastic_type=plastic_types['petg']).delete()
+        assert self.rollup(customer) == {('2026-06', 'PLA'): (Decimal('1.000'), 1, 100)}
+        assert MonthlyRecyclingRollup.objects.get(customer=customer).pk == pla_row.pk
+    
+    def test_saves_read_the_previous_row_once(self, user, customer, plastic_types):
+        """Test the stats and rollup receivers share one pre_save SELECT per parcel and customer save"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        parcel = self.make_parcel(user, self.sent(2026, 7), (plastic_types['pla'], '1.000'))
+        
+        def selects_of(table, action):
+            with CaptureQueriesContext(connection) as queries:
+                action()
+            return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+        
+        assert len(selects_of('store_incomingparcel', parcel.save)) == 1
+        assert len(selects_of('store_customer', customer.save)) == 1
+    
+    def test_points_follow_premium_status(self, user, customer, plastic_types):
+        """Test becoming premium re-rolls points at the premium rate"""
+        self.make_parcel(user, self.sent(2026, 5), (plastic_types['pla'], '1.000'))
+        
+        customer.is_premium = True
+        customer.save()
+        assert self.rollup(customer) == {('2026-05', 'PLA'): (Decimal('1.000'), 1, 120)}
+    
+    def test_dashboard_reads_rollup(self, client, user, customer, plastic_types):
+        """Test the business dashboard's totals and charts come from the rollup"""
+        import json
+        customer.is_business = True
+        customer.save()
+        self.make_parcel(user, self.sent(2026, 1), (plastic_types['pla'], '2.000'), (plastic_types['petg'], '1.000'))
+        self.make_parcel(user, self.sent(2026, 2), (plastic_types['pla'], '0.500'))
+        client.force_login(user)
+        
+        response = client.get(reverse('store:business_dashboard'))
+        
+        assert response.context['total_weight'] == 3.5
+        assert response.context['filament_produced'] == 2.8
+        assert json.loads(response.context['chart_labels']) == ['Jan 2026', 'Feb 2026']
+        assert json.loads(response.context['chart_data']) == [3.0, 0.5]
+        assert json.loads(response.context['plastic_labels']) == ['PLA', 'PETG']
+        assert json.loads(response.context['plastic_chart_data']) == [2.5, 1.0]
+    
+    def test_rebuild_command_repairs_drift(self, user, customer, plastic_types):
+        """Test rebuild_recycling_rollup recomputes from materials"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        parcel = self.make_parcel(user, self.sent(2026, 6), (plastic_types['pla'], '2.000'))
+        ParcelMaterial.objects.filter(parcel=parcel).update(weight_kg=Decimal('7.000'))  # bypasses signals
+        assert self.rollup(customer)[('2026-06', 'PLA')][0] == Decimal('2.000')
+        
+        out = StringIO()
+        call_command('rebuild_recycling_rollup', stdout=out)
+        assert 'Rebuilt 1 monthly rollup row(s)' in out.getvalue()
+        assert self.rollup(customer) == {('2026-06', 'PLA'): (Decimal('7.000'), 1, 700)}
+
+
 @pytest.mark.django_db
 class TestPlasticTypes:
     """Test plastic type management"""
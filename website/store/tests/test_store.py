@@ -4,7 +4,7 @@ Tests for store functionality: products, cart, checkout, orders.
 import pytest
 from django.urls import reverse
 from django.contrib.auth.models import User
-from store.models import Customer, Product, Order, OrderItem, ShippingAddress
+from store.models import Customer, Product, Order, OrderItem, ShippingAddress, ProductReview, ProductRatingSummary
 from decimal import Decimal
 
 
@@ -69,6 +69,151 @@ class TestProducts:
         assert 'Product 1' in results.first().name
 
 
+# ========== Review Summary Tests ==========
+
+def make_reviewer(username):
+    """Create a customer that can leave a review"""
+    user = User.objects.create_user(username=username, password='pass123')
+    return Customer.objects.create(user=user, name=username, email=f'{username}@example.com')
+
+
+@pytest.mark.django_db
+class TestProductRatingSummary:
+    """Test denormalized review aggregates on products"""
+    
+    def test_product_without_reviews_has_empty_summary(self, product):
+        """Test products with no reviews report zero without a summary row"""
+        assert product.review_count == 0
+        assert product.average_rating == 0
+        assert product.has_review_photos is False
+    
+    def test_summary_tracks_new_reviews(self, product):
+        """Test creating approved reviews updates count and average"""
+        ProductReview.objects.create(product=product, customer=make_reviewer('r1'), rating=5, display_name='R1')
+        ProductReview.objects.create(product=product, customer=make_reviewer('r2'), rating=4, display_name='R2')
+        
+        product = Product.objects.get(pk=product.pk)
+        assert product.review_count == 2
+        assert product.average_rating == 4.5
+        assert product.get_star_display() == '★★★★☆'
+    
+    def test_summary_tracks_approval_and_delete(self, product):
+        """Test unapproving and deleting reviews removes them from the summary"""
+        review = ProductReview.objects.create(product=product, customer=make_reviewer('r1'), rating=2, display_name='R1')
+        ProductReview.objects.create(product=product, customer=make_reviewer('r2'), rating=4, display_name='R2')
+        
+        review.is_approved = False
+        review.save()
+        summary = ProductRatingSummary.objects.get(product=product)
+        assert (summary.review_count, summary.rating_sum) == (1, 4)
+        
+        review.is_approved = True
+        review.save()
+        review.delete()
+        summary.refresh_from_db()
+        assert (summary.review_count, summary.rating_sum) == (1, 4)
+    
+    def test_summary_tracks_review_photos(self, product):
+        """Test the photo flag follows approved reviews with images"""
+        review = ProductReview.objects.create(
+            product=product, customer=make_reviewer('r1'), rating=5, display_name='R1',
+            image1='reviews/2025/11/photo.jpg',
+        )
+        assert Product.objects.get(pk=product.pk).has_review_photos is True
+        
+        review.image1 = ''
+        review.save()
+        assert Product.objects.get(pk=product.pk).has_review_photos is False
+    
+    def test_deleting_product_with_reviews(self, product):
+        """Test cascading deletes don't recreate the summary"""
+        ProductReview.objects.create(product=product, customer=make_reviewer('r1'), rating=5, display_name='R1')
+        product.delete()
+        assert not ProductRatingSummary.objects.exists()
+    
+    def test_rebuild_command_fixes_drift(self, product):
+        """Test rebuild_product_ratings recomputes summaries from reviews"""
+        from django.core.management import call_command
+        from io import StringIO
+        
+        ProductReview.objects.create(product=product, customer=make_reviewer('r1'), rating=3, display_name='R1')
+        # Bulk updates bypass signals, so the summary drifts
+        ProductReview.objects.update(rating=5)
+        
+        out = StringIO()
+        call_command('rebuild_product_ratings', stdout=out)
+        
+        summary = ProductRatingSummary.objects.get(product=product)
+        assert summary.rating_sum == 5
+        assert 'Rebuilt rating summaries for 1 product(s)' in out.getvalue()
+    
+    def test_store_page_reads_ratings_without_per_product_queries(self, client, products, django_assert_max_num_queries):
+        """Test the store listing doesn't query reviews per product"""
+        for i, product in enumerate(products):
+            ProductReview.objects.create(product=product, customer=make_reviewer(f'r{i}'), rating=4, display_name='R')
+        
+        with django_assert_max_num_queries(3):
+            resp = client.get(reverse('store:store'))
+        assert resp.status_code == 200
+        assert '1 review' in resp.content.decode()
+
+
+@pytest.mark.django_db
+class TestProductListingQueryset:
+    """Test Product.objects.for_listing() annotations"""
+    
+    def test_for_listing_annotations_match_properties(self, product):
+        """Test annotated values agree with the per-instance properties"""
+        product.is_on_sale = True
+        product.sale_price = Decimal('7.50')
+        product.stock_quantity = 3
+        product.save()
+        ProductReview.objects.create(product=product, customer=make_reviewer('r1'), rating=5, display_name='R1')
+        ProductReview.objects.create(product=product, customer=make_reviewer('r2'), rating=4, display_name='R2')
+        ProductReview.objects.create(product=product, customer=make_reviewer('r3'), rating=4, display_name='R3')
+        
+        listed = Product.objects.for_listing().get(pk=product.pk)
+        plain = Product.objects.get(pk=product.pk)
+        
+        assert listed.current_price == plain.current_price == Decimal('7.50')
+        assert listed.stock_status_class == plain.stock_status_class == 'low-stock'
+        assert listed.review_count == plain.review_count == 3
+        assert listed.average_rating == plain.average_rating == 4.3
+        assert listed.has_review_photos is plain.has_review_photos is False
+    
+    def test_for_listing_without_reviews(self, product):
+        """Test products with no summary row get zero ratings"""
+        listed = Product.objects.for_listing().get(pk=product.pk)
+        assert listed.review_count == 0
+        assert listed.average_rating == 0
+        assert listed.stock_status == 'In Stock'
+    
+    def test_store_listing_query_count_is_constant(self, client):
+        """Test listing 500 products costs the same queries as listing 5"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def make_products(start, count):
+            Product.objects.bulk_create([
+                Product(name=f'Spool {i}', slug=f'spool-{i}', price=Decimal('20.00'), stock_quantity=i % 7)
+                for i in range(start, start + count)
+            ])
+        
+        make_products(0, 5)
+        ProductReview.objects.create(
+            product=Product.objects.first(), customer=make_reviewer('r1'), rating=5, display_name='R1'
+        )
+        with CaptureQueriesContext(connection) as small:
+            assert client.get(reverse('store:store')).status_code == 200
+        
+        make_products(5, 495)
+        with CaptureQueriesContext(connection) as large:
+            resp = client.get(reverse('store:store'))
+        assert resp.status_code == 200
+        assert resp.content.decode().count('product-name') == 500
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+
 # ========== Cart Tests ==========
 
 @pytest.mark.django_db
@@ -118,6 +263,206 @@ class TestCart:
         assert resp.status_code in [200, 302]
 
 
+@pytest.mark.django_db
+class TestStockReservations:
+    """Test cart stock reservations used by update_item"""
+    
+    def add_to_cart(self, client, product, quantity, action='add'):
+        import json
+        return client.post(reverse('store:update_item'), data=json.dumps(
+            {'productId': product.id, 'action': action, 'quantity': quantity}
+        ), content_type='application/json')
+    
+    def other_shopper(self, client_class, username):
+        other = User.objects.create_user(username=username, password='pass')
+        other_client = client_class()
+        other_client.force_login(other)
+        return other_client
+    
+    def test_adding_to_cart_reserves_stock(self, client, user, customer, product):
+        """Test an add creates a reservation and lowers available stock"""
+        from store.models import StockReservation
+        client.force_login(user)
+        
+        assert self.add_to_cart(client, product, 4).status_code == 200
+        reservation = StockReservation.objects.get(product=product)
+        assert reservation.quantity == 4
+        assert product.available_stock() == 6
+        assert product.available_stock(exclude_order=reservation.order) == 10
+    
+    def test_other_carts_cannot_take_reserved_stock(self, client, user, customer, product):
+        """Test a second shopper only sees what's left after live reservations"""
+        from django.test import Client
+        client.force_login(user)
+        self.add_to_cart(client, product, 8)
+        
+        other_client = self.other_shopper(Client, 'othershopper')
+        resp = self.add_to_cart(other_client, product, 3)
+        assert resp.status_code == 400
+        assert resp.json()['error'] == 'Only 2 items available'
+        assert self.add_to_cart(other_client, product, 2).status_code == 200
+    
+    def test_expired_reservations_free_stock(self, client, user, customer, product):
+        """Test expired holds are ignored and swept by the release command"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.test import Client
+        from django.utils import timezone
+        from store.models import StockReservation
+        client.force_login(user)
+        self.add_to_cart(client, product, 10)
+        StockReservation.objects.update(expires_at=timezone.now())
+        
+        other_client = self.other_shopper(Client, 'lateshopper')
+        assert self.add_to_cart(other_client, product, 5).status_code == 200
+        
+        out = StringIO()
+        call_command('release_expired_reservations', stdout=out)
+        assert 'Released 1 expired stock reservation(s)' in out.getvalue()
+        assert StockReservation.objects.get().quantity == 5
+    
+    def test_removing_items_releases_reservation(self, client, user, customer, product):
+        """Test remove/set adjust or drop the reservation"""
+        from store.models import StockReservation
+        client.force_login(user)
+        self.add_to_cart(client, product, 5)
+        
+        self.add_to_cart(client, product, 2, action='remove')
+        assert StockReservation.objects.get(product=product).quantity == 3
+        self.add_to_cart(client, product, 0, action='set')
+        assert not StockReservation.objects.exists()
+    
+    def test_checkout_converts_reservations_to_deductions(self, client, user, customer, product):
+        """Test processOrder takes the stock and drops the cart's reservations"""
+        import json
+        from store.models import StockReservation
+        client.force_login(user)
+        self.add_to_cart(client, product, 3)
+        
+        payload = {
+            'form': {'total': '30.00'},
+            'shipping': {'address': '1 Test St', 'city': 'Testville', 'county': 'Testshire',
+                         'postcode': 'TE1 1ST', 'country': 'UK'},
+        }
+        resp = client.post(reverse('store:process_order'), data=json.dumps(payload),
+                           content_type='application/json')
+        assert resp.status_code == 200
+        product.refresh_from_db()
+        assert product.stock_quantity == 7
+        assert not StockReservation.objects.exists()
+
+
+@pytest.mark.django_db
+class TestRequestCart:
+    """Test the lazy request-scoped cart behind the header badge"""
+    
+    def test_badge_count_for_logged_in_user(self, client, user, customer, products):
+        """Test the badge shows the potential order's item count"""
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=products[0], quantity=2)
+        OrderItem.objects.create(order=order, product=products[1], quantity=1)
+        client.force_login(user)
+        
+        resp = client.get(reverse('about'))
+        assert '<p id="cart-total">3</p>' in resp.content.decode()
+    
+    def test_item_count_is_one_query_without_loading_items(self, rf, user, customer, product, django_assert_num_queries):
+        """Test the badge count is a single query and doesn't build the full cart"""
+        from store.utils import get_request_cart
+        
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=product, quantity=4)
+        request = rf.get('/')
+        request.user = user
+        
+        cart = get_request_cart(request)
+        with django_assert_num_queries(1):
+            assert cart.item_count == 4
+            assert get_request_cart(request).item_count == 4
+        assert cart._data is None
+    
+    def test_guest_item_count_skips_unavailable_products(self, rf, product, django_assert_num_queries):
+        """Test guests' badge count only counts products still for sale, in one query shared with the cart"""
+        from django.contrib.auth.models import AnonymousUser
+        from store.utils import get_request_cart
+        
+        retired = Product.objects.create(name='Retired', slug='retired', price=Decimal('1.00'), is_active=False)
+        request = rf.get('/')
+        request.user = AnonymousUser()
+        request.COOKIES['cart'] = '{"%d": {"quantity": 5}, "%d": {"quantity": 2}, "999999": {"quantity": 1}}' % (product.id, retired.id)
+        
+        with django_assert_num_queries(1):
+            assert get_request_cart(request).item_count == 5
+            assert [item['id'] for item in get_request_cart(request).items] == [product.id]
+    
+    def test_update_item_creates_missing_customer(self, client, user, product):
+        """Test adding to cart works for users without a Customer yet"""
+        client.force_login(user)
+        resp = client.post(
+            reverse('store:update_item'),
+            {'productId': product.id, 'action': 'add'},
+            content_type='application/json',
+        )
+        assert resp.status_code == 200
+        assert Customer.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+class TestGuestCookieCart:
+    """Test parsing guest carts from the cart cookie"""
+    
+    def make_request(self, cart):
+        import json
+        from django.test import RequestFactory
+        request = RequestFactory().get('/')
+        request.COOKIES['cart'] = cart if isinstance(cart, str) else json.dumps(cart)
+        return request
+    
+    def test_cookie_cart_loads_products_in_one_query(self, django_assert_num_queries):
+        """Test a 30-line guest cart costs a single product query"""
+        from store.utils import cookieCart
+        
+        Product.objects.bulk_create([
+            Product(name=f'Spool {i}', slug=f'spool-{i}', price=Decimal('2.00'), stock_quantity=10)
+            for i in range(30)
+        ])
+        request = self.make_request({str(p.id): {'quantity': 2} for p in Product.objects.all()})
+        
+        with django_assert_num_queries(1):
+            data = cookieCart(request)
+            # Second call in the same request comes from the cache
+            assert cookieCart(request) is data
+        
+        assert data['cartItems'] == 60
+        assert data['order']['get_cart_total'] == Decimal('120.00')
+        assert len(data['items']) == 30
+        assert data['needs_shipping'] is True
+    
+    def test_cookie_cart_drops_invalid_lines(self, product):
+        """Test malformed lines and missing products are ignored"""
+        from store.utils import cookieCart
+        
+        request = self.make_request({
+            str(product.id): {'quantity': 3},
+            'abc': {'quantity': 1},
+            '999999': {'quantity': 1},
+            '5': {'quantity': -2},
+            '6': 'not-a-dict',
+        })
+        data = cookieCart(request)
+        assert data['cartItems'] == 3
+        assert [item['id'] for item in data['items']] == [product.id]
+    
+    @pytest.mark.parametrize('raw', ['not json', '[1, 2]', '"cart"', ''])
+    def test_cookie_cart_malformed_cookie_is_empty(self, raw):
+        """Test unparseable cookies give an empty cart"""
+        from store.utils import cookieCart
+        
+        data = cookieCart(self.make_request(raw))
+        assert data['cartItems'] == 0
+        assert data['items'] == []
+
+
 # ========== Order Tests ==========
 
 @pytest.mark.django_db
@@ -133,6 +478,52 @@ class TestOrders:
         # Order __str__ returns 'OP-{id}' format
         assert str(order) == f'OP-{order.id}'
     
+    def test_order_reference_is_stored_and_follows_customer_type(self, user, customer):
+        """Test the reference is persisted and re-prefixed when the customer converts"""
+        order = Order.objects.create(customer=customer, status='Order Received')
+        assert Order.objects.filter(reference=f'OP-{order.id}').exists()
+        
+        customer.is_business = True
+        customer.save()
+        order.refresh_from_db()
+        assert order.order_number == f'BOP-{order.id}'
+    
+    def test_customer_save_only_reprefixes_when_type_changes(self, user, customer):
+        """Test ordinary customer saves (e.g. points awards) skip the re-prefix UPDATEs"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Order.objects.create(customer=customer, status='Order Received')
+        
+        customer.total_points += 10
+        with CaptureQueriesContext(connection) as queries:
+            customer.save()
+        assert not [q for q in queries if q['sql'].startswith('UPDATE "store_order"')]
+        
+        customer.is_business = True
+        with CaptureQueriesContext(connection) as queries:
+            customer.save()
+        assert [q for q in queries if q['sql'].startswith('UPDATE "store_order"')]
+    
+    def test_order_number_needs_no_customer_query(self, user, customer, django_assert_num_queries):
+        """Test listing orders doesn't fetch each order's customer"""
+        for _ in range(3):
+            Order.objects.create(customer=customer, status='Order Received')
+        orders = list(Order.objects.all())
+        with django_assert_num_queries(0):
+            assert [o.order_number for o in orders] == [f'OP-{o.id}' for o in orders]
+    
+    def test_admin_search_by_reference(self, client, staff_user, customer):
+        """Test searching the order admin for BOP-/OP- references matches exactly"""
+        first = Order.objects.create(customer=customer, status='Order Received')
+        second = Order.objects.create(customer=customer, status='Order Received')
+        client.force_login(staff_user)
+        
+        resp = client.get('/admin/store/order/', {'q': f'op-{second.id}'})
+        assert resp.status_code == 200
+        results = list(resp.context['cl'].queryset)
+        assert results == [second]
+        assert first not in results
+    
     def test_order_date_ordered_auto_set(self, user, customer):
         """Test that date_ordered is set automatically"""
         order = Order.objects.create(
@@ -199,6 +590,89 @@ class TestOrders:
         assert orders.count() >= 2
 
 
+@pytest.mark.django_db
+class TestOrderActivityFeed:
+    """Test the orders page's merged, keyset-paginated activity feed"""
+    
+    def make_activity(self, user, customer, count):
+        """count orders and count parcels sharing count timestamps, oldest first"""
+        from django.utils import timezone
+        from store.models import IncomingParcel
+        
+        start = timezone.now() - timezone.timedelta(days=count)
+        for day in range(count):
+            order = Order.objects.create(customer=customer, status='Order Received')
+            Order.objects.filter(pk=order.pk).update(date_ordered=start + timezone.timedelta(days=day))
+            IncomingParcel.objects.create(user=user, date_submitted=start + timezone.timedelta(days=day))
+    
+    def test_first_page_is_one_query(self, user, customer, django_assert_num_queries):
+        """Test a page of orders and parcels is read with a single query"""
+        from store.activity import activity_page
+        
+        self.make_activity(user, customer, 5)
+        with django_assert_num_queries(1):
+            entries, next_cursor = activity_page(user, customer, page_size=4)
+        assert len(entries) == 4
+        assert next_cursor is not None
+    
+    def test_pages_cover_every_entry_once_in_order(self, user, customer):
+        """Test walking the cursors visits every entry once, newest first, ties included"""
+        from store.activity import activity_page
+        
+        self.make_activity(user, customer, 5)
+        seen = []
+        cursor = None
+        while True:
+            entries, cursor = activity_page(user, customer, cursor, page_size=3)
+            seen.extend(entries)
+            if cursor is None:
+                break
+        
+        assert len(seen) == 10
+        assert len({(e['type'], e['pk']) for e in seen}) == 10
+        dates = [e['date'] for e in seen]
+        assert dates == sorted(dates, reverse=True)
+    
+    def test_entries_carry_reference_status_and_totals(self, user, customer, product, plastic_types):
+        """Test references, display statuses, order totals and parcel weights come annotated"""
+        from store.activity import activity_page
+        from store.models import IncomingParcel, ParcelMaterial
+        
+        order = Order.objects.create(customer=customer, status='Shipped', tracking_number='TRK1')
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        parcel = IncomingParcel.objects.create(user=user)
+        ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_types['pla'], weight_kg=Decimal('1.500'))
+        ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_types['petg'], weight_kg=Decimal('0.250'))
+        
+        entries, _ = activity_page(user, customer)
+        by_type = {e['type']: e for e in entries}
+        order.refresh_from_db()
+        assert by_type['order']['reference'] == order.order_number
+        assert by_type['order']['total'] == order.get_cart_total
+        assert by_type['order']['tracking'] == 'TRK1'
+        assert by_type['parcel']['reference'] == str(parcel)
+        assert by_type['parcel']['status'] == 'Awaiting Parcel'
+        assert by_type['parcel']['weight'] == Decimal('1.75')
+    
+    def test_orders_view_paginates(self, client, user, customer):
+        """Test the orders page links to the next page and rejects bad cursors"""
+        from store import activity
+        
+        self.make_activity(user, customer, activity.PAGE_SIZE)
+        client.force_login(user)
+        
+        resp = client.get(reverse('store:orders'))
+        assert resp.status_code == 200
+        assert len(resp.context['entries']) == activity.PAGE_SIZE
+        assert f"?after={resp.context['next_cursor']}" in resp.content.decode()
+        
+        resp = client.get(reverse('store:orders'), {'after': resp.context['next_cursor']})
+        assert len(resp.context['entries']) == activity.PAGE_SIZE
+        assert resp.context['next_cursor'] is None
+        
+        assert client.get(reverse('store:orders'), {'after': 'nonsense'}).status_code == 400
+
+
 # ========== Order Calculations Tests ==========
 
 @pytest.mark.django_db
@@ -309,6 +783,96 @@ class TestOrderCalculations:
 
 # ========== Shipping Tests ==========
 
+@pytest.mark.django_db
+class TestOrderMaterializedTotals:
+    """Test the stored subtotal/item_count/requires_shipping columns on Order"""
+    
+    def test_totals_follow_item_writes(self, customer, products):
+        """Test adding, editing and deleting items keeps the stored totals current"""
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        first = OrderItem.objects.create(order=order, product=products[0], quantity=2)
+        OrderItem.objects.create(order=order, product=products[1], quantity=1)
+        
+        order.refresh_from_db()
+        assert order.subtotal == Decimal('20.00')
+        assert order.item_count == 3
+        assert order.requires_shipping is True
+        
+        first.quantity = 4
+        first.save()
+        first.delete()
+        order.refresh_from_db()
+        assert order.subtotal == Decimal('10.00')
+        assert order.item_count == 1
+    
+    def test_cart_properties_read_stored_columns(self, customer, product, django_assert_num_queries):
+        """Test get_cart_total/get_cart_items/shipping don't touch the database"""
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=product, quantity=3)
+        order = Order.objects.get(pk=order.pk)
+        
+        with django_assert_num_queries(0):
+            assert order.get_cart_total == Decimal('30.00')
+            assert order.get_cart_items == 3
+            assert order.shipping is True
+            assert order.get_cart_total_after_points == Decimal('30.00')
+    
+    def test_digital_only_order_needs_no_shipping(self, customer):
+        """Test requires_shipping stays False for digital-only orders"""
+        ebook = Product.objects.create(name='Guide', slug='guide', price=Decimal('4.00'), digital=True)
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=ebook, quantity=1)
+        order.refresh_from_db()
+        assert order.requires_shipping is False
+    
+    def test_update_item_updates_totals(self, client, user, customer, product):
+        """Test the cart endpoint leaves the order totals in step"""
+        import json
+        client.force_login(user)
+        client.post(reverse('store:update_item'), data=json.dumps(
+            {'productId': product.id, 'action': 'add', 'quantity': 2}
+        ), content_type='application/json')
+        
+        order = Order.objects.get(customer=customer, status='Potential Order')
+        assert order.item_count == 2
+        assert order.subtotal == Decimal('20.00')
+    
+    def test_price_change_reprices_open_carts_only(self, customer, product):
+        """Test a price change updates open carts but not placed orders"""
+        cart = Order.objects.create(customer=customer, status='Potential Order')
+        placed = Order.objects.create(customer=customer, status='Order Received')
+        OrderItem.objects.create(order=cart, product=product, quantity=1)
+        OrderItem.objects.create(order=placed, product=product, quantity=1)
+        
+        product.price = Decimal('12.50')
+        product.save()
+        
+        cart.refresh_from_db()
+        placed.refresh_from_db()
+        assert cart.subtotal == Decimal('12.50')
+        assert placed.subtotal == Decimal('10.00')
+    
+    def test_check_command_reports_and_fixes_drift(self, customer, product):
+        """Test check_order_totals finds and repairs stale totals"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        OrderItem.objects.filter(order=order).update(quantity=5)  # bypasses signals
+        
+        out = StringIO()
+        call_command('check_order_totals', stdout=out)
+        assert '1 of 1 order(s) have stale totals' in out.getvalue()
+        order.refresh_from_db()
+        assert order.item_count == 2
+        
+        call_command('check_order_totals', '--fix', stdout=StringIO())
+        order.refresh_from_db()
+        assert order.item_count == 5
+        assert order.subtotal == Decimal('50.00')
+
+
 @pytest.mark.django_db
 class TestShipping:
     """Test shipping functionality"""
@@ -384,6 +948,72 @@ class TestCheckout:
         url = reverse('store:checkout')
         resp = client.get(url)
         assert resp.status_code == 200
+    
+    def test_process_order_places_authenticated_cart(self, client, user, customer, product):
+        """Test processOrder turns the potential order into a received order"""
+        import json
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=product, quantity=2)
+        client.force_login(user)
+        
+        payload = {
+            'form': {'total': '20.00'},
+            'shipping': {'address': '1 Test St', 'city': 'Testville', 'county': 'Testshire',
+                         'postcode': 'TE1 1ST', 'country': 'UK'},
+        }
+        resp = client.post(reverse('store:process_order'), data=json.dumps(payload),
+                           content_type='application/json')
+        assert resp.status_code == 200
+        
+        order.refresh_from_db()
+        product.refresh_from_db()
+        assert order.status == 'Order Received'
+        assert product.stock_quantity == 8
+    
+    def test_process_order_rejects_oversell_without_touching_stock(self, client, user, customer, products):
+        """Test a short line fails the checkout and rolls back the other lines"""
+        import json
+        order = Order.objects.create(customer=customer, status='Potential Order')
+        OrderItem.objects.create(order=order, product=products[0], quantity=2)
+        OrderItem.objects.create(order=order, product=products[1], quantity=11)
+        client.force_login(user)
+        
+        resp = client.post(reverse('store:process_order'), data=json.dumps({'form': {'total': '0'}}),
+                           content_type='application/json')
+        assert resp.status_code == 400
+        assert 'Product 2' in resp.json()['error']
+        
+        order.refresh_from_db()
+        assert order.status == 'Potential Order'
+        assert [p.stock_quantity for p in Product.objects.filter(pk__in=[products[0].pk, products[1].pk]).order_by('pk')] == [10, 10]
+    
+    def test_guest_process_order_deducts_stock(self, client, products):
+        """Test guest checkout takes stock for every cookie line"""
+        import json
+        client.cookies['cart'] = json.dumps({
+            str(products[0].id): {'quantity': 3},
+            str(products[1].id): {'quantity': 10},
+        })
+        resp = client.post(reverse('store:process_order'), data=json.dumps({'form': {'total': '0'}}),
+                           content_type='application/json')
+        assert resp.status_code == 200
+        products[0].refresh_from_db()
+        products[1].refresh_from_db()
+        assert products[0].stock_quantity == 7
+        assert products[1].stock_quantity == 0
+    
+    def test_take_stock_only_matches_while_stock_remains(self, product):
+        """Test the second of two competing deductions for the last units fails"""
+        assert Product.objects.take_stock({product.id: 10}) == []
+        assert Product.objects.take_stock({product.id: 1}) == [product.id]
+        product.refresh_from_db()
+        assert product.stock_quantity == 0
+    
+    def test_stock_cannot_go_negative(self, product):
+        """Test the database rejects negative stock"""
+        from django.db import IntegrityError, transaction
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Product.objects.filter(pk=product.pk).update(stock_quantity=-1)
 
 
 # ========== Points Integration ==========
@@ -477,3 +1107,231 @@ class TestManagementCommands:
         # Should not error
         captured = capsys.readouterr()
         assert 'error' not in captured.out.lower() or captured.out == ''
+
+
+# ========== Admin Changelists ==========
+
+@pytest.mark.django_db
+class TestAdminChangelistQueries:
+    """Test admin changelists stay within a fixed query budget regardless of row count"""
+    
+    ROWS = 100
+    
+    def make_customers(self, count, is_premium=False):
+        users = User.objects.bulk_create([
+            User(username=f'listuser{i}', email=f'list{i}@example.com') for i in range(count)
+        ])
+        return Customer.objects.bulk_create([
+            Customer(user=u, name=f'List User {i}', email=u.email, is_premium=(is_premium and i % 2 == 0))
+            for i, u in enumerate(users)
+        ])
+    
+    def test_parcel_changelist_query_budget(self, client, staff_user, django_assert_max_num_queries):
+        """Test 100 parcels list in a fixed number of queries"""
+        from store.models import IncomingParcel
+        customers = self.make_customers(self.ROWS, is_premium=True)
+        IncomingParcel.objects.bulk_create([
+            IncomingParcel(user_id=c.user_id, address='1 Test St')
+            for c in customers
+        ])
+        client.force_login(staff_user)
+        
+        with django_assert_max_num_queries(8):
+            resp = client.get('/admin/store/incomingparcel/')
+        assert resp.status_code == 200
+        assert resp.content.decode().count('Premium (20% bonus)') == self.ROWS // 2
+    
+    def test_order_changelist_query_budget(self, client, staff_user, product, django_assert_max_num_queries):
+        """Test 100 orders with addresses and totals list in a fixed number of queries"""
+        customers = self.make_customers(self.ROWS)
+        orders = [Order.objects.create(customer=c, status='Order Received') for c in customers]
+        OrderItem.objects.bulk_create([OrderItem(order=o, product=product, quantity=i % 3 + 1) for i, o in enumerate(orders)])
+        for order in orders:
+            order.refresh_totals()  # bulk_create() skips the signals that keep totals in step
+        ShippingAddress.objects.bulk_create([
+            ShippingAddress(customer=o.customer, order=o, address=f'{o.id} Admin Row', city='Testville',
+                            county='Testshire', postcode='TE1 1ST')
+            for o in orders
+        ])
+        client.force_login(staff_user)
+        
+        with django_assert_max_num_queries(8):
+            resp = client.get('/admin/store/order/')
+        assert resp.status_code == 200
+        content = resp.content.decode()
+        assert f'{orders[-1].id} Admin Row, Testville' in content
+        for quantity in (1, 2, 3):
+            expected = sum(1 for i in range(self.ROWS) if i % 3 + 1 == quantity)
+            assert content.count(f'<td class="field-get_total_display">£{quantity * 10}.00</td>') == expected
+    
+    def test_customer_changelist_query_budget(self, client, staff_user, django_assert_max_num_queries):
+        """Test 100 customers list in a fixed number of queries"""
+        self.make_customers(self.ROWS)
+        client.force_login(staff_user)
+        
+        with django_assert_max_num_queries(8):
+            resp = client.get('/admin/store/customer/')
+        assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+class TestAdminDashboard:
+    """Test the aggregated, cached staff dashboard"""
+    
+    def test_dashboard_counts_use_parcel_status_values(self, client, staff_user, user, customer):
+        """Test received parcels count as pending and old ones are flagged stale"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from store.models import IncomingParcel, ParcelStatus
+        IncomingParcel.objects.create(user=user, status=ParcelStatus.RECEIVED)
+        IncomingParcel.objects.create(user=user, status=ParcelStatus.RECEIVED,
+                                      date_submitted=timezone.now() - timedelta(days=10))
+        IncomingParcel.objects.create(user=user, status=ParcelStatus.AWAITING)
+        Order.objects.create(customer=customer, status='Order Received')
+        client.force_login(staff_user)
+        
+        resp = client.get('/admin/')
+        assert resp.context['pending_parcels_count'] == 2
+        assert resp.context['stale_parcels_count'] == 1
+        assert resp.context['pending_orders_count'] == 1
+        assert [p.is_stale for p in resp.context['pending_parcels']] == [False, True]
+        assert 'STALE' in resp.content.decode()
+    
+    def test_dashboard_is_cached_until_orders_change(self, client, staff_user, customer):
+        """Test reloads reuse the cached data and an order save invalidates it"""
+        client.force_login(staff_user)
+        Order.objects.create(customer=customer, status='Order Received')
+        assert client.get('/admin/').context['pending_orders_count'] == 1
+        
+        # Bypass signals: the cached figure is served
+        Order.objects.filter(customer=customer).update(status='Processing')
+        assert client.get('/admin/').context['pending_orders_count'] == 1
+        
+        Order.objects.create(customer=customer, status='Order Received')
+        resp = client.get('/admin/')
+        assert resp.context['pending_orders_count'] == 1
+        assert resp.context['processing_orders_count'] == 1
+    
+    def test_dashboard_is_not_cached_per_process(self, client, staff_user, customer, settings):
+        """Test a per-process cache, which other processes can't invalidate, is never used"""
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        client.force_login(staff_user)
+        Order.objects.create(customer=customer, status='Order Received')
+        assert client.get('/admin/').context['pending_orders_count'] == 1
+        
+        Order.objects.filter(customer=customer).update(status='Processing')
+        assert client.get('/admin/').context['pending_orders_count'] == 0
+
+
+@pytest.mark.django_db
+class TestAdminCalendar:
+    """Test calendar event loading and the JSON/ICS feed"""
+    
+    ROWS = 30
+    
+    def make_parcels(self, count):
+        from django.utils import timezone
+        from store.models import IncomingParcel, ParcelStatus
+        users = User.objects.bulk_create([
+            User(username=f'caluser{i}', email=f'cal{i}@example.com') for i in range(count)
+        ])
+        Customer.objects.bulk_create([Customer(user=u, name=f'Calendar User {i}') for i, u in enumerate(users)])
+        now = timezone.now()
+        IncomingParcel.objects.bulk_create([
+            IncomingParcel(user=u, address='1 Test St', status=ParcelStatus.AWAITING, date_submitted=now,
+                           wtn_signed_date=now, collection_scheduled_date=now.date())
+            for u in users
+        ])
+        return now.date()
+    
+    def test_events_load_in_constant_queries(self, django_assert_num_queries):
+        """Test every event source is one joined query, however many parcels there are"""
+        from datetime import timedelta
+        from store.admin_calendar import get_events_for_month
+        today = self.make_parcels(self.ROWS)
+        
+        # Subscriptions, PAYG, orders, pending WTNs, scheduled collections
+        with django_assert_num_queries(5):
+            events = get_events_for_month(today, today + timedelta(days=1))
+        assert sum(e['type'] == 'payg_request' for e in events) == self.ROWS
+        assert any(e['title'].endswith('Calendar User 0') for e in events)
+    
+    def test_feed_returns_json_events(self, client, staff_user):
+        """Test the feed lists events in the requested range"""
+        from datetime import timedelta
+        today = self.make_parcels(2)
+        client.force_login(staff_user)
+        
+        resp = client.get(reverse('store:admin_calendar_feed'), {
+            'start': today.isoformat(), 'end': (today + timedelta(days=1)).isoformat(),
+        })
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data['events']) == 4  # PAYG request and WTN countersign per parcel
+        assert {e['date'] for e in data['events']} == {today.isoformat()}
+        assert resp.has_header('ETag')
+    
+    def test_feed_returns_ics(self, client, staff_user):
+        """Test ?format=ics returns all-day VEVENTs"""
+        from datetime import timedelta
+        today = self.make_parcels(1)
+        client.force_login(staff_user)
+        
+        resp = client.get(reverse('store:admin_calendar_feed'), {
+            'start': today.isoformat(), 'end': (today + timedelta(days=1)).isoformat(), 'format': 'ics',
+        })
+        body = resp.content.decode()
+        assert resp['Content-Type'].startswith('text/calendar')
+        assert body.startswith('BEGIN:VCALENDAR\r\n')
+        assert body.count('BEGIN:VEVENT') == 2
+        assert f"DTSTART;VALUE=DATE:{today:%Y%m%d}" in body
+    
+    def test_ics_escapes_carriage_returns_and_folds_long_lines(self):
+        """Test CRLFs from textareas become \\n and lines are folded at 75 octets"""
+        from store.admin_calendar import escape_ics, fold_ics
+        
+        assert escape_ics('Line one\r\nLine two\rthree') == 'Line one\\nLine two\\nthree'
+        
+        line = 'DESCRIPTION:' + escape_ics('Café collection, ' * 10)
+        folded = fold_ics(line)
+        physical = folded.split('\r\n')
+        assert len(physical) > 1
+        assert all(len(part.encode('utf-8')) <= 75 for part in physical)
+        assert all(part.startswith(' ') for part in physical[1:])
+        assert ''.join(part[1:] if i else part for i, part in enumerate(physical)) == line
+        assert fold_ics('SUMMARY:short') == 'SUMMARY:short'
+    
+    def test_feed_conditional_get(self, client, staff_user, customer, django_assert_max_num_queries):
+        """Test an unchanged range revalidates with a 304 until an order changes"""
+        client.force_login(staff_user)
+        params = {'start': '2026-01-01', 'end': '2026-02-01'}
+        url = reverse('store:admin_calendar_feed')
+        etag = client.get(url, params)['ETag']
+        
+        with django_assert_max_num_queries(3):  # session, user and the version from the cache table
+            assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        
+        Order.objects.create(customer=customer, status='Order Received')
+        assert client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 200
+    
+    def test_feed_has_no_etag_with_a_per_process_cache(self, client, staff_user, settings):
+        """Test the feed isn't revalidated against a version other processes can't bump"""
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        client.force_login(staff_user)
+        resp = client.get(reverse('store:admin_calendar_feed'), {'start': '2026-01-01', 'end': '2026-02-01'})
+        assert resp.status_code == 200
+        assert 'ETag' not in resp
+    
+    def test_feed_rejects_bad_ranges(self, client, staff_user):
+        """Test missing, reversed or oversized ranges are rejected"""
+        client.force_login(staff_user)
+        url = reverse('store:admin_calendar_feed')
+        assert client.get(url).status_code == 400
+        assert client.get(url, {'start': '2026-02-01', 'end': '2026-01-01'}).status_code == 400
+        assert client.get(url, {'start': '2026-01-01', 'end': '2028-01-01'}).status_code == 400
+    
+    def test_feed_requires_staff(self, client, user):
+        """Test non-staff users are redirected to the admin login"""
+        client.force_login(user)
+        resp = client.get(reverse('store:admin_calendar_feed'), {'start': '2026-01-01', 'end': '2026-02-01'})
+        assert resp.status_code == 302
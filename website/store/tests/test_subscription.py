@@ -6,7 +6,8 @@ from datetime import date, timedelta
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
-from store.models import Customer, BusinessBoxPreference, PlasticType
+from store.models import Customer, BusinessBoxPreference, PlasticType, CollectionSchedule
+from store.scheduling import calculate_recurring_date, monthly_collection_dates
 
 
 class TestSubscriptionCancellation(TestCase):
@@ -351,3 +352,115 @@ class TestSubscriptionTermsDisplay(TestCase):
         response = self.client.get(reverse('store:subscription_setup'))
         self.assertEqual(response.status_code, 200)
         self.assertNotContains(response, 'Want more than 1 box?')
+
+
+class TestRecurringCollectionDates(TestCase):
+    """Test the closed-form nth-weekday calculation"""
+    
+    def test_same_occurrence_in_target_month(self):
+        """The 4th Thursday of December 2025 maps to the 4th Thursday of other months"""
+        reference = date(2025, 12, 25)
+        self.assertEqual(calculate_recurring_date(reference, 2026, 1), date(2026, 1, 22))
+        self.assertEqual(calculate_recurring_date(reference, 2026, 2), date(2026, 2, 26))
+    
+    def test_missing_fifth_occurrence_falls_back_to_last(self):
+        """A 5th Monday falls back to the last Monday when the month only has four"""
+        reference = date(2025, 12, 29)  # 5th Monday
+        self.assertEqual(calculate_recurring_date(reference, 2026, 2), date(2026, 2, 23))
+        self.assertEqual(calculate_recurring_date(reference, 2026, 3), date(2026, 3, 30))
+    
+    def test_dates_start_from_reference(self):
+        """No collections are generated before the preferred delivery day itself"""
+        reference = date(2026, 3, 10)  # 2nd Tuesday
+        dates = monthly_collection_dates(reference, date(2026, 1, 1), 4)
+        self.assertEqual(dates, [date(2026, 3, 10), date(2026, 4, 14)])
+
+
+class TestCollectionSchedule(TestCase):
+    """Test the materialized subscription collection schedule"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(username='scheduled', password='testpass123')
+        self.customer = Customer.objects.create(
+            user=self.user,
+            name='Scheduled Business',
+            email='scheduled@business.com',
+            is_business=True,
+            subscription_active=True,
+            box_count=3,
+            preferred_delivery_day=date.today() + timedelta(days=7),
+        )
+    
+    def test_schedule_created_for_new_subscriber(self):
+        """A subscriber gets a year of collections starting at their preferred day"""
+        dates = list(self.customer.collection_schedule.values_list('collection_date', flat=True))
+        self.assertEqual(dates[0], self.customer.preferred_delivery_day)
+        self.assertIn(len(dates), (11, 12))
+    
+    def test_schedule_follows_preferred_day_change(self):
+        """Changing the preferred day replaces the upcoming collections"""
+        new_day = date.today() + timedelta(days=10)
+        self.customer.preferred_delivery_day = new_day
+        self.customer.save()
+        
+        dates = list(self.customer.collection_schedule.values_list('collection_date', flat=True))
+        self.assertEqual(dates[0], new_day)
+        self.assertTrue(all(d.weekday() == new_day.weekday() for d in dates))
+    
+    def test_cancellation_clears_upcoming_collections(self):
+        """Cancelling the subscription removes future collections"""
+        self.customer.subscription_cancelled = True
+        self.customer.save()
+        
+        self.assertFalse(self.customer.collection_schedule.exists())
+    
+    def test_unrelated_save_keeps_schedule(self):
+        """Saving other fields does not rebuild the schedule"""
+        first = self.customer.collection_schedule.first()
+        self.customer.name = 'Renamed Business'
+        self.customer.save()
+        
+        self.assertTrue(CollectionSchedule.objects.filter(pk=first.pk).exists())
+    
+    def test_capacity_counts_collections_and_boxes(self):
+        """Capacity planning sums collections and boxes per day"""
+        collection_date = self.customer.preferred_delivery_day
+        other = User.objects.create_user(username='scheduled2', password='testpass123')
+        Customer.objects.create(
+            user=other,
+            name='Second Business',
+            is_business=True,
+            subscription_active=True,
+            box_count=2,
+            preferred_delivery_day=collection_date,
+        )
+        
+        capacity = list(CollectionSchedule.objects.capacity(collection_date, collection_date + timedelta(days=1)))
+        self.assertEqual(capacity, [{'collection_date': collection_date, 'collections': 2, 'boxes': 5}])
+    
+    def test_calendar_shows_scheduled_collections(self):
+        """The admin calendar lists the month's scheduled collections"""
+        User.objects.create_superuser(username='admin', email='admin@test.com', password='adminpass')
+        self.client.login(username='admin', password='adminpass')
+        collection_date = self.customer.preferred_delivery_day
+        
+        response = self.client.get(reverse('store:admin_calendar'), {
+            'year': collection_date.year, 'month': collection_date.month,
+        })
+        
+        events = response.context['events_by_date'][collection_date.strftime('%Y-%m-%d')]
+        self.assertTrue(any(e['type'] == 'subscription' and e['customer'] == self.customer for e in events))
+    
+    def test_refresh_command_rolls_schedule_forward(self):
+        """refresh_collection_schedule rebuilds schedules lost to bulk updates"""
+        from django.core.management import call_command
+        from io import StringIO
+        
+        CollectionSchedule.objects.all().delete()
+        out = StringIO()
+        call_command('refresh_collection_schedule', stdout=out)
+        
+        self.assertTrue(self.customer.collection_schedule.filter(
+            collection_date=self.customer.preferred_delivery_day
+        ).exists())
+        self.assertIn('1 customer(s)', out.getvalue())
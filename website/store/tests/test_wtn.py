@@ -15,14 +15,33 @@ from datetime import datetime, timedelta
 from io import StringIO
 from django.core.management import call_command
 from unittest.mock import patch, MagicMock
+import base64
+import io
 import os
 from django.conf import settings
+from PIL import Image, ImageDraw
 
-from store.models import Customer, IncomingParcel, ShippingAddress
+from store.models import Customer, IncomingParcel, ShippingAddress, WtnSignature, WtnSignatureRole
 from store.emails import send_wtn_reminder_email
+from store.signatures import MAX_SIZE, normalize_signature
 from store.wtn_pdf import generate_wtn_pdf
 
 
+def signature_data_url(size=(600, 200)):
+    """A signature pad's output: a stroke on a transparent canvas, as a PNG data URL"""
+    image = Image.new('RGBA', size, (255, 255, 255, 0))
+    ImageDraw.Draw(image).line([(40, 150), (160, 40), (300, 160), (560, 50)], fill=(0, 0, 0, 255), width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def sign(parcel, *roles):
+    for role in roles:
+        WtnSignature.store(parcel, role, signature_data_url())
+    return parcel
+
+
 @pytest.mark.django_db
 class TestWTNFormAndSigning:
     """Test WTN form display and customer signing"""
@@ -93,7 +112,7 @@ class TestWTNFormAndSigning:
         
         data = {
             'estimated_weight': '5.5',
-            'signature_data': 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...'
+            'signature_data': signature_data_url()
         }
         
         response = client.post(
@@ -108,7 +127,8 @@ class TestWTNFormAndSigning:
         # Check parcel was updated
         parcel.refresh_from_db()
         assert parcel.estimated_weight == 5.5
-        assert parcel.wtn_signature == data['signature_data']
+        signature = parcel.signatures.get(role=WtnSignatureRole.CUSTOMER)
+        assert bytes(signature.image).startswith(b'\x89PNG')
         assert parcel.wtn_signed_date is not None
         assert parcel.wtn_reference == f"WTN-{parcel.id:06d}"
         
@@ -127,7 +147,7 @@ class TestWTNFormAndSigning:
         
         data = {
             'estimated_weight': '5.5',
-            'signature_data': 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...'
+            'signature_data': signature_data_url()
         }
         
         client.post(reverse('store:waste_transfer_notice', args=[parcel.id]), data)
@@ -170,6 +190,37 @@ class TestWTNFormAndSigning:
         assert response.status_code == 200
         assert 'Please provide your signature' in response.content.decode()
     
+    def test_wtn_signing_rejects_unreadable_signature(self, client, business_customer, parcel):
+        """A signature that isn't a valid image should show an error and leave the WTN unsigned"""
+        client.force_login(business_customer.user)
+        
+        data = {
+            'estimated_weight': '5.5',
+            'signature_data': 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...'
+        }
+        
+        response = client.post(
+            reverse('store:waste_transfer_notice', args=[parcel.id]),
+            data
+        )
+        
+        assert response.status_code == 200
+        assert 'Your signature could not be read' in response.content.decode()
+        parcel.refresh_from_db()
+        assert parcel.wtn_signed_date is None
+        assert not parcel.signatures.exists()
+    
+    def test_wtn_signing_does_not_mask_save_errors(self, client, business_customer, parcel):
+        """A ValueError while saving the parcel isn't reported as an unreadable signature"""
+        client.force_login(business_customer.user)
+        
+        data = {'estimated_weight': '5.5', 'signature_data': signature_data_url()}
+        with patch.object(IncomingParcel, 'save', side_effect=ValueError('boom')):
+            with pytest.raises(ValueError, match='boom'):
+                client.post(reverse('store:waste_transfer_notice', args=[parcel.id]), data)
+        
+        assert not parcel.signatures.exists()
+    
     def test_wtn_signing_validates_weight_range(self, client, business_customer, parcel):
         """Weight must be between 0.1 and 30 kg"""
         client.force_login(business_customer.user)
@@ -215,11 +266,10 @@ class TestWTNAdminWorkflow:
             collection_scheduled_date=timezone.now().date() + timedelta(days=3),
             status='awaiting',
             estimated_weight=5.5,
-            wtn_signature='data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...',
             wtn_signed_date=timezone.now(),
             wtn_reference='WTN-000001'
         )
-        return parcel
+        return sign(parcel, WtnSignatureRole.CUSTOMER)
     
     def test_admin_can_countersign_wtn(self, signed_parcel, admin_user):
         """Admin should be able to countersign WTN via save_model"""
@@ -242,12 +292,13 @@ class TestWTNAdminWorkflow:
         admin_site = AdminSite()
         parcel_admin = IncomingParcelAdmin(IncomingParcel, admin_site)
         
-        # Set admin signature and approval
-        signed_parcel.wtn_admin_signature = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...'
+        # Set approval, with the admin signature as the form would clean it
         signed_parcel.wtn_admin_approved = True
         
         # Create a mock form
         form = MagicMock()
+        form.changed_data = ['wtn_admin_signature']
+        form.cleaned_data = {'wtn_admin_signature': normalize_signature(signature_data_url())}
         
         # Call save_model
         parcel_admin.save_model(request, signed_parcel, form, change=True)
@@ -257,6 +308,307 @@ class TestWTNAdminWorkflow:
         assert signed_parcel.wtn_admin_approved == True
         assert signed_parcel.wtn_admin_approved_date is not None
         assert signed_parcel.wtn_pdf_path is not None
+        assert signed_parcel.signatures.filter(role=WtnSignatureRole.ADMIN).exists()
+    
+    def test_change_form_shows_signatures(self, client, signed_parcel, admin_user):
+        """The change form should show the customer's signature and a pad prefilled with the admin's"""
+        sign(signed_parcel, WtnSignatureRole.ADMIN)
+        client.force_login(admin_user)
+        
+        response = client.get(f'/admin/store/incomingparcel/{signed_parcel.pk}/change/')
+        
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert 'name="wtn_admin_signature"' in content
+        signatures = WtnSignature.for_parcel(signed_parcel)
+        assert f'<img src="{signatures[WtnSignatureRole.CUSTOMER].data_url}"' in content
+        assert f'{signatures[WtnSignatureRole.ADMIN].data_url}</textarea>' in content
+
+
+@pytest.mark.django_db
+class TestWTNPdfQueue:
+    """Test background WTN PDF generation via PdfJob and run_pdf_worker"""
+    
+    def make_signed_parcels(self, count, approved=False):
+        user = User.objects.create_user(username='queued', password='pass123')
+        Customer.objects.create(user=user, name='Queued Business', is_business=True)
+        image = normalize_signature(signature_data_url())
+        parcels = [
+            IncomingParcel.objects.create(
+                user=user,
+                address='1 Queue St',
+                status='awaiting',
+                wtn_signed_date=timezone.now(),
+                wtn_reference=f'WTN-{900000 + i}',
+                wtn_admin_approved=approved,
+            )
+            for i in range(count)
+        ]
+        WtnSignature.objects.bulk_create([
+            WtnSignature(parcel=parcel, role=WtnSignatureRole.CUSTOMER, image=image) for parcel in parcels
+        ])
+        return parcels
+    
+    def admin_request(self, admin_user, data=None):
+        from django.test import RequestFactory
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        request = RequestFactory().post('/admin/store/incomingparcel/', data or {})
+        request.user = admin_user
+        setattr(request, 'session', 'session')
+        setattr(request, '_messages', FallbackStorage(request))
+        return request
+    
+    def test_approval_queues_pdf_without_rendering(self, admin_user):
+        """Approving in the admin should enqueue a job instead of rendering the PDF"""
+        from django.contrib.admin.sites import AdminSite
+        from store.admin import IncomingParcelAdmin
+        from store.models import PdfJob
+        parcel = self.make_signed_parcels(1)[0]
+        parcel.wtn_admin_approved = True
+        
+        with patch('store.wtn_pdf.generate_wtn_pdf') as mock_generate:
+            IncomingParcelAdmin(IncomingParcel, AdminSite()).save_model(
+                self.admin_request(admin_user), parcel, MagicMock(), change=True
+            )
+            IncomingParcelAdmin(IncomingParcel, AdminSite()).save_model(
+                self.admin_request(admin_user), parcel, MagicMock(), change=True
+            )
+        
+        assert not mock_generate.called
+        parcel.refresh_from_db()
+        assert parcel.wtn_admin_approved_date is not None
+        assert parcel.wtn_pdf_path == ''
+        assert PdfJob.objects.filter(parcel=parcel, status='pending').count() == 1
+    
+    def test_processing_an_approved_parcel_keeps_its_status(self, admin_user, plastic_types):
+        """Saving an already-approved parcel with its PDF still queued shouldn't undo processing"""
+        from django.contrib.admin.sites import AdminSite
+        from store.admin import IncomingParcelAdmin
+        from store.models import ParcelMaterial, PdfJob
+        parcel = self.make_signed_parcels(1, approved=True)[0]
+        parcel.wtn_admin_approved_date = timezone.now()
+        parcel.save()
+        PdfJob.enqueue([parcel])
+        ParcelMaterial.objects.create(parcel=parcel, plastic_type=plastic_types['pla'], weight_kg=2)
+        
+        parcel.status = 'processed'
+        parcel.points_calculated = 200
+        form = MagicMock()
+        form.changed_data = ['status', 'points_calculated']
+        IncomingParcelAdmin(IncomingParcel, AdminSite()).save_model(
+            self.admin_request(admin_user), parcel, form, change=True
+        )
+        
+        parcel.refresh_from_db()
+        assert parcel.status == 'processed'
+        assert parcel.points_awarded
+        assert parcel.user.customer.total_points == 200
+        assert PdfJob.objects.filter(parcel=parcel, status='pending').count() == 1
+    
+    def test_bulk_approval_is_constant_queries(self, admin_user, plastic_types, django_assert_max_num_queries):
+        """Approving 50 parcels at once should take a fixed handful of queries"""
+        from django.contrib.admin.sites import AdminSite
+        from store.admin import IncomingParcelAdmin
+        from store.models import ParcelMaterial, PdfJob
+        parcels = self.make_signed_parcels(50)
+        ParcelMaterial.objects.bulk_create([
+            ParcelMaterial(parcel=parcel, plastic_type=plastic_types['pla'], weight_kg=3) for parcel in parcels
+        ])
+        request = self.admin_request(admin_user, {'apply': 'yes', 'wtn_admin_signature': signature_data_url()})
+        
+        # 10 for the approval, 7 on the cache table for the dashboard and calendar
+        with django_assert_max_num_queries(17):
+            IncomingParcelAdmin(IncomingParcel, AdminSite()).approve_wtns(request, IncomingParcel.objects.all())
+        
+        for parcel in IncomingParcel.objects.filter(pk__in=[parcel.pk for parcel in parcels]):
+            assert parcel.wtn_admin_approved
+            assert parcel.wtn_admin_approved_date is not None
+            assert parcel.points_calculated == 300
+            assert parcel.signatures.filter(role=WtnSignatureRole.ADMIN).exists()
+            assert parcel.pdf_jobs.filter(status='pending').count() == 1
+    
+    def test_bulk_approval_requires_a_countersignature(self, admin_user):
+        """The action should ask for a countersignature and approve nothing without one"""
+        from django.contrib.admin.sites import AdminSite
+        from store.admin import IncomingParcelAdmin
+        from store.models import PdfJob
+        parcels = self.make_signed_parcels(2)
+        parcel_admin = IncomingParcelAdmin(IncomingParcel, AdminSite())
+        
+        response = parcel_admin.approve_wtns(self.admin_request(admin_user), IncomingParcel.objects.all())
+        assert 'name="wtn_admin_signature"' in response.content.decode()
+        
+        parcel_admin.approve_wtns(self.admin_request(admin_user, {'apply': 'yes'}), IncomingParcel.objects.all())
+        assert not IncomingParcel.objects.filter(pk__in=[parcel.pk for parcel in parcels], wtn_admin_approved=True).exists()
+        assert not PdfJob.objects.exists()
+    
+    def test_admin_badge_only_says_queued_with_a_live_job(self):
+        """Approved parcels without a PDF show Queued only while a job is pending or running"""
+        from django.contrib.admin.sites import AdminSite
+        from store.admin import IncomingParcelAdmin
+        from store.models import PdfJob
+        parcel_admin = IncomingParcelAdmin(IncomingParcel, AdminSite())
+        parcel = self.make_signed_parcels(1, approved=True)[0]
+        
+        def badge():
+            return str(parcel_admin.admin_signed_status(parcel_admin.get_queryset(None).get(pk=parcel.pk)))
+        
+        assert 'No PDF' in badge()
+        PdfJob.enqueue([parcel])
+        assert 'PDF Queued' in badge()
+        PdfJob.objects.filter(parcel=parcel).update(status='failed')
+        assert 'PDF Failed' in badge()
+    
+    def test_worker_renders_and_writes_back(self):
+        """run_pdf_worker should store the PDF path, clear signatures and finish the job"""
+        from store.models import PdfJob
+        parcel = self.make_signed_parcels(1, approved=True)[0]
+        PdfJob.enqueue([parcel])
+        
+        out = StringIO()
+        call_command('run_pdf_worker', '--workers', '0', stdout=out)
+        
+        parcel.refresh_from_db()
+        job = PdfJob.objects.get(parcel=parcel)
+        assert job.status == 'done'
+        assert parcel.wtn_pdf_path.endswith(f'{parcel.wtn_reference}.pdf')
+        assert not parcel.signatures.exists()
+        full_path = os.path.join(settings.MEDIA_ROOT, parcel.wtn_pdf_path)
+        assert os.path.exists(full_path)
+        assert 'Rendered 1 PDF(s)' in out.getvalue()
+        os.remove(full_path)
+    
+    def test_worker_retries_then_fails(self):
+        """Rendering errors should be retried with backoff, then marked failed"""
+        from store.models import PdfJob
+        parcel = self.make_signed_parcels(1, approved=True)[0]
+        PdfJob.enqueue([parcel])
+        
+        with patch('store.wtn_pdf.generate_wtn_pdf', side_effect=RuntimeError('boom')):
+            call_command('run_pdf_worker', '--workers', '0', '--max-attempts', '2', stdout=StringIO())
+            job = PdfJob.objects.get(parcel=parcel)
+            assert job.status == 'pending' and job.attempts == 1
+            assert job.next_attempt_at > timezone.now()
+            
+            PdfJob.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+            call_command('run_pdf_worker', '--workers', '0', '--max-attempts', '2', stdout=StringIO())
+        
+        job.refresh_from_db()
+        assert job.status == 'failed'
+        assert job.last_error == 'boom'
+        parcel.refresh_from_db()
+        assert parcel.wtn_pdf_path == ''
+
+
+@pytest.mark.django_db
+class TestWTNExport:
+    """Test the streamed bulk WTN ZIP export"""
+    
+    @pytest.fixture(autouse=True)
+    def render_inline(self, settings, tmp_path):
+        """Render missing PDFs in-process, into a throwaway media root"""
+        settings.WTN_EXPORT_WORKERS = 0
+        settings.MEDIA_ROOT = str(tmp_path)
+    
+    @pytest.fixture
+    def business(self, client):
+        user = User.objects.create_user(username='auditor', password='pass123')
+        Customer.objects.create(user=user, name='Audit Business', is_business=True)
+        client.force_login(user)
+        return user
+    
+    def make_wtn(self, user, reference, signed):
+        parcel = IncomingParcel.objects.create(
+            user=user, address='1 Audit Rd', wtn_reference=reference,
+            wtn_signed_date=signed, wtn_admin_approved=True,
+        )
+        return sign(parcel, WtnSignatureRole.CUSTOMER, WtnSignatureRole.ADMIN)
+    
+    def download(self, client, start, end):
+        import io
+        import zipfile
+        resp = client.get(reverse('store:business_wtn_export'), {'start': start, 'end': end})
+        assert resp.streaming
+        return zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content)))
+    
+    def test_export_reuses_and_renders_pdfs(self, client, business):
+        """Existing PDFs are reused, missing ones rendered and saved back"""
+        from datetime import datetime as dt
+        jan = timezone.make_aware(dt(2026, 1, 15, 10, 0))
+        on_disk = self.make_wtn(business, 'WTN-100001', jan)
+        on_disk.wtn_pdf_path = generate_wtn_pdf(on_disk)
+        on_disk.save(update_fields=['wtn_pdf_path'])
+        missing = self.make_wtn(business, 'WTN-100002', jan)
+        self.make_wtn(business, 'WTN-100003', timezone.make_aware(dt(2026, 3, 1)))  # Out of range
+        
+        with patch('store.wtn_pdf.generate_wtn_pdf', wraps=generate_wtn_pdf) as render:
+            archive = self.download(client, '2026-01-01', '2026-01-31')
+        
+        assert sorted(archive.namelist()) == ['2026-01/WTN-100001.pdf', '2026-01/WTN-100002.pdf']
+        assert archive.read('2026-01/WTN-100002.pdf').startswith(b'%PDF')
+        assert render.call_count == 1
+        missing.refresh_from_db()
+        assert missing.wtn_pdf_path.endswith('WTN-100002.pdf')
+    
+    def test_export_only_includes_own_wtns(self, client, business):
+        """Customers only ever download their own WTNs"""
+        other = User.objects.create_user(username='other-business', password='pass123')
+        self.make_wtn(other, 'WTN-200001', timezone.now())
+        
+        today = timezone.localdate().isoformat()
+        assert self.download(client, today, today).namelist() == []
+    
+    def test_failed_renders_listed_in_errors(self, client, business):
+        """WTNs that can't be rendered are reported inside the archive"""
+        self.make_wtn(business, 'WTN-300001', timezone.now())
+        
+        with patch('store.wtn_pdf.generate_wtn_pdf', side_effect=RuntimeError('bad signature')):
+            today = timezone.localdate().isoformat()
+            archive = self.download(client, today, today)
+        
+        assert archive.namelist() == ['ERRORS.txt']
+        assert 'WTN-300001: bad signature' in archive.read('ERRORS.txt').decode()
+    
+    def test_lost_pdfs_are_not_rendered_unsigned(self, client, business):
+        """A rendered WTN whose file is gone is reported, not re-rendered without its signatures"""
+        from store.models import PdfJob
+        lost = self.make_wtn(business, 'WTN-400001', timezone.now())
+        PdfJob.complete(lost.pk, generate_wtn_pdf(lost))
+        lost.refresh_from_db()
+        os.remove(os.path.join(settings.MEDIA_ROOT, lost.wtn_pdf_path))
+        
+        with patch('store.wtn_pdf.generate_wtn_pdf') as render:
+            today = timezone.localdate().isoformat()
+            archive = self.download(client, today, today)
+        
+        assert not render.called
+        assert archive.namelist() == ['ERRORS.txt']
+        assert 'WTN-400001: PDF file is missing' in archive.read('ERRORS.txt').decode()
+        assert IncomingParcel.objects.get(pk=lost.pk).wtn_pdf_path == lost.wtn_pdf_path
+    
+    def test_export_rejects_bad_ranges(self, client, business):
+        """Missing or reversed dates are rejected"""
+        url = reverse('store:business_wtn_export')
+        assert client.get(url).status_code == 400
+        assert client.get(url, {'start': '2026-02-01', 'end': '2026-01-01'}).status_code == 400
+    
+    def test_admin_action_streams_zip(self, admin_user):
+        """The admin action downloads the selected approved WTNs"""
+        import io
+        import zipfile
+        from django.contrib.admin.sites import AdminSite
+        from django.test import RequestFactory
+        from store.admin import IncomingParcelAdmin
+        user = User.objects.create_user(username='admin-export', password='pass123')
+        self.make_wtn(user, 'WTN-400001', timezone.now())
+        IncomingParcel.objects.create(user=user, address='Unsigned')
+        request = RequestFactory().post('/admin/store/incomingparcel/')
+        request.user = admin_user
+        
+        resp = IncomingParcelAdmin(IncomingParcel, AdminSite()).download_wtns(request, IncomingParcel.objects.all())
+        
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content)))
+        assert [name.split('/')[-1] for name in archive.namelist()] == ['WTN-400001.pdf']
 
 
 @pytest.mark.django_db
@@ -280,14 +632,12 @@ class TestWTNPDFGeneration:
             collection_scheduled_date=timezone.now().date() + timedelta(days=7),
             status='awaiting',
             estimated_weight=5.5,
-            wtn_signature='data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...',
             wtn_signed_date=timezone.now(),
             wtn_reference='WTN-000001',
             wtn_admin_approved=True,
-            wtn_admin_signature='data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...',
             wtn_admin_approved_date=timezone.now()
         )
-        return parcel
+        return sign(parcel, WtnSignatureRole.CUSTOMER, WtnSignatureRole.ADMIN)
     
     def test_generate_wtn_pdf_creates_file(self, signed_parcel):
         """PDF generation should create a file in media/wtn_pdfs/business_folder/"""
@@ -324,6 +674,109 @@ class TestWTNPDFGeneration:
         full_path = os.path.join(settings.MEDIA_ROOT, pdf_path)
         if os.path.exists(full_path):
             os.remove(full_path)
+    
+    def test_header_logo_prepared_once_per_process(self, signed_parcel):
+        """The logo should be loaded once and reused for every later PDF"""
+        from store import wtn_pdf
+        wtn_pdf.get_header_logo.cache_clear()
+        
+        with patch.object(wtn_pdf, 'find_logo_path', wraps=wtn_pdf.find_logo_path) as find_logo:
+            paths = [generate_wtn_pdf(signed_parcel) for _ in range(3)]
+        
+        assert find_logo.call_count == 1
+        full_path = os.path.join(settings.MEDIA_ROOT, paths[-1])
+        assert os.path.getsize(full_path) > 1000
+        os.remove(full_path)
+    
+    def test_benchmark_command_reports_both_passes(self):
+        """benchmark_wtn_pdf should time baseline and cached renders and leave no data behind"""
+        out = StringIO()
+        call_command('benchmark_wtn_pdf', '--count', '2', stdout=out)
+        
+        output = out.getvalue()
+        assert 'baseline: 2 PDFs' in output
+        assert 'cached: 2 PDFs' in output
+        assert not User.objects.filter(username='wtn-benchmark').exists()
+
+
+class TestSignatureNormalization:
+    """Test signature pad images are stored as small 1-bit PNGs"""
+    
+    def test_normalized_signature_is_small_1bit_png(self):
+        """A full-canvas RGBA signature should become a smaller, cropped 1-bit PNG"""
+        data_url = signature_data_url()
+        
+        png = normalize_signature(data_url)
+        image = Image.open(io.BytesIO(png))
+        
+        assert image.format == 'PNG'
+        assert image.mode == '1'
+        assert image.width <= MAX_SIZE[0] and image.height <= MAX_SIZE[1]
+        assert image.height < 200  # Cropped to the ink
+        assert len(png) < len(base64.b64decode(data_url.split(',')[1]))
+        assert len(png) < 4096
+    
+    def test_large_signature_is_scaled_down(self):
+        """Signatures from larger pads should be scaled to fit MAX_SIZE"""
+        image = Image.open(io.BytesIO(normalize_signature(signature_data_url(size=(2400, 800)))))
+        assert image.width <= MAX_SIZE[0] and image.height <= MAX_SIZE[1]
+    
+    def test_ink_survives_normalization(self):
+        """The stroke should still be there in black after thresholding"""
+        image = Image.open(io.BytesIO(normalize_signature(signature_data_url())))
+        assert 0 in image.getdata()
+    
+    @pytest.mark.parametrize('data_url', [
+        'data:image/png;base64,iVBORw0KGgoAAAANSUhEUg...',
+        'data:image/png;base64,' + base64.b64encode(b'not an image').decode(),
+        '',
+    ])
+    def test_invalid_signature_raises(self, data_url):
+        """Anything that isn't a decodable image should raise ValueError"""
+        with pytest.raises(ValueError):
+            normalize_signature(data_url)
+    
+    def test_blank_signature_raises(self):
+        """An empty canvas has no signature on it"""
+        buffer = io.BytesIO()
+        Image.new('RGBA', (600, 200), (255, 255, 255, 0)).save(buffer, format='PNG')
+        with pytest.raises(ValueError):
+            normalize_signature(base64.b64encode(buffer.getvalue()).decode())
+
+
+@pytest.mark.django_db
+class TestWtnSignatureModel:
+    """Test WtnSignature storage"""
+    
+    def test_store_replaces_earlier_signature(self):
+        """Re-signing should replace the parcel's signature for that role, not add another"""
+        user = User.objects.create_user(username='resign', password='pass123')
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        
+        WtnSignature.store(parcel, WtnSignatureRole.CUSTOMER, signature_data_url())
+        WtnSignature.store(parcel, WtnSignatureRole.CUSTOMER, signature_data_url(size=(400, 200)))
+        WtnSignature.store(parcel, WtnSignatureRole.ADMIN, signature_data_url())
+        
+        assert parcel.signatures.count() == 2
+        assert set(WtnSignature.for_parcel(parcel)) == {'customer', 'admin'}
+    
+    def test_data_url_round_trips(self):
+        """data_url should be the stored PNG, ready for an <img> or the admin signature pad"""
+        user = User.objects.create_user(username='roundtrip', password='pass123')
+        parcel = IncomingParcel.objects.create(user=user, address='1 Test St')
+        signature = WtnSignature.store(parcel, WtnSignatureRole.CUSTOMER, signature_data_url())
+        
+        assert signature.data_url.startswith('data:image/png;base64,')
+        assert normalize_signature(signature.data_url)  # Still a valid signature
+    
+    def test_parcel_queries_do_not_load_signatures(self, django_assert_num_queries):
+        """Listing parcels should be a single query that never touches signature images"""
+        user = User.objects.create_user(username='lean', password='pass123')
+        sign(IncomingParcel.objects.create(user=user, address='1 Test St'), WtnSignatureRole.CUSTOMER)
+        
+        with django_assert_num_queries(1) as context:
+            list(IncomingParcel.objects.all())
+        assert 'wtnsignature' not in context.captured_queries[0]['sql']
 
 
 @pytest.mark.django_db
@@ -349,7 +802,7 @@ class TestWTNEmailReminders:
         )
         return customer
     
-    @patch('store.emails.send_mail')
+    @patch('store.emails.queue_email')
     def test_send_wtn_reminder_email(self, mock_send_mail, subscription_customer):
         """Email reminder should be sent successfully"""
         parcel = IncomingParcel.objects.create(
@@ -401,7 +854,7 @@ class TestWTNReminderCommand:
         )
         return customer
     
-    @patch('store.emails.send_mail')
+    @patch('store.management.commands.send_wtn_reminders.queue_emails')
     def test_command_sends_reminders(self, mock_send_mail, subscription_customer_due_in_3_days):
         """Command should send email to customers with collections in 3 days"""
         out = StringIO()
@@ -414,7 +867,7 @@ class TestWTNReminderCommand:
         assert 'Sent 1 WTN reminder' in output
         assert subscription_customer_due_in_3_days.name in output
     
-    @patch('store.emails.send_mail')
+    @patch('store.management.commands.send_wtn_reminders.queue_emails')
     def test_command_sets_reminder_sent_flag(self, mock_send_mail, subscription_customer_due_in_3_days):
         """Command should set wtn_reminder_sent flag after sending"""
         call_command('send_wtn_reminders', stdout=StringIO())
@@ -428,7 +881,7 @@ class TestWTNReminderCommand:
         assert parcel.wtn_reminder_sent == True
         assert parcel.wtn_reminder_sent_date is not None
     
-    @patch('store.emails.send_mail')
+    @patch('store.management.commands.send_wtn_reminders.queue_emails')
     def test_command_prevents_spam(self, mock_send_mail, subscription_customer_due_in_3_days):
         """Command should NOT send email if reminder already sent"""
         # First run - should send
@@ -447,7 +900,7 @@ class TestWTNReminderCommand:
         assert 'Skipped' in output
         assert 'already sent' in output
     
-    @patch('store.emails.send_mail')
+    @patch('store.management.commands.send_wtn_reminders.queue_emails')
     def test_command_skips_signed_wtns(self, mock_send_mail, subscription_customer_due_in_3_days):
         """Command should skip parcels with already signed WTNs"""
         # Create parcel with signed WTN
@@ -459,7 +912,6 @@ class TestWTNReminderCommand:
             user=subscription_customer_due_in_3_days.user,
             collection_scheduled_date=target_date,
             wtn_signed_date=timezone.now(),
-            wtn_signature='data:image/png;base64,...'
         )
         
         out = StringIO()
@@ -481,7 +933,7 @@ class TestWTNReminderCommand:
         wednesday = datetime(2025, 11, 26).date()
         assert result == wednesday
     
-    @patch('store.emails.send_mail')
+    @patch('store.management.commands.send_wtn_reminders.queue_emails')
     def test_command_skips_cancelled_subscriptions(self, mock_send_mail):
         """Command should not send to cancelled subscriptions"""
         from store.management.commands.send_wtn_reminders import Command
@@ -503,6 +955,42 @@ class TestWTNReminderCommand:
         
         # Should not send to cancelled subscriptions
         assert mock_send_mail.call_count == 0
+    
+    def make_subscribers(self, count):
+        """Create `count` business subscribers due in 3 working days"""
+        from store.management.commands.send_wtn_reminders import Command
+        target_date = Command().add_working_days(timezone.now().date(), 3)
+        for i in range(count):
+            user = User.objects.create_user(username=f'bulk{i}', email=f'bulk{i}@test.com', password='pass123')
+            Customer.objects.create(
+                user=user, name=f'Bulk Customer {i}', is_business=True,
+                subscription_active=True, preferred_delivery_day=target_date,
+            )
+        return target_date
+    
+    def test_command_queues_reminders_in_batches(self):
+        """Command should queue one outbox row per reminder, batch by batch"""
+        from store.models import EmailOutbox
+        target_date = self.make_subscribers(5)
+        
+        out = StringIO()
+        call_command('send_wtn_reminders', '--batch-size', '2', stdout=out)
+        
+        assert EmailOutbox.objects.filter(subject__startswith='Action Required').count() == 5
+        parcels = IncomingParcel.objects.filter(collection_scheduled_date=target_date)
+        assert parcels.count() == 5
+        assert all(p.wtn_reminder_sent and p.parcel_prefix == 'BIP' for p in parcels)
+        assert 'Sent 5 WTN reminder(s) in' in out.getvalue()
+    
+    def test_command_query_count_is_constant(self, django_assert_num_queries):
+        """Command should run a fixed number of queries however many customers are due"""
+        self.make_subscribers(10)
+        
+        # Customers, existing parcels, bulk insert, then outbox insert + flag update
+        # (each in a savepoint) for the single batch, plus 7 on the cache table to
+        # drop the admin dashboard and move the calendar version
+        with django_assert_num_queries(14):
+            call_command('send_wtn_reminders', stdout=StringIO())
 
 
 @pytest.mark.django_db
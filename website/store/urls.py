@@ -1,7 +1,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
-from .admin_calendar import admin_calendar_view
+from .admin_calendar import admin_calendar_view, admin_calendar_feed
 
 app_name = 'store'
 
@@ -50,6 +50,7 @@ urlpatterns = [
     path('business/', views.business, name='business'),
     path('business/dashboard/', views.business_dashboard, name='business_dashboard'),
     path('business/dashboard/export/', views.business_dashboard_export, name='business_dashboard_export'),
+    path('business/dashboard/wtns/', views.business_wtn_export, name='business_wtn_export'),
     path('business/invoices/', views.business_invoices, name='business_invoices'),
     path('business/settings/', views.business_settings, name='business_settings'),
     path('business/service-management/', views.business_service_management, name='business_service_management'),
@@ -60,4 +61,5 @@ urlpatterns = [
     
     # Admin Calendar
     path('admin/calendar/', admin_calendar_view, name='admin_calendar'),
+    path('admin/calendar/feed/', admin_calendar_feed, name='admin_calendar_feed'),
 ]
\ No newline at end of file
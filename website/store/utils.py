@@ -1,40 +1,78 @@
 import json
+import logging
 from decimal import Decimal
 from .models import Product, Order, OrderItem, ShippingAddress, Customer, OrderStatus  # Added OrderStatus
 
-def cookieCart(request):
+logger = logging.getLogger(__name__)
+
+MAX_COOKIE_CART_LINES = 100
+
+
+def parse_cart_cookie(raw):
+    """
+    Validate the guest cart cookie and return {product_id: quantity}.
+    Expected shape: {"<product id>": {"quantity": <positive int>}, ...}
+    Malformed cookies give an empty cart; malformed lines are dropped.
+    """
+    if not raw:
+        return {}
     try:
-        cart = json.loads(request.COOKIES['cart'])
-    except:
-        cart = {}
-        print('CART:', cart)
+        cart = json.loads(raw)
+    except (TypeError, ValueError):
+        logger.warning('Ignoring unparseable cart cookie')
+        return {}
+    if not isinstance(cart, dict):
+        logger.warning('Ignoring cart cookie that is not an object')
+        return {}
+
+    lines = {}
+    for key, value in list(cart.items())[:MAX_COOKIE_CART_LINES]:
+        try:
+            product_id = int(key)
+            quantity = value['quantity']
+        except (TypeError, ValueError, KeyError):
+            continue
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+            continue
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+
+def cookieCart(request):
+    """Guest cart from the cart cookie. Active products load in one query, cached per request."""
+    cached = getattr(request, '_cookie_cart', None)
+    if cached is not None:
+        return cached
+
+    lines = parse_cart_cookie(request.COOKIES.get('cart'))
+    products = Product.objects.filter(is_active=True).in_bulk(list(lines)) if lines else {}
 
     items = []
     order = {'get_cart_total':0, 'get_cart_items':0, 'shipping':False}
-    cartItems = order['get_cart_items']
 
-    for i in cart:
-        try:
-            cartItems += cart[i]['quantity']
+    for product_id, quantity in lines.items():
+        product = products.get(product_id)
+        if product is None:
+            continue  # Product removed or deactivated since it was added to the cart
 
-            product = Product.objects.get(id=i)
-            total = (product.price * cart[i]['quantity'])
+        total = (product.price * quantity)
 
-            order['get_cart_total'] += total
-            order['get_cart_items'] += cart[i]['quantity']
+        order['get_cart_total'] += total
+        order['get_cart_items'] += quantity
 
-            item = {
-                'id':product.id,
-                'product':{'id':product.id,'name':product.name, 'price':product.price, 
-                'imageURL':product.imageURL}, 'quantity':cart[i]['quantity'],
-                'digital':product.digital,'get_total':total,
-            }
-            items.append(item)
+        item = {
+            'id':product.id,
+            'product':{'id':product.id,'name':product.name, 'price':product.price, 
+            'imageURL':product.imageURL}, 'quantity':quantity,
+            'digital':product.digital,'get_total':total,
+        }
+        items.append(item)
+
+        if product.digital == False: order['shipping'] = True
 
-            if product.digital == False: order['shipping'] = True
-        except:
-            pass
-    return {'cartItems': cartItems, 'order': order, 'items': items, 'needs_shipping': order['shipping']}
+    result = {'cartItems': order['get_cart_items'], 'order': order, 'items': items, 'needs_shipping': order['shipping']}
+    request._cookie_cart = result
+    return result
 
 def cartData(request):
     """Authenticated cart data without auto-creating blank orders."""
@@ -93,4 +131,72 @@ def get_cart_total(request):
                  .first())
         if order:
             return order.get_cart_total
-    return 0
\ No newline at end of file
+    return 0
+
+class RequestCart:
+    """
+    Request-scoped, lazy cart.
+
+    The header badge only needs `item_count`, which costs one single-column
+    query for logged-in users. Guests' counts come from the cookie, checked
+    against the active products in the same single query cookieCart uses (so
+    the full cart never repeats it), and no query at all with an empty cart.
+    The full cart (items, order, shipping, last address) is only built the
+    first time one of those attributes is read.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._item_count = None
+        self._data = None
+
+    @property
+    def item_count(self):
+        if self._item_count is None:
+            if self._data is not None:
+                self._item_count = self._data['cartItems']
+            elif self.request.user.is_authenticated:
+                count = (Order.objects
+                         .filter(customer__user=self.request.user, status=OrderStatus.POTENTIAL)
+                         .order_by('-id')
+                         .values_list('item_count', flat=True)
+                         .first())
+                self._item_count = count or 0
+            else:
+                self._item_count = cookieCart(self.request)['cartItems']
+        return self._item_count
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = cartData(self.request)
+            self._item_count = self._data['cartItems']
+        return self._data
+
+    @property
+    def order(self):
+        return self.data['order']
+
+    @property
+    def items(self):
+        return self.data['items']
+
+    @property
+    def needs_shipping(self):
+        return self.data['needs_shipping']
+
+    @property
+    def last_address(self):
+        return self.data['last_address']
+
+    def __str__(self):
+        return str(self.item_count)
+
+
+def get_request_cart(request):
+    """Return the RequestCart for this request, creating it on first use"""
+    cart = getattr(request, '_request_cart', None)
+    if cart is None:
+        cart = RequestCart(request)
+        request._request_cart = cart
+    return cart
@@ -1,22 +1,21 @@
 import json
 import datetime
 from decimal import Decimal, ROUND_FLOOR
-from django.apps import apps
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Count, F
+from django.db.models import F
 from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from django.db import connection
 
 from .models import *
-from .utils import cookieCart, cartData  # ✅ Removed guestOrder
+from .utils import cookieCart, get_request_cart, parse_cart_cookie  # ✅ Removed guestOrder
 from .emails import send_order_confirmation
+from .page_cache import anonymous_page_cache
 
 def get_client_ip(request):
     """Get client IP address from request"""
@@ -31,10 +30,8 @@ def get_client_ip(request):
 POINT_VALUE = Decimal('0.01')  # £ per point
 
 # ========== Public Pages ==========
+@anonymous_page_cache
 def home(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     from django.db.models import Sum
     
     # Count processed parcels (lowercase 'processed')
@@ -51,35 +48,29 @@ def home(request):
     latest_posts = BlogPost.objects.filter(published=True).order_by('-created_at')[:2]
     
     context = {
-        'cartItems': cartItems,
         'total_parcels': total_parcels,
         'total_mass': total_mass,
         'latest_posts': latest_posts,
     }
     return render(request, 'pages/home.html', context)
 
+@anonymous_page_cache
 def about(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    return render(request, 'pages/about.html', {'cartItems': cartItems})
+    return render(request, 'pages/about.html')
 
+@anonymous_page_cache
 def privacy(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    return render(request, 'pages/privacy.html', {'cartItems': cartItems})
+    return render(request, 'pages/privacy.html')
 
+@anonymous_page_cache
 def roadmap(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    return render(request, 'pages/roadmap.html', {'cartItems': cartItems})
+    return render(request, 'pages/roadmap.html')
 
 # ========== Store Views ==========
 def store(request):
-    data = cartData(request)
-    cartItems = data['cartItems']
     product_type = request.GET.get('product_type', '')
     colour = request.GET.get('colour', '')
-    products = Product.objects.all()
+    products = Product.objects.for_listing()
     if product_type:
         products = products.filter(product_type=product_type)
     if colour:
@@ -91,14 +82,11 @@ def store(request):
         'colour_choices': Product.COLOUR_CHOICES,
         'selected_product_type': product_type,
         'selected_colour': colour,
-        'cartItems': cartItems
     }
     return render(request, 'store/store.html', context)
 
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug)
-    data = cartData(request)
-    cartItems = data['cartItems']
+    product = get_object_or_404(Product.objects.for_listing(), slug=slug)
     
     # Get reviews for this product
     reviews = product.reviews.filter(is_approved=True).select_related('customer').order_by('-created_at')
@@ -115,7 +103,6 @@ def product_detail(request, slug):
     
     context = {
         'product': product,
-        'cartItems': cartItems,
         'reviews': reviews,
         'user_review': user_review,
         'can_review': can_review,
@@ -174,7 +161,7 @@ def submit_review(request, slug):
     })
 
 def cart(request):
-    data = cartData(request)
+    data = get_request_cart(request).data
     cartItems = data.get('cartItems', 0)
     order = data.get('order')
     items = data.get('items')
@@ -207,7 +194,7 @@ def cart(request):
     return render(request, 'store/cart.html', context)
 
 def checkout(request):
-    data = cartData(request)
+    data = get_request_cart(request).data
     cartItems = data['cartItems']
     order = data['order']
     items = data['items']
@@ -244,38 +231,37 @@ def update_item(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth required for this endpoint'}, status=401)
 
-    customer = request.user.customer
-    use_locks = connection.vendor != 'sqlite'
+    customer, _ = Customer.objects.get_or_create(
+        user=request.user,
+        defaults={'name': request.user.username, 'email': request.user.email},
+    )
 
+    # No row locks: availability is stock minus other carts' live reservations
     with transaction.atomic():
-        if use_locks:
-            product = Product.objects.select_for_update().get(id=product_id)
-            order = (Order.objects.select_for_update()
-                     .filter(customer=customer, status=OrderStatus.POTENTIAL)
-                     .order_by('-id').first()) or Order.objects.create(customer=customer, status=OrderStatus.POTENTIAL)
-            order_item, _ = OrderItem.objects.select_for_update().get_or_create(order=order, product=product)
-        else:
-            product = Product.objects.get(id=product_id)
-            order = (Order.objects
-                     .filter(customer=customer, status=OrderStatus.POTENTIAL)
-                     .order_by('-id').first()) or Order.objects.create(customer=customer, status=OrderStatus.POTENTIAL)
-            order_item, _ = OrderItem.objects.get_or_create(order=order, product=product)
+        product = Product.objects.get(id=product_id)
+        order = (Order.objects
+                 .filter(customer=customer, status=OrderStatus.POTENTIAL)
+                 .order_by('-id').first()) or Order.objects.create(customer=customer, status=OrderStatus.POTENTIAL)
+        order_item, _ = OrderItem.objects.get_or_create(order=order, product=product)
+        available = product.available_stock(exclude_order=order)
 
         if action == 'add':
             # Add treats qty<=0 as 1 (no negative adds)
             qty = max(1, qty)
             new_qty = order_item.quantity + qty
-            if product.stock_quantity <= 0:
+            if available <= 0:
                 return JsonResponse({'error': 'Product is out of stock'}, status=400)
-            if new_qty > product.stock_quantity:
-                return JsonResponse({'error': f'Only {product.stock_quantity} items available'}, status=400)
+            if new_qty > available:
+                return JsonResponse({'error': f'Only {available} items available'}, status=400)
             order_item.quantity = new_qty
             order_item.save()
+            StockReservation.hold(order, product, order_item.quantity)
             return JsonResponse({'ok': True, 'quantity': order_item.quantity})
 
         elif action == 'remove':
             qty = max(1, qty)
             order_item.quantity = max(0, order_item.quantity - qty)
+            StockReservation.hold(order, product, order_item.quantity)
             if order_item.quantity == 0:
                 order_item.delete()
                 return JsonResponse({'ok': True, 'deleted': True})
@@ -284,12 +270,14 @@ def update_item(request):
 
         elif action == 'set':
             if qty <= 0:
+                StockReservation.hold(order, product, 0)
                 order_item.delete()
                 return JsonResponse({'ok': True, 'deleted': True})
-            if qty > product.stock_quantity:
-                return JsonResponse({'error': f'Only {product.stock_quantity} items available'}, status=400)
+            if qty > available:
+                return JsonResponse({'error': f'Only {available} items available'}, status=400)
             order_item.quantity = qty
             order_item.save()
+            StockReservation.hold(order, product, order_item.quantity)
             return JsonResponse({'ok': True, 'quantity': order_item.quantity})
 
     return JsonResponse({'ok': True})
@@ -299,33 +287,37 @@ def processOrder(request):
     data = json.loads(request.body)
 
     if request.user.is_authenticated:
-        customer = request.user.customer
+        customer, _ = Customer.objects.get_or_create(
+            user=request.user,
+            defaults={'name': request.user.username, 'email': request.user.email},
+        )
         
         # Get the POTENTIAL order (the cart being checked out)
         order = (Order.objects
-                .filter(customer=customer, status=OrderStatus.POTENTIAL)
-                .annotate(item_count=Count('orderitem'))
-                .filter(item_count__gt=0)
+                .filter(customer=customer, status=OrderStatus.POTENTIAL, item_count__gt=0)
                 .order_by('-id')
                 .first())
         
         if not order:
             return JsonResponse({'error': 'Cart is empty'}, status=400)
         
-        # Check stock before processing
-        for item in order.orderitem_set.all():
-            if item.product.stock_quantity < item.quantity:
-                return JsonResponse({
-                    'error': f'{item.product.name} is out of stock or insufficient quantity available'
-                }, status=400)
+        items = list(order.orderitem_set.select_related('product'))
+        quantities = {}
+        for item in items:
+            if item.product_id:
+                quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
         
         with transaction.atomic():
-            # Deduct stock
-            for item in order.orderitem_set.all():
-                product = item.product
-                product.stock_quantity -= item.quantity
-                product.save()
-                print(f"✅ Deducted {item.quantity} from {product.name}. New stock: {product.stock_quantity}")
+            # Deduct stock: conditional UPDATEs, the affected row count decides success
+            short = Product.objects.take_stock(quantities)
+            if short:
+                transaction.set_rollback(True)
+                names = ', '.join(item.product.name for item in items if item.product_id in short)
+                return JsonResponse({
+                    'error': f'{names} is out of stock or insufficient quantity available'
+                }, status=400)
+            # The stock is now taken, so the cart's reservations are spent
+            StockReservation.objects.filter(order=order).delete()
 
             # >>> ADD: points deduction (clamped and persisted) <<<
             cart_total = Decimal(order.get_cart_total)
@@ -372,30 +364,18 @@ def processOrder(request):
     else:
         # Guest order - stock control for guests
         print('Processing guest order...')
-        cart = json.loads(request.COOKIES.get('cart', '{}'))
+        lines = parse_cart_cookie(request.COOKIES.get('cart'))
+        products = Product.objects.in_bulk(list(lines))
+        quantities = {product_id: qty for product_id, qty in lines.items() if product_id in products}
         
-        # Check stock for guest orders
-        out_of_stock = []
-        for product_id, item_data in cart.items():
-            product = Product.objects.get(id=product_id)
-            quantity = item_data['quantity']
-            
-            if product.stock_quantity < quantity:
-                out_of_stock.append(product.name)
-        
-        if out_of_stock:
-            return JsonResponse({
-                'error': f'Out of stock: {", ".join(out_of_stock)}'
-            }, status=400)
-        
-        # Deduct stock for guest orders
+        # Deduct stock for guest orders (all lines or none)
         with transaction.atomic():
-            for product_id, item_data in cart.items():
-                product = Product.objects.get(id=product_id)
-                quantity = item_data['quantity']
-                product.stock_quantity -= quantity
-                product.save()
-                print(f"✅ [GUEST] Deducted {quantity} from {product.name}. New stock: {product.stock_quantity}")
+            short = Product.objects.take_stock(quantities)
+            if short:
+                transaction.set_rollback(True)
+                return JsonResponse({
+                    'error': f'Out of stock: {", ".join(products[pid].name for pid in short)}'
+                }, status=400)
     
     return JsonResponse('Payment submitted successfully', safe=False)
 
@@ -408,7 +388,10 @@ def apply_points(request):
     requested = int(data.get('points', 0) or 0)
     requested = max(0, requested)
 
-    customer = request.user.customer
+    customer, _ = Customer.objects.get_or_create(
+        user=request.user,
+        defaults={'name': request.user.username, 'email': request.user.email},
+    )
     order = (Order.objects
              .filter(customer=customer, status=OrderStatus.POTENTIAL)
              .order_by('-id').first()) or Order.objects.create(customer=customer, status=OrderStatus.POTENTIAL)
@@ -435,8 +418,6 @@ def apply_points(request):
 
 # ========== Auth Views ==========
 def login(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     error = ''
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -445,17 +426,14 @@ def login(request):
         if user is not None:
             auth_login(request, user)
             return render(request, 'pages/home.html', {
-                'cartItems': cartItems,
                 'message': 'Login successful!'
             })
         else:
             error = 'Invalid username or password.'
-    return render(request, 'pages/login.html', {'cartItems': cartItems, 'error': error})
+    return render(request, 'pages/login.html', {'error': error})
 
 def username_reminder(request):
     """Send username reminder email to user"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     message = ''
     error = ''
     
@@ -503,14 +481,11 @@ Knightcycle
             error = 'Please enter your email address.'
     
     return render(request, 'store/username_reminder.html', {
-        'cartItems': cartItems,
         'message': message,
         'error': error
     })
 
 def register(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     error = ''
     form_data = {}
     
@@ -579,7 +554,6 @@ def register(request):
                 return redirect('home')
                 
     return render(request, 'pages/login.html', {
-        'cartItems': cartItems,
         'error': error,
         'form_data': form_data,
         'show_register': bool(error) or request.method == 'POST'
@@ -587,8 +561,6 @@ def register(request):
 
 def business_register(request):
     """Business registration - creates a business customer account"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     error = ''
     form_data = {}
     
@@ -731,7 +703,6 @@ def business_register(request):
                         return redirect('store:business_dashboard')
                 
     return render(request, 'pages/business_register.html', {
-        'cartItems': cartItems,
         'error': error,
         'form_data': form_data,
     })
@@ -744,9 +715,6 @@ def logout(request):
 # ========== User Profile & Orders ==========
 @login_required
 def profile(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     customer, _ = Customer.objects.get_or_create(
         user=request.user,
         defaults={'name': request.user.username, 'email': request.user.email}
@@ -903,7 +871,6 @@ def profile(request):
                     message = 'Newsletter subscription status updated.'
 
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'recent_transactions': recent_transactions,
         'recent_parcels': recent_parcels,
@@ -922,52 +889,24 @@ def profile(request):
 
 @login_required
 def orders(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    customer = getattr(request.user, 'customer', None)
-    orders = []
-    if customer:
-        orders = Order.objects.filter(customer=customer).order_by('-date_ordered')
-
-    IncomingParcel = apps.get_model('store', 'IncomingParcel')
-    parcels = []
-    if IncomingParcel:
-        parcels = IncomingParcel.objects.filter(user=request.user).order_by('-date_submitted')
-
-    # Combine orders and parcels into a single sorted list
-    combined = []
-    
-    # Add orders with their date
-    for order in orders:
-        combined.append({
-            'type': 'order',
-            'object': order,
-            'date': order.date_ordered
-        })
-    
-    # Add parcels with their date
-    for parcel in parcels:
-        # Use the first available date field
-        parcel_date = (
-            parcel.date_submitted or 
-            getattr(parcel, 'submitted_at', None) or 
-            getattr(parcel, 'created_at', None)
-        )
-        if parcel_date:
-            combined.append({
-                'type': 'parcel',
-                'object': parcel,
-                'date': parcel_date
-            })
+    """
+    The customer's orders and inbound parcels, newest first, a page at a time.
+    ?after= is the cursor from the previous page's "Older" link.
+    """
+    from django.http import HttpResponseBadRequest
+    from .activity import activity_page
     
-    # Sort combined list by date (most recent first)
-    combined.sort(key=lambda x: x['date'], reverse=True)
+    customer = getattr(request.user, 'customer', None)
+    cursor = request.GET.get('after')
+    try:
+        entries, next_cursor = activity_page(request.user, customer, cursor)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid page.")
 
     context = {
-        'orders': orders,
-        'parcels': parcels,
-        'combined': combined,
-        'cartItems': cartItems,
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     }
     return render(request, 'pages/orders.html', context)
 
@@ -996,19 +935,14 @@ def order_detail(request, order_id):
 @login_required
 def inbound_parcel_detail(request, pk):
     parcel = get_object_or_404(IncomingParcel, pk=pk, user=request.user)
-    data = cartData(request)
     return render(request, 'pages/inbound_parcels_details.html', {
         'parcel': parcel,
-        'cartItems': data.get('cartItems', 0),
     })
 
 
 # ========== Waste Recycling ==========
 @login_required
 def shipping_waste_form(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-
     if request.method == 'POST':
         # Get address fields
         address = request.POST.get('address')
@@ -1051,42 +985,49 @@ def shipping_waste_form(request):
     plastic_types = PlasticType.objects.all()
     
     return render(request, 'pages/shipping_waste_form.html', {
-        'cartItems': cartItems,
         'plastic_types': plastic_types,
     })
 
+@anonymous_page_cache
 def recycle_and_earn(request):
     """Public page - accessible to guests"""
-    data = cartData(request)  # works for guests too
-    return render(request, 'pages/recycle_and_earn.html', {
-        'cartItems': data.get('cartItems', 0),
-    })
+    return render(request, 'pages/recycle_and_earn.html')
 
 def shipping_waste_success(request):
     """Public success page"""
-    data = cartData(request)
-    return render(request, 'pages/shipping_waste_success.html', {  # Changed backslash to forward slash
-        'cartItems': data.get('cartItems', 0),
-    })
+    return render(request, 'pages/shipping_waste_success.html')
 
 @login_required
 def points_history(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
+    """
+    The customer's point transactions, newest first, a page at a time with the
+    balance after each, plus points earned and redeemed in the 12 most recent
+    months with any activity.
+    ?after= is the cursor from the previous page's "Older" link.
+    """
+    from django.http import HttpResponseBadRequest
+    from .activity import points_page
+    
     customer = getattr(request.user, 'customer', None)
-    transactions = []
+    cursor = request.GET.get('after')
+    transactions, next_cursor, monthly = [], None, []
     if customer:
-        transactions = PointTransaction.objects.filter(customer=customer).order_by('-date_created')  # Changed from date_submitted
+        try:
+            transactions, next_cursor = points_page(customer, cursor)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid page.")
+        monthly = customer.points_rollups.all()[:12]
 
     return render(request, 'pages/points_history.html', {
-        'cartItems': cartItems,
+        'customer': customer,
         'transactions': transactions,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
+        'monthly': monthly,
     })
 
 def finalize_checkout(request, order_id):
     """Finalize the checkout process, update order status, and send confirmation email."""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     customer = getattr(request.user, 'customer', None)
     order = None
 
@@ -1128,23 +1069,16 @@ def finalize_checkout(request, order_id):
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 def blog(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     # Get all published blog posts
     posts = BlogPost.objects.filter(published=True)
     
     context = {
-        'cartItems': cartItems,
         'posts': posts,
     }
     return render(request, 'store/blog.html', context)
 
 
 def blog_detail(request, slug):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     post = get_object_or_404(BlogPost, slug=slug, published=True)
     
     # Get related posts (latest 3, excluding current)
@@ -1153,17 +1087,14 @@ def blog_detail(request, slug):
     ).exclude(id=post.id)[:3]
     
     context = {
-        'cartItems': cartItems,
         'post': post,
         'related_posts': related_posts,
     }
     return render(request, 'store/blog_detail.html', context)
 
 
+@anonymous_page_cache
 def business(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     from django.db.models import Sum
     
     # Get stats for business page
@@ -1175,7 +1106,6 @@ def business(request):
     )['total'] or 0
     
     context = {
-        'cartItems': cartItems,
         'total_parcels': total_parcels,
         'total_mass': total_mass,
     }
@@ -1253,17 +1183,11 @@ def newsletter_signup(request):
         return JsonResponse({'success': False, 'message': 'An error occurred. Please try again.'})
 
 def contact(request):
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    context = {'cartItems': cartItems}
-    return render(request, 'store/contact.html', context)
+    return render(request, 'store/contact.html')
 
 @login_required
 def business_dashboard(request):
     """Business dashboard showing recycling stats and parcel tracking"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     # Get customer
     customer = Customer.objects.filter(user=request.user).first()
     
@@ -1273,7 +1197,6 @@ def business_dashboard(request):
     # Check if user is a business customer
     if not customer.is_business:
         return render(request, 'store/business_access_denied.html', {
-            'cartItems': cartItems,
             'message': 'This dashboard is only available for business customers. Please register for a business account.'
         })
     
@@ -1286,13 +1209,10 @@ def business_dashboard(request):
     # Get all parcels for this business user
     parcels = IncomingParcel.objects.filter(user=request.user).order_by('-date_submitted')
     
-    # Calculate stats
-    from django.db.models import Sum
-    
-    total_weight = ParcelMaterial.objects.filter(
-        parcel__user=request.user,
-        weight_kg__isnull=False
-    ).aggregate(total=Sum('weight_kg'))['total'] or 0
+    # Total weight is the same figure premium progress uses; the monthly rollup
+    # (kept up to date by the ParcelMaterial signals) only breaks it down
+    rollups = MonthlyRecyclingRollup.objects.filter(customer=customer)
+    total_weight = CustomerRecyclingStats.for_customer(customer).verified_weight_kg
     
     active_boxes = parcels.filter(status='awaiting').count()
     total_points = customer.total_points
@@ -1302,24 +1222,18 @@ def business_dashboard(request):
     filament_produced = float(total_weight) * 0.8 if total_weight else 0
     
     # Chart data - monthly waste tracking
-    import datetime
-    from django.db.models.functions import TruncMonth
-    
-    monthly_data = ParcelMaterial.objects.filter(
-        parcel__user=request.user,
-        weight_kg__isnull=False
-    ).annotate(
-        month=TruncMonth('parcel__date_submitted')
-    ).values('month').annotate(
-        total_weight=Sum('weight_kg')
-    ).order_by('month')
+    monthly_data = rollups.by_month()
     
     # Format for chart
     chart_labels = [item['month'].strftime('%b %Y') for item in monthly_data]
-    chart_data = [float(item['total_weight']) for item in monthly_data]
+    chart_data = [float(item['total_kg']) for item in monthly_data]
+    
+    # Per-plastic breakdown
+    plastic_data = rollups.by_plastic()
+    plastic_labels = [item['plastic_type__name'] for item in plastic_data]
+    plastic_chart_data = [float(item['total_kg']) for item in plastic_data]
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'parcels': parcels,
         'total_weight': round(float(total_weight), 2),
@@ -1328,6 +1242,8 @@ def business_dashboard(request):
         'filament_produced': round(filament_produced, 2),
         'chart_labels': json.dumps(chart_labels),
         'chart_data': json.dumps(chart_data),
+        'plastic_labels': json.dumps(plastic_labels),
+        'plastic_chart_data': json.dumps(plastic_chart_data),
         'setup_incomplete': setup_incomplete,
     }
     
@@ -1335,48 +1251,53 @@ def business_dashboard(request):
 
 @login_required
 def business_dashboard_export(request):
-    """Export parcel data as CSV"""
-    import csv
-    from django.http import HttpResponse
+    """
+    Stream parcel data as ?format=csv (default), xlsx or jsonl; ?gzip=1
+    compresses CSV and JSONL downloads
+    """
+    from django.http import HttpResponseBadRequest
+    from .parcel_export import FORMATS, parcel_export_response
     
     customer = Customer.objects.filter(user=request.user).first()
     if not customer or not customer.is_business:
         return redirect('store:home')
     
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="knightcycle_parcels_{customer.name}_{datetime.datetime.now().strftime("%Y%m%d")}.csv"'
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest(f"Unknown export format. Choose one of: {', '.join(FORMATS)}.")
     
-    writer = csv.writer(response)
-    writer.writerow(['Order ID', 'Status', 'WTN', 'Date Sent', 'Date Received', 'Weight (kg)', 'Points', 'Materials'])
+    parcels = IncomingParcel.objects.filter(user=request.user).order_by('-date_submitted', '-pk')
+    return parcel_export_response(
+        parcels,
+        f'knightcycle_parcels_{customer.name}_{datetime.datetime.now().strftime("%Y%m%d")}',
+        export_format,
+        gzip=request.GET.get('gzip') == '1',
+    )
+
+@login_required
+def business_wtn_export(request):
+    """Download every approved WTN signed between ?start= and ?end= (inclusive) as a ZIP"""
+    from django.http import HttpResponseBadRequest
+    from .wtn_export import wtn_parcels_for_range, wtn_zip_response
     
-    parcels = IncomingParcel.objects.filter(user=request.user).order_by('-date_submitted')
+    customer = Customer.objects.filter(user=request.user).first()
+    if not customer or not customer.is_business:
+        return redirect('store:home')
     
-    for parcel in parcels:
-        weight = parcel.materials.first().weight_kg if parcel.materials.exists() else 'Pending'
-        wtn = f'WTN-{parcel.pk:04d}' if parcel.status != 'awaiting' else 'Pending'
-        date_received = parcel.date_submitted.strftime('%Y-%m-%d') if parcel.status != 'awaiting' else '-'
-        materials = ', '.join([m.plastic_type.name for m in parcel.materials.all() if m.plastic_type])
-        
-        writer.writerow([
-            f'#{parcel.pk}',
-            parcel.get_status_display(),
-            wtn,
-            parcel.date_submitted.strftime('%Y-%m-%d'),
-            date_received,
-            weight or '-',
-            parcel.points_calculated or 'Pending',
-            materials or 'Not specified'
-        ])
-    
-    return response
+    try:
+        start = datetime.date.fromisoformat(request.GET['start'])
+        end = datetime.date.fromisoformat(request.GET['end'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Please choose a start and end date.')
+    if end < start:
+        return HttpResponseBadRequest('The end date must be on or after the start date.')
+    
+    parcels = wtn_parcels_for_range(start, end + datetime.timedelta(days=1), user=request.user)
+    return wtn_zip_response(parcels, f'knightcycle_wtns_{start:%Y%m%d}-{end:%Y%m%d}.zip')
 
 @login_required
 def business_invoices(request):
     """Business invoices page"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     customer = Customer.objects.filter(user=request.user).first()
     
     if not customer or not customer.is_business:
@@ -1386,7 +1307,6 @@ def business_invoices(request):
     orders = Order.objects.filter(customer=customer).order_by('-date_ordered')
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'orders': orders,
     }
@@ -1396,9 +1316,6 @@ def business_invoices(request):
 @login_required
 def business_service_management(request):
     """Business service management page - manage PAYG vs Subscription"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     customer = Customer.objects.filter(user=request.user).first()
     
     if not customer or not customer.is_business:
@@ -1476,7 +1393,6 @@ def business_service_management(request):
     subscription_plans = SubscriptionPlan.objects.all().order_by('display_order', 'name')
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'address': address,
         'message': message,
@@ -1490,9 +1406,6 @@ def business_service_management(request):
 @login_required
 def business_settings(request):
     """Business settings page - edit company info, address, subscription"""
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
-    
     customer = Customer.objects.filter(user=request.user).first()
     
     if not customer or not customer.is_business:
@@ -1655,7 +1568,6 @@ def business_settings(request):
                     error = ' '.join(e.messages)
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'address': address,
         'user': request.user,
@@ -1673,8 +1585,6 @@ def subscription_setup(request):
     from datetime import datetime, timedelta
     from .models import BusinessBoxPreference
     
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
     
     customer = Customer.objects.filter(user=request.user).first()
     
@@ -1811,7 +1721,6 @@ def subscription_setup(request):
         delivery_recurrence_text = f"{week_of_month}{suffix} {day_name}"
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'plastic_types': plastic_types,
         'error': error,
@@ -1864,16 +1773,14 @@ def waste_transfer_notice(request, parcel_id):
     import datetime
     from django.utils import timezone
     
-    data = cartData(request)
-    cartItems = data.get('cartItems', 0)
+    
+    # Get the parcel
+    parcel = get_object_or_404(IncomingParcel, id=parcel_id, user=request.user)
     
     customer = Customer.objects.filter(user=request.user).first()
     if not customer:
         return redirect('store:home')
     
-    # Get the parcel
-    parcel = get_object_or_404(IncomingParcel, id=parcel_id, user=request.user)
-    
     # Get saved shipping address
     address = ShippingAddress.objects.filter(
         customer=customer,
@@ -1893,35 +1800,49 @@ def waste_transfer_notice(request, parcel_id):
         elif not signature_data:
             error = 'Please provide your signature.'
         else:
+            from .signatures import normalize_signature
+            
             try:
                 weight = float(estimated_weight)
-                if weight <= 0 or weight > 30:
-                    error = 'Weight must be between 0.1 kg and 30 kg.'
-                else:
+            except ValueError:
+                weight = None
+            signature_image = None
+            if weight is None:
+                error = 'Invalid weight value.'
+            elif weight <= 0 or weight > 30:
+                error = 'Weight must be between 0.1 kg and 30 kg.'
+            else:
+                try:
+                    # Stored as a small 1-bit PNG in its own table
+                    signature_image = normalize_signature(signature_data)
+                except ValueError:
+                    error = 'Your signature could not be read. Please clear it and sign again.'
+            
+            if signature_image is not None:
+                with transaction.atomic():
+                    WtnSignature.objects.update_or_create(
+                        parcel=parcel, role=WtnSignatureRole.CUSTOMER, defaults={'image': signature_image},
+                    )
+                    
                     # Save WTN data to the parcel
                     parcel.estimated_weight = weight
                     parcel.wtn_signed_date = timezone.now()
                     parcel.wtn_reference = f"WTN-{parcel.id:06d}"
-                    parcel.wtn_signature = signature_data  # Save the signature
                     
                     # Reset reminder flag now that WTN is signed
                     parcel.wtn_reminder_sent = False
                     parcel.wtn_reminder_sent_date = None
                     
                     parcel.save()
-                    
-                    # TODO: Generate PDF WTN and email to customer
-                    
-                    return redirect('store:profile')  # Or wherever you want to redirect
-                    
-            except ValueError:
-                error = 'Invalid weight value.'
+                
+                # TODO: Generate PDF WTN and email to customer
+                
+                return redirect('store:profile')  # Or wherever you want to redirect
     
     # Generate WTN reference number
     reference_number = f"{parcel.id:06d}"
     
     context = {
-        'cartItems': cartItems,
         'customer': customer,
         'address': address,
         'parcel': parcel,
@@ -0,0 +1,164 @@
+"""
+Bulk WTN export: every approved WTN in a date range as one ZIP download.
+
+The archive is streamed as it is built, one chunk at a time, so memory use
+stays flat however many PDFs an audit covers. PDFs already on disk are reused
+as they are. Missing ones are rendered in a pool of worker processes while the
+existing ones stream, and are saved back to their parcels (see PdfJob.complete)
+so the next export finds them. A missing PDF can only be rendered while the
+parcel's signatures are still on file: once one has been rendered its
+signatures are deleted, so if that file is lost it is listed in ERRORS.txt
+rather than re-rendered unsigned.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import IncomingParcel, PdfJob, PdfJobStatus, WtnSignature
+from .wtn_pdf import init_pdf_process, render_parcel_pdf
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ZipStream(io.RawIOBase):
+    """Write-only, unseekable sink that hands back whatever zipfile has written so far"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def wtn_parcels_for_range(start, end, user=None):
+    """Approved WTNs signed on or after start and before end, optionally for one user"""
+    parcels = IncomingParcel.objects.filter(
+        wtn_admin_approved=True,
+        wtn_signed_date__date__gte=start,
+        wtn_signed_date__date__lt=end,
+    )
+    if user is not None:
+        parcels = parcels.filter(user=user)
+    return parcels
+
+
+def pdf_on_disk(parcel):
+    return bool(parcel.wtn_pdf_path) and os.path.exists(os.path.join(settings.MEDIA_ROOT, parcel.wtn_pdf_path))
+
+
+def archive_name(parcel, used_names):
+    """e.g. 2026-01/WTN-000042.pdf, made unique within the archive"""
+    reference = parcel.wtn_reference or f'WTN-{parcel.pk:06d}'
+    month = f"{timezone.localtime(parcel.wtn_signed_date):%Y-%m}"
+    name = f"{month}/{reference}.pdf"
+    if name in used_names:
+        name = f"{month}/{reference}-{parcel.pk}.pdf"
+    used_names.add(name)
+    return name
+
+
+def iter_wtn_zip(parcels, workers=None):
+    """
+    Yield a ZIP archive of the parcels' WTN PDFs chunk by chunk.
+    Parcels whose PDF couldn't be rendered (or can no longer be, see the
+    module docstring) are listed in ERRORS.txt.
+    """
+    if workers is None:
+        workers = getattr(settings, 'WTN_EXPORT_WORKERS', 4)
+    parcels = list(
+        parcels.annotate(
+            renderable=(
+                Exists(WtnSignature.objects.filter(parcel=OuterRef('pk')))
+                | Exists(PdfJob.objects.filter(
+                    parcel=OuterRef('pk'), status__in=[PdfJobStatus.PENDING, PdfJobStatus.RUNNING],
+                ))
+            ),
+        ).order_by('wtn_signed_date', 'pk')
+    )
+    ready = [parcel for parcel in parcels if pdf_on_disk(parcel)]
+    missing = [parcel for parcel in parcels if not pdf_on_disk(parcel) and parcel.renderable]
+
+    sink = ZipStream()
+    used_names = set()
+    errors = [
+        f"{parcel.wtn_reference or parcel}: PDF file is missing and its signatures have already been cleared"
+        for parcel in parcels
+        if not pdf_on_disk(parcel) and not parcel.renderable
+    ]
+    pool = None
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        def add(parcel, pdf_path):
+            info = zipfile.ZipInfo(
+                archive_name(parcel, used_names),
+                date_time=timezone.localtime(parcel.wtn_signed_date).timetuple()[:6],
+            )
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, mode='w') as entry, open(os.path.join(settings.MEDIA_ROOT, pdf_path), 'rb') as pdf:
+                for chunk in iter(lambda: pdf.read(CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    yield from flush()
+            yield from flush()
+
+        def flush():
+            data = sink.pop()
+            if data:
+                yield data
+
+        try:
+            if missing and workers > 0 and len(missing) > 1:
+                # Spawned (not forked) so the pool never shares this request's database connection
+                pool = ProcessPoolExecutor(
+                    max_workers=min(workers, len(missing)),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_pdf_process,
+                )
+                rendering = {pool.submit(render_parcel_pdf, parcel.pk): parcel for parcel in missing}
+            else:
+                rendering = {}
+
+            # Stream what's already on disk while the pool renders the rest
+            for parcel in ready:
+                yield from add(parcel, parcel.wtn_pdf_path)
+
+            if rendering:
+                results = ((rendering[future], future.result) for future in as_completed(rendering))
+            else:
+                results = ((parcel, lambda parcel=parcel: render_parcel_pdf(parcel.pk)) for parcel in missing)
+            for parcel, result in results:
+                try:
+                    pdf_path = result()
+                except Exception as e:
+                    errors.append(f"{parcel.wtn_reference or parcel}: {e}")
+                    continue
+                PdfJob.complete(parcel.pk, pdf_path)
+                yield from add(parcel, pdf_path)
+
+            if errors:
+                archive.writestr('ERRORS.txt', 'These WTNs could not be included:\n' + '\n'.join(errors) + '\n')
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+    yield from flush()
+
+
+def wtn_zip_response(parcels, filename):
+    """StreamingHttpResponse downloading the parcels' WTNs as `filename`"""
+    response = StreamingHttpResponse(iter_wtn_zip(parcels), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -11,10 +11,17 @@ from reportlab.lib.utils import ImageReader
 from django.conf import settings
 import os
 from datetime import datetime
-import base64
 import io
+from functools import lru_cache
 from PIL import Image
 
+HEADER_COLOR = '#10b981'  # Green theme
+HEADER_HEIGHT = 80
+# Logo box in the top right of the header, in points
+LOGO_WIDTH, LOGO_HEIGHT = 110, 65
+# Print resolution the logo is pre-scaled to
+LOGO_DPI = 300
+
 
 def generate_wtn_pdf(parcel):
     """
@@ -22,7 +29,9 @@ def generate_wtn_pdf(parcel):
     Creates business-specific folders and uses WTN reference for filename
     Returns the file path relative to MEDIA_ROOT
     """
-    from store.models import Customer
+    from store.models import Customer, WtnSignature, WtnSignatureRole
+    
+    signatures = WtnSignature.for_parcel(parcel)
     
     # Get customer to create business-specific folder
     customer = None
@@ -51,32 +60,7 @@ def generate_wtn_pdf(parcel):
     width, height = A4
     
     # Header with Knightcycle branding
-    c.setFillColor(colors.HexColor('#10b981'))  # Green theme
-    c.rect(0, height - 80, width, 80, fill=True, stroke=False)
-    
-    # Add logo on top right of green header
-    try:
-        logo_path = os.path.join(settings.BASE_DIR, 'static', 'images', 'logo_v2.png')
-        if not os.path.exists(logo_path):
-            # Try STATIC_ROOT if BASE_DIR/static doesn't work
-            logo_path = os.path.join(settings.STATIC_ROOT, 'images', 'logo_v2.png') if settings.STATIC_ROOT else None
-        
-        if logo_path and os.path.exists(logo_path):
-            logo_reader = ImageReader(logo_path)
-            # Position logo on top right (adjust size and position as needed)
-            c.drawImage(logo_reader, width - 130, height - 75, width=110, height=65, preserveAspectRatio=True, mask='auto')
-        else:
-            print(f"Logo not found at: {logo_path}")
-    except Exception as e:
-        print(f"Could not load logo: {e}")
-    
-    c.setFillColor(colors.white)
-    c.setFont("Helvetica-Bold", 24)
-    c.drawString(50, height - 40, "WASTE TRANSFER NOTE")
-    
-    c.setFont("Helvetica", 10)
-    c.drawString(50, height - 58, "Duty of care: waste transfer note")
-    c.drawString(50, height - 72, "The Waste (England and Wales) Regulations 2011")
+    draw_header(c, width, height)
     
     # Reset to black for content
     c.setFillColor(colors.black)
@@ -194,15 +178,9 @@ def generate_wtn_pdf(parcel):
     c.drawString(right_col_x + 5, sig_y, f"Signed: {parcel.wtn_signed_date.strftime('%d %B %Y %H:%M') if parcel.wtn_signed_date else 'N/A'}")
     sig_y -= 14
     
-    if parcel.wtn_signature:
+    if WtnSignatureRole.CUSTOMER in signatures:
         try:
-            if parcel.wtn_signature.startswith('data:image'):
-                signature_data = parcel.wtn_signature.split(',')[1]
-            else:
-                signature_data = parcel.wtn_signature
-            
-            img_data = base64.b64decode(signature_data)
-            img_reader = ImageReader(io.BytesIO(img_data))
+            img_reader = ImageReader(io.BytesIO(bytes(signatures[WtnSignatureRole.CUSTOMER].image)))
             c.drawImage(img_reader, right_col_x + 5, sig_y - 45, width=150, height=45, preserveAspectRatio=True, mask='auto')
         except Exception as e:
             c.setFont("Helvetica-Oblique", 8)
@@ -303,26 +281,16 @@ def generate_wtn_pdf(parcel):
         c.drawString(right_col_x + 5, sig_y, f"Approved: {parcel.wtn_admin_approved_date.strftime('%d %B %Y %H:%M') if parcel.wtn_admin_approved_date else 'N/A'}")
         sig_y -= 14
         
-        if parcel.wtn_admin_signature:
+        if WtnSignatureRole.ADMIN in signatures:
             try:
-                print(f">>> Admin signature found, length: {len(parcel.wtn_admin_signature)}")
-                if parcel.wtn_admin_signature.startswith('data:image'):
-                    admin_sig_data = parcel.wtn_admin_signature.split(',')[1]
-                else:
-                    admin_sig_data = parcel.wtn_admin_signature
-                
-                admin_img_data = base64.b64decode(admin_sig_data)
-                admin_img_reader = ImageReader(io.BytesIO(admin_img_data))
+                admin_img_reader = ImageReader(io.BytesIO(bytes(signatures[WtnSignatureRole.ADMIN].image)))
                 c.drawImage(admin_img_reader, right_col_x + 5, sig_y - 45, width=150, height=45, preserveAspectRatio=True, mask='auto')
-                print(f">>> Admin signature rendered successfully")
                 sig_y -= 50
             except Exception as e:
-                print(f">>> ERROR rendering admin signature: {e}")
                 c.setFont("Helvetica-Oblique", 8)
                 c.drawString(right_col_x + 5, sig_y, f"[Error: {str(e)[:30]}]")
                 sig_y -= 15
         else:
-            print(f">>> No admin signature found for parcel {parcel.id}")
             c.setFont("Helvetica-Oblique", 8)
             c.drawString(right_col_x + 5, sig_y, "[Pending]")
             sig_y -= 15
@@ -348,6 +316,81 @@ def generate_wtn_pdf(parcel):
     return f'wtn_pdfs/{business_folder}/{filename}'
 
 
+def init_pdf_process():
+    """Pool initializer: give each rendering process its own Django setup and database connections"""
+    import django
+    from django.db import connections
+    django.setup()
+    connections.close_all()
+
+
+def render_parcel_pdf(parcel_id):
+    """Render one parcel's WTN PDF by id (picklable for process pools); returns the relative path"""
+    from store.models import IncomingParcel
+    return generate_wtn_pdf(IncomingParcel.objects.select_related('user').get(pk=parcel_id))
+
+
+def find_logo_path():
+    """logo_v2.png from BASE_DIR/static, falling back to STATIC_ROOT; None if missing"""
+    logo_path = os.path.join(settings.BASE_DIR, 'static', 'images', 'logo_v2.png')
+    if not os.path.exists(logo_path):
+        # Try STATIC_ROOT if BASE_DIR/static doesn't work
+        logo_path = os.path.join(settings.STATIC_ROOT, 'images', 'logo_v2.png') if settings.STATIC_ROOT else None
+    if logo_path and os.path.exists(logo_path):
+        return logo_path
+    print(f"Logo not found at: {logo_path}")
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_header_logo():
+    """
+    The header logo, prepared once per process.
+
+    Embedding the full-size transparent PNG made ReportLab re-encode about a
+    megabyte of pixels (and a separate alpha mask) for every PDF, which was
+    most of the render time. The logo always sits on the solid header colour,
+    so it is flattened onto that colour, scaled down to LOGO_DPI for its box,
+    and kept as JPEG bytes, which ReportLab embeds without re-encoding.
+    Returns None if the logo is missing or unreadable.
+    """
+    logo_path = find_logo_path()
+    if not logo_path:
+        return None
+    try:
+        with Image.open(logo_path) as logo:
+            logo = logo.convert('RGBA')
+            logo.thumbnail((LOGO_WIDTH * LOGO_DPI // 72, LOGO_HEIGHT * LOGO_DPI // 72), Image.LANCZOS)
+            flattened = Image.new('RGB', logo.size, HEADER_COLOR)
+            flattened.paste(logo, mask=logo.getchannel('A'))
+        buffer = io.BytesIO()
+        flattened.save(buffer, format='JPEG', quality=92)
+        return buffer.getvalue()
+    except Exception as e:
+        print(f"Could not load logo: {e}")
+        return None
+
+
+def draw_header(c, width, height):
+    """Green title band with the logo on the right; identical on every WTN"""
+    c.setFillColor(colors.HexColor(HEADER_COLOR))
+    c.rect(0, height - HEADER_HEIGHT, width, HEADER_HEIGHT, fill=True, stroke=False)
+    
+    # Add logo on top right of green header
+    logo = get_header_logo()
+    if logo:
+        c.drawImage(ImageReader(io.BytesIO(logo)), width - 130, height - 75,
+                    width=LOGO_WIDTH, height=LOGO_HEIGHT, preserveAspectRatio=True)
+    
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 24)
+    c.drawString(50, height - 40, "WASTE TRANSFER NOTE")
+    
+    c.setFont("Helvetica", 10)
+    c.drawString(50, height - 58, "Duty of care: waste transfer note")
+    c.drawString(50, height - 72, "The Waste (England and Wales) Regulations 2011")
+
+
 def draw_section_header(c, x, y, width, text):
     """Draw a section header box with text"""
     # Safety check for None values
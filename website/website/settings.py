@@ -102,6 +102,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'store.context_processors.cart',  # Lazy cart badge (cartItems)
                 # add any other context processors you need here
             ],
         },
@@ -135,6 +136,22 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Must be shared by every worker process: the guest page cache, admin dashboard
+# and admin calendar ETag are invalidated by whichever process saves a change
+# (see store/page_cache.py). The default database table needs no extra service;
+# create it with `python manage.py createcachetable`. Point CACHE_BACKEND and
+# CACHE_LOCATION at Redis or Memcached instead if one is available.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'django_cache'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 